@@ -0,0 +1,182 @@
+"""
+=============================================================
+  AGING DAS FATURAS EM ABERTO (DIAS DE ATRASO POR FAIXA)
+  Quantos dias cada fatura atrasada ou em aberto está vencida
+  em uma data de referência, em faixas (0–30, 31–60, 61–90,
+  91+) por competência e tipo de cliente. Além delas, "a
+  vencer" reúne as faturas cujo vencimento ainda não chegou
+  na data (atraso negativo), para que as faixas somem toda a
+  carteira em aberto.
+
+  O estado é um histograma mesclável do vencimento em dias
+  int64 — (competencia, tipo, status, dia) → faturas, valor
+  — acumulado bloco a bloco. Uma faixa [lo, hi] de atraso
+  na data R são os vencimentos em [R − hi, R − lo]: com a
+  soma acumulada do histograma ao longo dos dias, qualquer
+  quantidade de datas de referência sai de uma única busca
+  binária vetorizada, sem reler a base — o histórico diário
+  de aging é uma chamada só:
+
+    aging.snapshots(pd.date_range("2021-09-01", "2021-10-31"))
+
+  Vale o status da extração: uma fatura atrasada hoje é
+  tratada como em aberto em toda data de referência passada
+  (o histórico descreve a carteira em aberto atual, não as
+  faturas pagas depois).
+=============================================================
+"""
+
+import numpy as np
+import pandas as pd
+
+ABERTOS = ["atrasada", "em aberto"]
+COLUNAS = ["competencia", "tipo_cliente", "status_fatura", "valor_fatura", "data_vencimento"]
+# (rótulo, menor, maior) dias de atraso; None = sem limite
+FAIXAS = [("a vencer", None, -1), ("0–30", 0, 30), ("31–60", 31, 60),
+          ("61–90", 61, 90), ("91+", 91, None)]
+CHAVE = ["competencia", "tipo_cliente", "status_fatura", "dia"]
+POR = ["competencia", "tipo_cliente"]
+
+_EPOCA = np.datetime64("1970-01-01", "D")
+
+
+def dias(datas):
+    """Datas → dias desde 1970-01-01 (int64)."""
+    d = np.asarray(pd.to_datetime(datas), dtype="datetime64[D]")
+    return (d - _EPOCA).astype(np.int64)
+
+
+def datas_referencia(itens):
+    """["2021-10-31", "2021-09-01:2021-09-30"] → datas (intervalos diários inclusivos)."""
+    datas = []
+    for item in itens:
+        inicio, sep, fim = item.partition(":")
+        datas.extend(pd.date_range(inicio, fim) if sep else [pd.Timestamp(item)])
+    return pd.DatetimeIndex(datas).unique().sort_values()
+
+
+class AgingVencimentos:
+    """
+        aging = AgingVencimentos()
+        for bloco in ler_em_blocos("base.csv"):
+            aging.atualizar(bloco)
+        aging.mesclar(outro)                          # outro arquivo/processo
+        aging.snapshots(["2021-09-30", "2021-10-31"])  # uma linha por data × grupo × faixa
+
+    Só as faturas em ABERTOS entram no estado; o tamanho dele cresce com
+    os dias de vencimento distintos, não com as faturas.
+    """
+
+    def __init__(self):
+        self._partes = []
+
+    # ── atualização ───────────────────────────────────────
+    def atualizar(self, bloco):
+        aberto = bloco["status_fatura"].isin(ABERTOS).to_numpy()
+        if not aberto.any():
+            return self
+        b = bloco.loc[aberto, ["competencia", "tipo_cliente", "status_fatura", "valor_fatura"]]
+        b = b.assign(dia=dias(bloco.loc[aberto, "data_vencimento"]))
+        self._partes.append(
+            b.groupby(CHAVE, observed=True)
+             .agg(qtd=("valor_fatura", "size"), valor=("valor_fatura", "sum"))
+        )
+        if len(self._partes) >= 8:
+            self.compactar()
+        return self
+
+    def mesclar(self, outro):
+        self._partes += outro._partes
+        return self.compactar()
+
+    def compactar(self):
+        if len(self._partes) > 1:
+            self._partes = [pd.concat(self._partes).groupby(level=CHAVE, observed=True).sum()]
+        return self
+
+    @property
+    def tabela(self):
+        """(competencia, tipo, status, dia) → qtd, valor, compactado."""
+        if not self._partes:
+            raise ValueError("Aging vazio: nenhuma fatura em aberto consumida.")
+        return self.compactar()._partes[0]
+
+    # ── persistência ──────────────────────────────────────
+    def estado(self):
+        return {"tabela": self.tabela if self._partes else None}
+
+    @classmethod
+    def de_estado(cls, estado):
+        aging = cls()
+        if estado["tabela"] is not None:
+            aging._partes = [estado["tabela"]]
+        return aging
+
+    # ── consultas ─────────────────────────────────────────
+    def data_maxima(self):
+        """Último vencimento em aberto (referência padrão)."""
+        return _EPOCA + int(self.tabela.index.get_level_values("dia").max())
+
+    def snapshots(self, datas=None, por=POR):
+        """
+        Aging em cada data de `datas` (padrão: o último vencimento):
+        uma linha por (data_referencia, *por, faixa) com faturas, valor
+        e dias_atraso_medio. `por` é qualquer subconjunto de CHAVE sem
+        "dia" (lista vazia: carteira inteira).
+        """
+        por = list(por)
+        if "dia" in por or any(p not in CHAVE for p in por):
+            raise ValueError(f"`por` deve usar só {CHAVE[:-1]}")
+        t = self.tabela.reset_index()
+        ref = np.atleast_1d(dias(self.data_maxima() if datas is None else datas))
+
+        # matriz densa grupo × dia, com soma acumulada e um zero à esquerda:
+        # acum[:, k] soma os k primeiros dias distintos
+        if por:
+            grupos, chaves = pd.MultiIndex.from_frame(t[por]).factorize()
+        else:
+            grupos, chaves = np.zeros(len(t), dtype=np.intp), pd.Index(["total"])
+        dias_unicos, d = np.unique(t["dia"].to_numpy(), return_inverse=True)
+        G, D = len(chaves), len(dias_unicos)
+        pos = grupos * D + d
+        acum = {}
+        for nome, pesos in (("qtd", t["qtd"]), ("valor", t["valor"]),
+                            ("dias", t["qtd"] * t["dia"])):
+            m = np.bincount(pos, weights=pesos.to_numpy(np.float64), minlength=G * D)
+            acum[nome] = np.concatenate([np.zeros((G, 1)), m.reshape(G, D).cumsum(axis=1)],
+                                        axis=1)
+
+        # limites de vencimento de cada (data, faixa): [R − maior, R − menor]
+        ini = np.array([np.iinfo(np.int64).min // 2 if hi is None else -hi
+                        for _, _, hi in FAIXAS])
+        fim = np.array([np.iinfo(np.int64).max // 2 if lo is None else -lo
+                        for _, lo, _ in FAIXAS])
+        k_ini = np.searchsorted(dias_unicos, ref[:, None] + ini, side="left")
+        k_fim = np.searchsorted(dias_unicos, ref[:, None] + fim, side="right")
+        # G × datas × faixas
+        soma = {nome: a[:, k_fim] - a[:, k_ini] for nome, a in acum.items()}
+
+        qtd = soma["qtd"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Σ(R − dia) = R·n − Σdia
+            medio = (ref[None, :, None] * qtd - soma["dias"]) / qtd
+        n_datas, n_faixas = len(ref), len(FAIXAS)
+        g, r, f = np.meshgrid(np.arange(G), np.arange(n_datas), np.arange(n_faixas),
+                              indexing="ij")
+        g, r, f = g.ravel(), r.ravel(), f.ravel()
+        saida = pd.DataFrame({"data_referencia": (_EPOCA + ref[r]).astype("datetime64[s]")})
+        for i, nome in enumerate(por):
+            saida[nome] = chaves.get_level_values(i)[g]
+        saida["faixa"] = pd.Categorical.from_codes(f, [rotulo for rotulo, _, _ in FAIXAS],
+                                                   ordered=True)
+        saida["faturas"] = qtd.ravel().round().astype(np.int64)
+        saida["valor"] = soma["valor"].ravel()
+        saida["dias_atraso_medio"] = medio.ravel()
+        return (saida.sort_values(["data_referencia", *por, "faixa"], kind="stable")
+                     .reset_index(drop=True))
+
+    def resumo(self, data=None, por=POR):
+        """Faturas (ou `valor`) de uma data em formato largo: grupos × faixas."""
+        s = self.snapshots(data, por)
+        return s.pivot_table(index=por or None, columns="faixa", values="faturas",
+                             aggfunc="sum", observed=False)
@@ -0,0 +1,760 @@
+"""
+=============================================================
+  MOTOR DE AGREGAÇÃO INCREMENTAL (PASSADA ÚNICA)
+  Consome a base em blocos uma única vez e mantém o estado
+  mesclável de todos os KPIs das seções 1–7.
+=============================================================
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from carga import TIPOS_CLIENTE
+from esbocos import ALFA, HyperLogLog, codificar, decodificar
+from indice_clientes import IndiceClientes
+from memo import Memo, derivada
+from momentos import CoMomentos
+from topk import TopK
+
+# dimensões do cubo base: tudo que as seções 1–5 precisam sai dele
+DIMENSOES = ["competencia", "tipo_cliente", "status_fatura", "dia_vencimento"]
+CHAVE_CLIENTE = ["id_cliente", "tipo_cliente"]
+N_TIPOS = len(TIPOS_CLIENTE)
+
+# blocos parciais acumulados antes de compactar o cubo e os histogramas
+MAX_PENDENTES = 8
+
+
+def _somar(partes, niveis):
+    """Soma frames/séries parciais que compartilham o mesmo índice."""
+    if len(partes) == 1:
+        return partes[0]
+    return pd.concat(partes).groupby(level=niveis, observed=True).sum()
+
+
+def _descontar(atual, removido, niveis, coluna=None):
+    """`atual - removido`, descartando as chaves que zeraram a contagem."""
+    r = pd.concat([atual, -removido]).groupby(level=niveis, observed=True).sum()
+    qtd = r[coluna] if coluna else r
+    return r[qtd != 0]
+
+
+def _combinar_momentos(atual, outro, operacao):
+    """Mescla/subtração dos co-momentos; se um lado não os tem, nenhum tem."""
+    if atual is None or outro is None:
+        return None
+    return getattr(atual, operacao)(outro)
+
+
+def _medianas_hist(contagens, nivel):
+    """
+    Medianas exatas por grupo a partir de um histograma com índice
+    (grupo, valor) → contagem. Para n par, média dos dois valores
+    centrais (como `Series.median`). Vetorizado: uma busca binária sobre
+    a contagem acumulada global, sem laço por grupo.
+    """
+    contagens = contagens[contagens > 0].sort_index()
+    grupos    = contagens.index.get_level_values(nivel)
+    valores   = contagens.index.get_level_values(-1).to_numpy(dtype="float64")
+    acum      = contagens.to_numpy().cumsum()
+
+    n      = contagens.groupby(grupos, observed=True, sort=False).sum()
+    offset = np.concatenate(([0], n.to_numpy().cumsum()[:-1]))
+    n      = n.to_numpy()
+    baixo  = valores[np.searchsorted(acum, offset + (n + 1) // 2)]
+    alto   = valores[np.searchsorted(acum, offset + n // 2 + 1)]
+    idx    = pd.unique(grupos)
+    return pd.Series((baixo + alto) / 2, index=pd.Index(idx, name=grupos.name))
+
+
+def _quantil_hist(valores, acum, n, p):
+    """Percentil `p` (interpolação linear, como np.percentile) de um histograma."""
+    h  = (n - 1) * p
+    lo = int(np.floor(h))
+    v_lo = valores[np.searchsorted(acum, lo + 1)]
+    v_hi = valores[np.searchsorted(acum, min(lo + 2, n))]
+    return float(v_lo + (h - lo) * (v_hi - v_lo))
+
+
+def estatisticas_boxplot(contagens, rotulo, whis=1.5):
+    """
+    Estatísticas de boxplot (formato de `Axes.bxp`) a partir de um
+    histograma valor → contagem — as mesmas que `Axes.boxplot` calcularia
+    sobre as linhas brutas, com os outliers deduplicados por valor.
+    """
+    contagens = contagens[contagens > 0].sort_index()
+    valores   = contagens.index.to_numpy(dtype="float64")
+    acum      = contagens.to_numpy().cumsum()
+    n         = int(acum[-1])
+    q1, med, q3 = (_quantil_hist(valores, acum, n, p) for p in (0.25, 0.5, 0.75))
+    iqr = q3 - q1
+    dentro = (valores >= q1 - whis * iqr) & (valores <= q3 + whis * iqr)
+    return {
+        "label":  rotulo,
+        "med":    med, "q1": q1, "q3": q3,
+        "whislo": valores[dentro].min(),
+        "whishi": valores[dentro].max(),
+        "mean":   float((valores * contagens.to_numpy()).sum() / n),
+        "fliers": valores[~dentro],
+    }
+
+
+def grade_densidade(x, y, bins=120):
+    """Contagens 2D (histogram2d) — tamanho fixo, independe do nº de pontos."""
+    contagens, x_bordas, y_bordas = np.histogram2d(
+        np.asarray(x, dtype="float64"), np.asarray(y, dtype="float64"), bins=bins)
+    return {"contagens": contagens.T, "x_bordas": x_bordas, "y_bordas": y_bordas}
+
+
+# resultado por cliente das seções 6 e 7, igual nos modos serial e paralelo
+ResumoClientes = namedtuple("ResumoClientes", ["vip", "perfil", "n_clientes"])
+
+
+def formatar_vip(vip):
+    vip = vip.reset_index(drop=True)
+    vip["inadimplente"] = vip["atrasadas"] > 0
+    return vip[["id_cliente", "tipo_cliente", "total_faturado",
+                "num_faturas", "consumo_total", "atrasadas", "inadimplente"]]
+
+
+def completar_perfil(perfil):
+    perfil = perfil.sort_values(["total_fat", "atrasadas"]).reset_index(drop=True)
+    perfil["tx_atraso"] = (perfil["atrasadas"] / perfil["total_fat"] * 100).round(1)
+    return perfil[["total_fat", "atrasadas", "tx_atraso", "clientes"]]
+
+
+class ClientesCodificados:
+    """
+    Agregados por (cliente, tipo) em arrays densos indexados por
+    `codigo * N_TIPOS + tipo`, com os códigos de indice_clientes.py:
+
+      num_faturas (int32), total_faturado (float64),
+      consumo_total (int64), atrasadas (int32),
+      soma_dia (int64) — soma dos dias de vencimento (dia médio),
+      em_aberto (int32)
+
+    Somar um bloco é um bincount sobre as chaves do bloco; mesclar
+    estados é remapear os códigos do outro índice e somar arrays. Os
+    ids em texto só são decodificados para o top-k e a saída final.
+    """
+
+    CAMPOS = {"num_faturas": np.int32, "total_faturado": np.float64,
+              "consumo_total": np.int64, "atrasadas": np.int32,
+              "soma_dia": np.int64, "em_aberto": np.int32}
+
+    def __init__(self, indice=None):
+        self.indice = indice if indice is not None else IndiceClientes()
+        n = N_TIPOS * len(self.indice)
+        for campo, tipo in self.CAMPOS.items():
+            setattr(self, campo, np.zeros(n, dtype=tipo))
+
+    def _crescer(self):
+        n = N_TIPOS * len(self.indice)
+        for campo in self.CAMPOS:
+            atual = getattr(self, campo)
+            if len(atual) < n:
+                novo = np.zeros(max(n, int(len(atual) * 1.5)), dtype=atual.dtype)
+                novo[:len(atual)] = atual
+                setattr(self, campo, novo)
+
+    def _tamanho(self):
+        return N_TIPOS * len(self.indice)
+
+    def _arrays(self):
+        """Campos recortados ao tamanho do índice (sem a folga de crescimento)."""
+        n = self._tamanho()
+        return {campo: getattr(self, campo)[:n] for campo in self.CAMPOS}
+
+    # ── atualização ───────────────────────────────────────
+    def atualizar(self, bloco):
+        codigos = self.indice.codificar(bloco["id_cliente"])
+        tipos   = bloco["tipo_cliente"]
+        if not isinstance(tipos.dtype, pd.CategoricalDtype) \
+           or list(tipos.cat.categories) != TIPOS_CLIENTE:
+            tipos = tipos.astype(pd.CategoricalDtype(TIPOS_CLIENTE))
+        chave = codigos.astype(np.int64) * N_TIPOS + tipos.cat.codes.to_numpy()
+        self._crescer()
+
+        # bincount sobre as chaves distintas do bloco, depois soma direta
+        # nas posições (únicas) do estado
+        locais, unicas = pd.factorize(chave)
+        atrasada = (bloco["status_fatura"] == "atrasada").to_numpy()
+        em_aberto = (bloco["status_fatura"] == "em aberto").to_numpy()
+        m = len(unicas)
+        self.num_faturas[unicas]    += np.bincount(locais, minlength=m).astype(np.int32)
+        self.total_faturado[unicas] += np.bincount(
+            locais, weights=bloco["valor_fatura"].to_numpy(), minlength=m)
+        self.consumo_total[unicas]  += np.bincount(
+            locais, weights=bloco["consumo_energia_kwh"].to_numpy(), minlength=m
+        ).round().astype(np.int64)
+        self.atrasadas[unicas]      += np.bincount(
+            locais, weights=atrasada, minlength=m).astype(np.int32)
+        self.soma_dia[unicas]       += np.bincount(
+            locais, weights=bloco["dia_vencimento"].to_numpy(), minlength=m
+        ).round().astype(np.int64)
+        self.em_aberto[unicas]      += np.bincount(
+            locais, weights=em_aberto, minlength=m).astype(np.int32)
+        return self
+
+    def _chaves_de(self, outro, inserir):
+        ids = outro.indice.valores()
+        mapa = self.indice.codificar(ids) if inserir else self.indice.localizar(ids)
+        return mapa, (mapa.astype(np.int64)[:, None] * N_TIPOS
+                      + np.arange(N_TIPOS)).ravel()
+
+    def mesclar(self, outro):
+        _, chaves = self._chaves_de(outro, inserir=True)
+        self._crescer()
+        for campo, valores in outro._arrays().items():
+            getattr(self, campo)[chaves] += valores
+        return self
+
+    def subtrair(self, outro):
+        mapa, chaves = self._chaves_de(outro, inserir=False)
+        ausentes = (mapa < 0) & (outro._arrays()["num_faturas"]
+                                 .reshape(-1, N_TIPOS).sum(axis=1) > 0)
+        if ausentes.any():
+            raise ValueError("Clientes a subtrair ausentes do estado acumulado.")
+        validos = np.repeat(mapa >= 0, N_TIPOS)
+        for campo, valores in outro._arrays().items():
+            getattr(self, campo)[chaves[validos]] -= valores[validos]
+        return self
+
+    # ── persistência ──────────────────────────────────────
+    def estado(self):
+        return {"ids": self.indice.valores(), **self._arrays()}
+
+    @classmethod
+    def de_estado(cls, estado):
+        cli = cls(IndiceClientes(estado["ids"]))
+        for campo, tipo in cls.CAMPOS.items():
+            if campo in estado:       # estados anteriores não têm soma_dia/em_aberto
+                setattr(cli, campo, np.asarray(estado[campo], dtype=tipo).copy())
+        return cli
+
+    @classmethod
+    def de_tabela(cls, tabela):
+        """A partir do frame (id_cliente, tipo) → campos do formato anterior."""
+        t = tabela.reset_index()
+        cli = cls()
+        codigos = cli.indice.codificar(t["id_cliente"])
+        tipos = t["tipo_cliente"].astype(pd.CategoricalDtype(TIPOS_CLIENTE))
+        chave = codigos.astype(np.int64) * N_TIPOS + tipos.cat.codes.to_numpy()
+        cli._crescer()
+        for campo, tipo in cls.CAMPOS.items():
+            if campo in t:
+                getattr(cli, campo)[chave] = t[campo].to_numpy().astype(tipo)
+        return cli
+
+    # ── consultas ─────────────────────────────────────────
+    def _por_id(self):
+        """(num_faturas, atrasadas) somados entre tipos, por código de cliente."""
+        a = self._arrays()
+        return (a["num_faturas"].reshape(-1, N_TIPOS).sum(axis=1),
+                a["atrasadas"].reshape(-1, N_TIPOS).sum(axis=1))
+
+    def __len__(self):
+        """Nº de pares (cliente, tipo) com alguma fatura."""
+        return int(np.count_nonzero(self._arrays()["num_faturas"]))
+
+    def n_clientes(self):
+        return int(np.count_nonzero(self._por_id()[0]))
+
+    def tabela(self, chaves=None, decodificar=True):
+        """
+        Frame plano por (cliente, tipo) ativo, ou só das `chaves` dadas.
+        Sem `decodificar`, a coluna id_cliente traz o código int32.
+        """
+        a = self._arrays()
+        if chaves is None:
+            chaves = np.flatnonzero(a["num_faturas"])
+        codigo, tipo = np.divmod(chaves, N_TIPOS)
+        return pd.DataFrame({
+            "id_cliente":   (self.indice.decodificar(codigo) if decodificar
+                             else codigo.astype(np.int32)),
+            "tipo_cliente": pd.Categorical.from_codes(tipo, TIPOS_CLIENTE),
+            **{campo: valores[chaves] for campo, valores in a.items()},
+        })
+
+    def top_k(self, k=10):
+        """
+        TopK (topk.py) com os `k` maiores total_faturado. A pré-seleção é
+        vetorizada (np.partition) e só os candidatos — k mais empates no
+        limiar — são decodificados.
+        """
+        a = self._arrays()
+        ativos = np.flatnonzero(a["num_faturas"])
+        total  = a["total_faturado"][ativos]
+        if len(ativos) > k:
+            limiar = np.partition(total, len(total) - k)[len(total) - k]
+            ativos = ativos[total >= limiar]
+        return TopK(k).atualizar(self.tabela(ativos))
+
+    def perfil(self):
+        """Seção 7 como operação de arrays: nº de clientes por (total_fat, atrasadas)."""
+        num, atr = self._por_id()
+        ativos = num > 0
+        num, atr = num[ativos].astype(np.int64), atr[ativos].astype(np.int64)
+        # par (total_fat, atrasadas) como um único inteiro: bincount direto
+        base  = int(atr.max()) + 1 if len(atr) else 1
+        cont  = np.bincount(num * base + atr)
+        pares = np.flatnonzero(cont)
+        total_fat, atrasadas = np.divmod(pares, base)
+        return completar_perfil(pd.DataFrame({
+            "total_fat": total_fat,
+            "atrasadas": atrasadas,
+            "clientes":  cont[pares],
+        }))
+
+    def frequencia(self):
+        """Por cliente, na ordem dos códigos (primeira aparição)."""
+        num, atr = self._por_id()
+        ativos = np.flatnonzero(num)
+        freq = pd.DataFrame({
+            "id_cliente": self.indice.decodificar(ativos),
+            "total_fat":  num[ativos],
+            "atrasadas":  atr[ativos],
+            "tx_atraso":  (atr[ativos] / num[ativos] * 100).round(1),
+        })
+        return freq
+
+
+class AcumuladorFaturamento:
+    """
+    Estado incremental e mesclável das seções 1–7.
+
+    Cada chamada a `atualizar(bloco)` faz uma passada vetorizada sobre o
+    bloco e soma o resultado ao estado; `mesclar(outro)` combina estados
+    de blocos/processos diferentes. As tabelas das seções são derivadas
+    só do estado, nunca da base bruta:
+
+      cubo        : (competencia, tipo, status, dia) → qtd, valor, consumo
+      clientes    : (id_cliente, tipo) → faturas, valor, consumo, atrasadas
+                    em arrays por código int32 (ClientesCodificados)
+      hist_consumo: (tipo, status, kWh) → qtd    — medianas e máximos exatos
+      hist_valor  : (tipo, centavos)    → qtd    — mediana exata do ticket
+      momentos    : competência → n, médias e co-momentos das variáveis
+                    da fig7 (momentos.py) — correlação sem a base
+
+    Com `aproximado=True` (esbocos.py), os histogramas guardam o bucket
+    logarítmico do valor em vez do valor — medianas, quartis e máximos
+    ficam a ±ALFA (relativo) e o tamanho deixa de crescer com a base — e
+    um HyperLogLog estima os clientes únicos quando não há estado por
+    cliente (com ele, a contagem é exata). Médias e totais continuam
+    exatos (vêm do cubo).
+
+    As tabelas das seções são derivadas memoizadas (memo.py): calculadas
+    uma vez por versão do estado e compartilhadas entre seções, KPIs e
+    figuras — não devem ser alteradas por quem as recebe.
+    """
+
+    def __init__(self, por_cliente=True, aproximado=False):
+        # por_cliente=False deixa as seções 6/7 para o modo particionado
+        # (ver paralelo.py) e poupa o estado por cliente, o maior de todos
+        self.por_cliente = por_cliente
+        self.aproximado  = aproximado
+        self.linhas   = 0
+        self.colunas  = None
+        self.nulos    = None
+        self._cubo         = []
+        self._clientes     = ClientesCodificados() if por_cliente else None
+        self._hist_consumo = []
+        self._hist_valor   = []
+        # o HLL só conta clientes quando não há estado por cliente exato
+        self._hll          = HyperLogLog() if aproximado and not por_cliente else None
+        self._momentos     = CoMomentos()
+        self._memo         = Memo()
+
+    def usar_memo(self, diretorio=None, chave=None):
+        """Troca o cache das derivadas; com `diretorio` e `chave`, também em disco."""
+        self._memo = Memo(diretorio, chave)
+        return self
+
+    @property
+    def memo(self):
+        return self._memo
+
+    # ── atualização ───────────────────────────────────────
+    def atualizar(self, bloco):
+        if bloco.empty:
+            return self
+        self.linhas += len(bloco)
+        nulos = bloco.isnull().sum()
+        if self.colunas is None:
+            self.colunas = bloco.columns.tolist()
+            self.nulos   = nulos
+        else:
+            self.nulos = self.nulos.add(nulos, fill_value=0).astype("int64")
+
+        b = bloco.assign(
+            is_atrasada=(bloco["status_fatura"] == "atrasada").astype("int64"),
+            centavos=(bloco["valor_fatura"] * 100).round().astype("int64"),
+        )
+        self._cubo.append(
+            b.groupby(DIMENSOES, observed=True)
+             .agg(qtd=("valor_fatura", "size"),
+                  valor=("valor_fatura", "sum"),
+                  consumo=("consumo_energia_kwh", "sum"))
+        )
+        if self.por_cliente:
+            self._clientes.atualizar(b)
+        if self._momentos is not None:
+            self._momentos.atualizar(bloco)
+        if self._hll is not None:
+            self._hll.atualizar(b["id_cliente"])
+        if self.aproximado:
+            b = b.assign(consumo_energia_kwh=codificar(b["consumo_energia_kwh"]),
+                         centavos=codificar(b["centavos"]))
+        self._hist_consumo.append(
+            b.groupby(["tipo_cliente", "status_fatura", "consumo_energia_kwh"],
+                      observed=True).size()
+        )
+        self._hist_valor.append(
+            b.groupby(["tipo_cliente", "centavos"], observed=True).size()
+        )
+        if len(self._cubo) >= MAX_PENDENTES:
+            self.compactar()
+        self._memo.invalidar(*self._alteradas(self.por_cliente, self._momentos is not None))
+        return self
+
+    def _alteradas(self, clientes, momentos):
+        """Tabelas do estado (memo.TABELAS) tocadas por uma atualização/mescla."""
+        alteradas = ["cubo", "hist_consumo", "hist_valor"]
+        if clientes or self._hll is not None:    # o HLL responde por clientes_unicos
+            alteradas.append("clientes")
+        if momentos:
+            alteradas.append("momentos")
+        return alteradas
+
+    def mesclar(self, outro):
+        """Incorpora o estado de outro acumulador (outro bloco/processo)."""
+        if outro.linhas == 0:
+            return self
+        if outro.aproximado != self.aproximado:
+            raise ValueError("Estados exato e aproximado não se mesclam.")
+        self.linhas += outro.linhas
+        if self.colunas is None:
+            self.colunas = outro.colunas
+            self.nulos   = outro.nulos
+        else:
+            self.nulos = self.nulos.add(outro.nulos, fill_value=0).astype("int64")
+        self._cubo         += outro._cubo
+        if self.por_cliente and outro.por_cliente:
+            self._clientes.mesclar(outro._clientes)
+        self._hist_consumo += outro._hist_consumo
+        self._hist_valor   += outro._hist_valor
+        if self._hll is not None:
+            if outro._hll is None:
+                raise ValueError("Estado sem HyperLogLog (com estado por cliente) não se "
+                                 "mescla a um sem estado por cliente.")
+            self._hll.mesclar(outro._hll)
+        momentos = self._momentos is not None or outro._momentos is not None
+        self._momentos = _combinar_momentos(self._momentos, outro._momentos, "mesclar")
+        self._memo.invalidar(*self._alteradas(self.por_cliente and outro.por_cliente,
+                                              momentos))
+        return self.compactar()
+
+    def subtrair(self, outro):
+        """
+        Remove do estado a contribuição de `outro` — por exemplo, uma
+        competência reapresentada. Todo o estado é feito de contagens e
+        somas, então a subtração é exata (a menos de arredondamento em
+        ponto flutuante nas somas de valor).
+        """
+        if outro.linhas == 0:
+            return self
+        if outro.linhas > self.linhas:
+            raise ValueError("Estado a subtrair é maior que o acumulado.")
+        if self.aproximado or outro.aproximado:
+            raise ValueError("O HyperLogLog do modo aproximado não admite subtração.")
+        self.compactar()
+        outro.compactar()
+        self.linhas -= outro.linhas
+        self.nulos = self.nulos.sub(outro.nulos, fill_value=0).astype("int64")
+        self._memo.invalidar(*self._alteradas(self.por_cliente,
+                                              self._momentos is not None
+                                              or outro._momentos is not None))
+        if self.linhas == 0:
+            self._cubo, self._hist_consumo, self._hist_valor = [], [], []
+            self._clientes = ClientesCodificados() if self.por_cliente else None
+            self._momentos = CoMomentos()
+            return self
+        self._momentos = _combinar_momentos(self._momentos, outro._momentos, "subtrair")
+        self._cubo = [_descontar(self._cubo[0], outro._cubo[0], DIMENSOES, "qtd")]
+        if self.por_cliente and outro.por_cliente:
+            self._clientes.subtrair(outro._clientes)
+        self._hist_consumo = [_descontar(self._hist_consumo[0],
+                                         outro._hist_consumo[0], [0, 1, 2])]
+        self._hist_valor   = [_descontar(self._hist_valor[0],
+                                         outro._hist_valor[0], [0, 1])]
+        return self
+
+    # ── persistência ──────────────────────────────────────
+    def estado(self):
+        """Estado compactado como dicionário serializável (pickle)."""
+        self.compactar()
+        return {
+            "por_cliente":  self.por_cliente,
+            "aproximado":   self.aproximado,
+            "linhas":       self.linhas,
+            "colunas":      self.colunas,
+            "nulos":        self.nulos,
+            "cubo":         self._cubo,
+            "clientes":     self._clientes.estado() if self.por_cliente else None,
+            "hist_consumo": self._hist_consumo,
+            "hist_valor":   self._hist_valor,
+            "hll":          self._hll.estado() if self._hll is not None else None,
+            "momentos":     self._momentos.estado() if self._momentos is not None else None,
+        }
+
+    @classmethod
+    def de_estado(cls, estado):
+        acc = cls(por_cliente=estado["por_cliente"],
+                  aproximado=estado.get("aproximado", False))
+        acc.linhas   = estado["linhas"]
+        acc.colunas  = estado["colunas"]
+        acc.nulos    = estado["nulos"]
+        acc._cubo         = list(estado["cubo"])
+        clientes = estado["clientes"]
+        if isinstance(clientes, list):
+            # formato anterior: frames (id_cliente, tipo) → campos
+            clientes = (ClientesCodificados.de_tabela(_somar(clientes, CHAVE_CLIENTE))
+                        if clientes else ClientesCodificados())
+            acc._clientes = clientes if acc.por_cliente else None
+        elif clientes is not None:
+            acc._clientes = ClientesCodificados.de_estado(clientes)
+        acc._hist_consumo = list(estado["hist_consumo"])
+        acc._hist_valor   = list(estado["hist_valor"])
+        acc._hll = (HyperLogLog.de_estado(estado["hll"]) if estado.get("hll") is not None
+                    else None)
+        # estados gravados antes dos co-momentos: correlação indisponível
+        momentos = estado.get("momentos")
+        acc._momentos = CoMomentos.de_estado(momentos) if momentos is not None else None
+        return acc
+
+    def compactar(self):
+        """Reduz as listas de parciais a um único frame por tabela."""
+        if self._cubo:
+            self._cubo         = [_somar(self._cubo, DIMENSOES)]
+            self._hist_consumo = [_somar(self._hist_consumo, [0, 1, 2])]
+            self._hist_valor   = [_somar(self._hist_valor, [0, 1])]
+        return self
+
+    # ── estado compactado ─────────────────────────────────
+    def _tabela(self, nome):
+        if self.linhas == 0:
+            raise ValueError("Acumulador vazio: nenhum bloco consumido.")
+        self.compactar()
+        return getattr(self, nome)[0]
+
+    @property
+    def cubo(self):
+        return self._tabela("_cubo")
+
+    @property
+    def clientes_codificados(self):
+        if not self.por_cliente:
+            raise ValueError("Acumulador criado com por_cliente=False.")
+        return self._clientes
+
+    @property
+    def clientes(self):
+        """(id_cliente, tipo) → campos, decodificado (para saída/inspeção)."""
+        return self.tabela_clientes(decodificar=True).set_index(CHAVE_CLIENTE)
+
+    @derivada("clientes")
+    def tabela_clientes(self, decodificar=False):
+        """Uma linha por (cliente, tipo); sem decodificar, ids como códigos."""
+        return self.clientes_codificados.tabela(decodificar=decodificar)
+
+    @derivada("cubo")
+    def _rollup(self, niveis):
+        return self.cubo.groupby(level=niveis, observed=True).sum()
+
+    def _rollup_atrasadas(self, nivel):
+        """Roll-up de `nivel` só das atrasadas; zeros onde não há nenhuma."""
+        base = self._rollup(nivel)
+        t = self._rollup([nivel, "status_fatura"])
+        atrasada = t.index.get_level_values("status_fatura") == "atrasada"
+        return (t[atrasada].droplevel("status_fatura")
+                 .reindex(base.index, fill_value=0))
+
+    # ── seção 0 / 1 ───────────────────────────────────────
+    @derivada("cubo")
+    def competencias(self):
+        return sorted(self.cubo.index.get_level_values("competencia").unique())
+
+    def status_possiveis(self):
+        return self.cubo.index.get_level_values("status_fatura").unique().tolist()
+
+    @derivada("clientes", disco=True)
+    def clientes_unicos(self):
+        """Exato com o estado por cliente; sem ele, a estimativa do HyperLogLog."""
+        if self._hll is not None:
+            return self._hll.estimativa()
+        return self.clientes_codificados.n_clientes()
+
+    def erro_aproximado(self):
+        """
+        Erros relativos do modo aproximado: clientes (1σ; None quando a
+        contagem é exata) e quantis (máx.).
+        """
+        if not self.aproximado:
+            return None
+        return {"clientes": self._hll.erro_padrao() if self._hll is not None else None,
+                "quantis": ALFA}
+
+    def status_counts(self):
+        return self._rollup("status_fatura")["qtd"]
+
+    def valor_total(self):
+        return self.cubo["valor"].sum()
+
+    def valor_por_status(self):
+        return self._rollup("status_fatura")["valor"]
+
+    # ── seções 1 e 5: por competência ─────────────────────
+    @derivada("cubo")
+    def tendencia(self):
+        """total, atrasadas, tx_atraso e valor_atrasado por competência."""
+        base = self._rollup("competencia")
+        atr  = self._rollup_atrasadas("competencia")
+        tend = pd.DataFrame({
+            "total":          base["qtd"],
+            "atrasadas":      atr["qtd"],
+            "tx_atraso":      (atr["qtd"] / base["qtd"] * 100).round(1),
+            "valor_atrasado": atr["valor"],
+        })
+        return tend.sort_index().reset_index()
+
+    # ── seção 2: consumo ──────────────────────────────────
+    def _valores(self, hist):
+        """No modo aproximado, troca os códigos de bucket pelos valores."""
+        if not self.aproximado:
+            return hist
+        nivel = hist.index.nlevels - 1
+        return hist.set_axis(hist.index.set_levels(
+            decodificar(hist.index.levels[nivel]), level=nivel))
+
+    @derivada("hist_consumo")
+    def _hist(self, niveis):
+        h = self._tabela("_hist_consumo")
+        h = h.groupby(level=niveis + ["consumo_energia_kwh"], observed=True).sum()
+        return self._valores(h)
+
+    @derivada("hist_consumo")
+    def histograma_consumo(self, tipo_cliente=None):
+        """kWh → nº de faturas (todas ou de um tipo), de tamanho fixo (exato fora do modo aproximado)."""
+        h = self._hist(["tipo_cliente"])
+        if tipo_cliente is not None:
+            h = h.xs(tipo_cliente, level="tipo_cliente")
+        return h.groupby(level="consumo_energia_kwh").sum()
+
+    def _medianas_consumo(self, nivel):
+        return _medianas_hist(self._hist([nivel]), nivel)
+
+    @derivada("cubo", "hist_consumo")
+    def consumo_por_tipo(self):
+        base = self._rollup("tipo_cliente")
+        h    = self._hist(["tipo_cliente"])
+        maximo = (h.reset_index()
+                   .groupby("tipo_cliente", observed=True)["consumo_energia_kwh"].max())
+        return pd.DataFrame({
+            "media":   base["consumo"] / base["qtd"],
+            "mediana": self._medianas_consumo("tipo_cliente"),
+            "maximo":  maximo,
+            "total":   base["consumo"],
+        }).round(1)
+
+    @derivada("cubo", "hist_consumo")
+    def consumo_por_status(self):
+        base = self._rollup("status_fatura")
+        return pd.DataFrame({
+            "media":   base["consumo"] / base["qtd"],
+            "mediana": self._medianas_consumo("status_fatura"),
+        }).round(1)
+
+    @derivada("cubo")
+    def consumo_por_competencia(self):
+        base = self._rollup("competencia")
+        return pd.DataFrame({
+            "media": base["consumo"] / base["qtd"],
+            "total": base["consumo"],
+        }).round(1)
+
+    # ── seção 3: faturamento por tipo ─────────────────────
+    @derivada("cubo", "hist_valor")
+    def faturamento_por_tipo(self):
+        base = self._rollup("tipo_cliente")
+        hv   = self._valores(self._tabela("_hist_valor"))
+        mediana = _medianas_hist(hv, "tipo_cliente") / 100
+        fat = pd.DataFrame({
+            "qtd":     base["qtd"],
+            "total":   base["valor"],
+            "media":   base["valor"] / base["qtd"],
+            "mediana": mediana,
+        }).round(2)
+        fat["pct_receita"] = (fat["total"] / fat["total"].sum() * 100).round(1)
+        return fat
+
+    @derivada("cubo")
+    def atraso_por_tipo(self):
+        """qtd, atrasadas e tx_atraso (%) por tipo de cliente."""
+        base = self._rollup("tipo_cliente")
+        atr  = self._rollup_atrasadas("tipo_cliente")["qtd"]
+        return pd.DataFrame({
+            "qtd":       base["qtd"],
+            "atrasadas": atr,
+            "tx_atraso": atr / base["qtd"] * 100,
+        })
+
+    # ── seção 4: vencimentos ──────────────────────────────
+    @derivada("cubo")
+    def volume_por_dia(self):
+        return self._rollup("dia_vencimento")["qtd"].sort_index()
+
+    @derivada("cubo")
+    def resumo_dia(self, qtd_minima=5):
+        base = self._rollup("dia_vencimento")
+        atr  = self._rollup_atrasadas("dia_vencimento")["qtd"]
+        resumo = pd.DataFrame({
+            "qtd":       base["qtd"],
+            "atrasadas": atr,
+            "tx_atraso": atr / base["qtd"] * 100,
+        })
+        return (resumo[resumo["qtd"] >= qtd_minima]
+                .sort_values("tx_atraso", ascending=False, kind="stable")
+                .round(1))
+
+    # ── seções 6 e 7: por cliente ─────────────────────────
+    @derivada("clientes", disco=True)
+    def vip(self, k=10):
+        return formatar_vip(self.clientes_codificados.top_k(k).resultado())
+
+    @derivada("clientes", disco=True)
+    def perfil_atraso(self):
+        return self.clientes_codificados.perfil()
+
+    def resumo_clientes(self, k=10):
+        return ResumoClientes(self.vip(k), self.perfil_atraso(),
+                              self.clientes_unicos())
+
+    @derivada("clientes", disco=True)
+    def frequencia_atraso(self):
+        return self.clientes_codificados.frequencia()
+
+    # ── fig7: correlação ──────────────────────────────────
+    @property
+    def tem_momentos(self):
+        return self._momentos is not None and bool(self._momentos.grupos)
+
+    @derivada("momentos")
+    def correlacao(self, por_competencia=False):
+        """Pearson das variáveis da fig7 (momentos.py); por competência, empilhadas."""
+        if self._momentos is None:
+            raise ValueError("Estado sem co-momentos (gravado por uma versão anterior).")
+        if por_competencia:
+            return self._momentos.correlacao_por_grupo()
+        return self._momentos.correlacao()
@@ -4,651 +4,829 @@
   Base: base_faturamento__1_.csv
   Tópicos: Inadimplência, Consumo, Faturamento, Vencimentos,
            Atrasos, Clientes VIP, Frequência de atraso
+
+  Como biblioteca:
+    from analise_faturamento import carregar, executar, secao1
+    analise = carregar("base.csv")
+    secao1(analise)
+
+  Como CLI:
+    python analise_faturamento.py base.csv --saida figs/ --secoes 1 4 7
+    python analise_faturamento.py base.csv --sem-figuras
+    python analise_faturamento.py entrada/ --processos-carga 8
+
+  matplotlib/seaborn (graficos.py) e pyarrow (cache.py) só são
+  importados quando figuras ou o cache são pedidos.
 =============================================================
 """
 
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.gridspec as gridspec
-import matplotlib.patches as mpatches
-import seaborn as sns
-from matplotlib.ticker import FuncFormatter
+import argparse
+import json
 import warnings
-warnings.filterwarnings("ignore")
-
-# ── Estilo global ──────────────────────────────────────────
-plt.rcParams.update({
-    "figure.facecolor":  "#0d0f14",
-    "axes.facecolor":    "#161a23",
-    "axes.edgecolor":    "#2a3045",
-    "axes.labelcolor":   "#a0aec0",
-    "axes.titlecolor":   "#e8ecf4",
-    "xtick.color":       "#6b7a99",
-    "ytick.color":       "#6b7a99",
-    "grid.color":        "#2a3045",
-    "text.color":        "#e8ecf4",
-    "font.family":       "monospace",
-    "axes.grid":         True,
-    "grid.alpha":        0.5,
-    "axes.spines.top":   False,
-    "axes.spines.right": False,
-})
-
-AMARELO  = "#f0c040"
-TEAL     = "#4fd1c5"
-VERMELHO = "#f87171"
-VERDE    = "#4ade80"
-ROXO     = "#a78bfa"
-BRANCO   = "#e8ecf4"
-MUTED    = "#6b7a99"
-BG       = "#0d0f14"
-SURFACE  = "#161a23"
+from collections import namedtuple
+from pathlib import Path
+
+import pandas as pd
+
+from carga import TAMANHO_BLOCO, ler_em_blocos
+from agregacao import AcumuladorFaturamento, ResumoClientes
+from ingestao import multiplos_arquivos
+from instrumentacao import ativar, atual, etapa
+from kpis import PainelKpis
+from validacao import LIMITE_REJEICAO, ValidadorFaturas
+
+# ── Configuração padrão ────────────────────────────────────
+CAMINHO_BASE  = Path(__file__).resolve().parent / "base_faturamento.csv"
+DIR_SAIDA     = "."
+PROCESSOS_FIG = 4     # figuras renderizadas em paralelo (graficos.py)
+QUARENTENA    = "quarentena_faturamento.csv"   # no diretório de saída (CLI)
+
+# colunas lidas do cache: data_vencimento/mes_vencimento ficam só no arquivo
+COLUNAS_ANALISE = [
+    "competencia", "id_cliente", "valor_fatura", "tipo_cliente",
+    "consumo_energia_kwh", "status_fatura", "dia_vencimento",
+]
+
+MOTORES = ["pandas", "duckdb"]
+
+# acc: estado agregado; resumo_cli: seções 6/7; df: base linha a linha,
+# mantida só a pedido (manter_base) ou pelo caminho particionado;
+# corr: matriz da fig7 já calculada (motor duckdb, sem base em memória);
+# painel: KPIs com status (kpis.py) — fonte única dos números citados;
+# qualidade: resumo da validação na carga (validacao.py)
+Analise = namedtuple("Analise", ["acc", "resumo_cli", "df", "corr", "painel", "qualidade"],
+                     defaults=[None, None, None])
+
+
+def _linha(caractere="─"):
+    print("\n" + caractere * 60)
+
 
 # ══════════════════════════════════════════════════════════
 # 0. CARREGAMENTO E LIMPEZA
 # ══════════════════════════════════════════════════════════
-print("=" * 60)
-print("  ANÁLISE DE FATURAMENTO")
-print("=" * 60)
-
-df = pd.read_csv(
-    "/mnt/user-data/uploads/base_faturamento__1_.csv",
-    sep=";",
-    decimal=","
-)
-
-df["valor_fatura"] = (
-    df["valor_fatura"].astype(str).str.replace(",", ".").astype(float)
-)
-df["data_vencimento"] = pd.to_datetime(df["data_vencimento"], dayfirst=True)
-df["dia_vencimento"]  = df["data_vencimento"].dt.day
-df["mes_vencimento"]  = df["data_vencimento"].dt.to_period("M").astype(str)
-
-print(f"\nRegistros carregados : {len(df)}")
-print(f"Colunas              : {df.columns.tolist()}")
-print(f"Competências         : {sorted(df['competencia'].unique())}")
-print(f"Clientes únicos      : {df['id_cliente'].nunique()}")
-print(f"Status possíveis     : {df['status_fatura'].unique()}")
-print(f"\nValores ausentes:\n{df.isnull().sum()}")
+def carregar(caminho=CAMINHO_BASE, dir_cache=None, dir_armazem=None, processos=1,
+             manter_base=False, tamanho_bloco=TAMANHO_BLOCO, relatorio=True,
+             motor="pandas", processos_carga=None, validar=True, quarentena=None,
+             limite_rejeicao=LIMITE_REJEICAO, dir_memo=None, aproximado=False,
+             por_cliente=True):
+    """
+    Lê a base em blocos tipados e acumula o estado das seções 1–7.
+
+    caminho     : um CSV, ou diretório/glob com vários (um por região e
+                  competência) lidos em paralelo (ingestao.py).
+    dir_cache   : cache Arrow memory-mapped da base limpa (cache.py).
+    dir_armazem : armazém incremental por competência (incremental.py);
+                  os KPIs passam a cobrir todo o histórico armazenado.
+    processos   : > 1 particiona as seções 6 e 7 por id_cliente (paralelo.py);
+                  com vários arquivos, o estado por cliente vem dos workers.
+    manter_base : guarda a base linha a linha em `Analise.df`.
+    motor       : "duckdb" agrega fora da memória (motor_duckdb.py); aceita
+                  também .parquet ou tabela da conexão, e ignora as opções
+                  de cache, armazém e processos.
+    processos_carga : processos da leitura multi-arquivo (padrão: núcleos).
+    validar     : confere tipos, categorias, datas, consumo e repetidas em
+                  cada bloco (validacao.py); linhas reprovadas vão para
+                  `quarentena` e a carga aborta acima de `limite_rejeicao`.
+    dir_memo    : guarda em disco as tabelas derivadas caras (memo.py),
+                  reaproveitadas enquanto o estado agregado não mudar.
+    aproximado  : medianas/quartis por buckets logarítmicos (esbocos.py),
+                  com erro limitado; os clientes únicos seguem exatos, do
+                  estado por cliente das seções 6 e 7. Incompatível com
+                  o armazém (o HyperLogLog não subtrai). O motor DuckDB
+                  ignora a opção.
+    por_cliente : False (só com `aproximado`) dispensa o estado por cliente
+                  — memória independente do nº de clientes: os clientes
+                  únicos vêm do HyperLogLog e as seções 6 e 7 (e o perfil
+                  do painel) ficam indisponíveis. O motor DuckDB ignora a
+                  opção.
+    """
+    if motor == "duckdb":
+        validador = ValidadorFaturas(quarentena, limite_rejeicao) if validar else None
+        chave = _chave_memo(caminho, None, validador, motor) if dir_memo else None
+        return _carregar_duckdb(caminho, manter_base, validador, dir_memo, chave, relatorio)
+    if motor != "pandas":
+        raise ValueError(f"Motor desconhecido: {motor!r} (use um de {MOTORES})")
+    if not por_cliente and not aproximado:
+        raise ValueError("Sem estado por cliente, os clientes únicos exigem o modo "
+                         "aproximado (HyperLogLog).")
+
+    armazem = None
+    if dir_armazem is not None:
+        if aproximado:
+            raise ValueError("O modo aproximado não vale com o armazém incremental: "
+                             "reapresentar um mês exige subtrair o estado.")
+        from incremental import ArmazemCompetencias
+        armazem = ArmazemCompetencias(dir_armazem)
+    # com vários arquivos, o estado por cliente já vem mesclável dos
+    # workers da ingestão: particionar exigiria devolver a base inteira
+    particionar = (processos > 1 and armazem is None and por_cliente
+                   and not multiplos_arquivos(caminho))
+    manter_base = manter_base or particionar
+
+    validador = ValidadorFaturas(quarentena, limite_rejeicao) if validar else None
+    acc    = AcumuladorFaturamento(por_cliente=por_cliente and not particionar,
+                                   aproximado=aproximado)
+    blocos = []
+    with etapa("carga") as span:
+        if multiplos_arquivos(caminho):
+            linhas = _ingerir_arquivos(caminho, acc, armazem, blocos, processos_carga,
+                                       manter_base, tamanho_bloco, dir_cache, validador,
+                                       relatorio)
+        else:
+            linhas = _ingerir_blocos(caminho, acc, armazem, blocos, manter_base,
+                                     tamanho_bloco, dir_cache, validador, relatorio)
+        if armazem is not None:
+            # o arquivo traz só os meses novos ou reapresentados; os KPIs das
+            # seções 1–7 vêm do estado global de todo o histórico armazenado.
+            # Os painéis de distribuição usam apenas as linhas desta carga.
+            with etapa("armazem"):
+                armazem.confirmar(substituir=True, fonte=caminho)
+                acc = armazem.acumulador()
+            if relatorio:
+                print(f"  Armazém incremental  : {armazem.competencias()}")
+        df = pd.concat(blocos, ignore_index=True) if blocos else None
+        del blocos
+        span.linhas = linhas
+    if dir_memo is not None:
+        acc.usar_memo(dir_memo, _chave_memo(caminho, armazem, validador, motor, aproximado,
+                                            por_cliente))
+
+    # seções 6 e 7: top-10 VIP + perfil (total_fat, atrasadas) por cliente
+    with etapa("clientes", linhas=linhas):
+        if particionar:
+            from paralelo import agregar_clientes_particionado
+            resumo_cli = agregar_clientes_particionado(df, processos=processos, k=10)
+        elif not por_cliente:
+            resumo_cli = ResumoClientes(None, None, acc.clientes_unicos())
+        else:
+            resumo_cli = acc.resumo_clientes(k=10)
+    # sem linhas validadas nesta carga (cache já gravado), não há o que relatar
+    qualidade = validador.resumo() if validador is not None and validador.linhas else None
+    return Analise(acc, resumo_cli, df, painel=PainelKpis(acc, resumo_cli),
+                   qualidade=qualidade)
+
+
+def _ingerir_blocos(caminho, acc, armazem, blocos, manter_base, tamanho_bloco,
+                    dir_cache, validador, relatorio):
+    # leitura em blocos tipados (ver carga.py): valor_fatura já sai como
+    # float do parser e data_vencimento usa formato fixo dd/mm/aaaa.
+    # Com dir_cache, execuções seguintes sobre a mesma fonte fazem
+    # memory-map do cache Arrow em vez de reprocessar o CSV (ver cache.py).
+    # Cada bloco passa uma única vez pelo acumulador (ver agregacao.py);
+    # as seções 1–7 leem só o estado agregado. O validador (validacao.py)
+    # fica entre o parser e o acumulador.
+    if dir_cache is not None:
+        from cache import carregar_blocos
+        fonte = carregar_blocos(caminho, dir_cache, COLUNAS_ANALISE,
+                                tamanho_bloco=tamanho_bloco, relatorio=relatorio,
+                                validador=validador)
+    else:
+        fonte = (b[COLUNAS_ANALISE]
+                 for b in ler_em_blocos(caminho, tamanho_bloco, relatorio, validador))
+
+    linhas = 0
+    for bloco in fonte:
+        with etapa("acumulador", linhas=len(bloco)):
+            (armazem or acc).atualizar(bloco)
+        linhas += len(bloco)
+        if manter_base:
+            blocos.append(bloco)
+    return linhas
+
+
+def _ingerir_arquivos(entrada, acc, armazem, blocos, processos, manter_base,
+                      tamanho_bloco, dir_cache, validador, relatorio):
+    # cada arquivo é lido e agregado em um worker (ver ingestao.py); aqui
+    # só chegam estados, mesclados enquanto os próximos arquivos são lidos
+    from ingestao import descobrir_arquivos, ingerir_arquivos
+
+    validacao = None
+    if validador is not None:
+        validacao = {"quarentena": validador.quarentena,
+                     "limite_rejeicao": validador.limite}
+    parciais = ingerir_arquivos(descobrir_arquivos(entrada), COLUNAS_ANALISE, processos,
+                                por_cliente=acc.por_cliente,
+                                por_competencia=armazem is not None,
+                                manter_base=manter_base, tamanho_bloco=tamanho_bloco,
+                                dir_cache=dir_cache, validacao=validacao,
+                                aproximado=acc.aproximado, relatorio=relatorio)
+    linhas = 0
+    for parcial in parciais:
+        with etapa("mescla", linhas=parcial.linhas):
+            for comp, estado in parcial.estados.items():
+                parte = AcumuladorFaturamento.de_estado(estado)
+                if armazem is not None:
+                    armazem.incorporar(comp, parte)
+                else:
+                    acc.mesclar(parte)
+        if parcial.qualidade is not None:
+            validador.mesclar(parcial.qualidade)
+        linhas += parcial.linhas
+        if parcial.base is not None:
+            blocos.append(parcial.base)
+    return linhas
+
+
+def _chave_memo(caminho, armazem, validador, motor, aproximado=False, por_cliente=True):
+    # identidade barata do estado carregado, para as derivadas em disco
+    # (memo.py): com o armazém, o manifesto; senão, tamanho+mtime das fontes
+    from cache import chave_fonte
+    from memo import chave_estado
+
+    if armazem is not None:
+        fontes = [json.dumps(armazem.manifesto(), sort_keys=True)]
+    elif multiplos_arquivos(caminho):
+        from ingestao import descobrir_arquivos
+        fontes = [chave_fonte(a) for a in descobrir_arquivos(caminho)]
+    elif Path(caminho).is_file():
+        fontes = [chave_fonte(caminho)]
+    else:
+        return None          # tabela da conexão DuckDB: só memo em memória
+    limite = validador.limite if validador is not None else "sem validação"
+    return chave_estado(*fontes, motor, limite, aproximado, por_cliente)
+
+
+def _carregar_duckdb(fonte, figuras=False, validador=None, dir_memo=None, chave_memo=None,
+                     relatorio=True):
+    from motor_duckdb import MotorDuckDB
+
+    if multiplos_arquivos(fonte):
+        # o read_csv do DuckDB aceita glob; os cabeçalhos são conferidos antes
+        from ingestao import PADRAO, descobrir_arquivos, validar_esquemas
+        validar_esquemas(descobrir_arquivos(fonte))
+        if Path(fonte).is_dir():
+            fonte = Path(fonte) / PADRAO
+
+    with etapa("carga") as span:
+        m = MotorDuckDB(fonte, validar=validador is not None)
+        qualidade = None
+        if validador is not None:
+            # uma varredura só de contagens antes de agregar: aborta cedo
+            # se a fonte passar do limite de reprovadas
+            with etapa("validacao"):
+                qualidade = validador.mesclar(m.qualidade(validador.quarentena)).resumo()
+        # com figuras, o estado por cliente vem para a memória (fig5);
+        # sem elas, as seções 6 e 7 ficam inteiramente no banco
+        acc = m.acumulador(por_cliente=figuras).usar_memo(dir_memo, chave_memo)
+        span.linhas = acc.linhas
+    if relatorio:
+        print(f"  Motor DuckDB         : {acc.linhas} linhas agregadas fora da memória")
+    with etapa("clientes", linhas=acc.linhas):
+        resumo_cli = acc.resumo_clientes(k=10) if figuras else m.resumo_clientes(k=10)
+    corr = m.correlacao() if figuras else None
+    return Analise(acc, resumo_cli, None, corr, PainelKpis(acc, resumo_cli), qualidade)
+
+
+def secao0(analise):
+    acc = analise.acc
+    print(f"\nRegistros carregados : {acc.linhas}")
+    print(f"Colunas              : {acc.colunas}")
+    print(f"Competências         : {acc.competencias()}")
+    # exato com o estado por cliente (ou o particionamento) das seções 6 e
+    # 7; sem ele (--sem-clientes), a estimativa do HyperLogLog
+    erro = acc.erro_aproximado()
+    if erro is None or erro["clientes"] is None:
+        print(f"Clientes únicos      : {analise.resumo_cli.n_clientes}")
+    else:
+        print(f"Clientes únicos      : ≈ {analise.resumo_cli.n_clientes} "
+              f"(HyperLogLog, erro padrão {erro['clientes']:.2%})")
+    print(f"Status possíveis     : {acc.status_possiveis()}")
+    print(f"\nValores ausentes:\n{acc.nulos}")
+    if erro is not None:
+        print(f"\nModo aproximado      : medianas, quartis e máximos de consumo e "
+              f"valor a até ±{erro['quantis']:.1%}; médias e totais exatos")
+
+    q = analise.qualidade
+    if q is not None:
+        print(f"\nValidação            : {q['linhas']} linhas lidas, "
+              f"{q['rejeitadas']} reprovadas ({q['rejeitadas'] / q['linhas']:.2%})")
+        for motivo, n in q["motivos"].items():
+            print(f"  {motivo:<22}: {n}")
+        for arquivo in q["quarentena"]:
+            print(f"  Quarentena           : {arquivo}")
+
 
 # ══════════════════════════════════════════════════════════
 # 1. TAXA DE INADIMPLÊNCIA
 # ══════════════════════════════════════════════════════════
-print("\n" + "─" * 60)
-print("  1. TAXA DE INADIMPLÊNCIA")
-print("─" * 60)
-
-status_counts = df["status_fatura"].value_counts()
-total         = len(df)
-tx_atrasada   = status_counts.get("atrasada", 0) / total * 100
-tx_aberto     = status_counts.get("em aberto", 0) / total * 100
-tx_paga       = status_counts.get("paga", 0) / total * 100
-valor_atrasado = df.loc[df["status_fatura"] == "atrasada", "valor_fatura"].sum()
-valor_total    = df["valor_fatura"].sum()
-
-print(f"\n  Pagas      : {status_counts.get('paga',0):>4} ({tx_paga:.1f}%)")
-print(f"  Atrasadas  : {status_counts.get('atrasada',0):>4} ({tx_atrasada:.1f}%)")
-print(f"  Em aberto  : {status_counts.get('em aberto',0):>4} ({tx_aberto:.1f}%)")
-print(f"\n  Valor total faturado : R$ {valor_total:>10,.2f}")
-print(f"  Valor em atraso      : R$ {valor_atrasado:>10,.2f}")
-print(f"  % do faturamento     : {valor_atrasado/valor_total*100:.1f}%")
-
-# por competência
-print("\n  Inadimplência por competência:")
-for comp in sorted(df["competencia"].unique()):
-    sub  = df[df["competencia"] == comp]
-    atr  = (sub["status_fatura"] == "atrasada").sum()
-    taxa = atr / len(sub) * 100
-    print(f"    {comp}: {atr}/{len(sub)} atrasadas → {taxa:.1f}%")
+def secao1(analise):
+    acc = analise.acc
+    _linha()
+    print("  1. TAXA DE INADIMPLÊNCIA")
+    print("─" * 60)
+
+    status_counts = acc.status_counts()
+    total         = acc.linhas
+    tx_atrasada   = status_counts.get("atrasada", 0) / total * 100
+    tx_aberto     = status_counts.get("em aberto", 0) / total * 100
+    tx_paga       = status_counts.get("paga", 0) / total * 100
+    valor_atrasado = acc.valor_por_status().get("atrasada", 0.0)
+    valor_total    = acc.valor_total()
+
+    print(f"\n  Pagas      : {status_counts.get('paga',0):>4} ({tx_paga:.1f}%)")
+    print(f"  Atrasadas  : {status_counts.get('atrasada',0):>4} ({tx_atrasada:.1f}%)")
+    print(f"  Em aberto  : {status_counts.get('em aberto',0):>4} ({tx_aberto:.1f}%)")
+    print(f"\n  Valor total faturado : R$ {valor_total:>10,.2f}")
+    print(f"  Valor em atraso      : R$ {valor_atrasado:>10,.2f}")
+    print(f"  % do faturamento     : {valor_atrasado/valor_total*100:.1f}%")
+
+    # por competência
+    tend = acc.tendencia()
+    print("\n  Inadimplência por competência:")
+    for _, row in tend.iterrows():
+        taxa = row["atrasadas"] / row["total"] * 100
+        print(f"    {row['competencia']}: {int(row['atrasadas'])}/{int(row['total'])} atrasadas → {taxa:.1f}%")
+
 
 # ══════════════════════════════════════════════════════════
 # 2. COMPORTAMENTO DE CONSUMO
 # ══════════════════════════════════════════════════════════
-print("\n" + "─" * 60)
-print("  2. CONSUMO DE ENERGIA")
-print("─" * 60)
+def secao2(analise):
+    acc = analise.acc
+    _linha()
+    print("  2. CONSUMO DE ENERGIA")
+    print("─" * 60)
+
+    print("\n  Por tipo de cliente:")
+    print(acc.consumo_por_tipo().to_string())
 
-print("\n  Por tipo de cliente:")
-print(df.groupby("tipo_cliente")["consumo_energia_kwh"]
-        .agg(media="mean", mediana="median", maximo="max", total="sum")
-        .round(1).to_string())
+    print("\n  Por status da fatura:")
+    print(acc.consumo_por_status().to_string())
 
-print("\n  Por status da fatura:")
-print(df.groupby("status_fatura")["consumo_energia_kwh"]
-        .agg(media="mean", mediana="median")
-        .round(1).to_string())
+    print("\n  Por competência:")
+    print(acc.consumo_por_competencia().to_string())
 
-print("\n  Por competência:")
-print(df.groupby("competencia")["consumo_energia_kwh"]
-        .agg(media="mean", total="sum")
-        .round(1).to_string())
 
 # ══════════════════════════════════════════════════════════
 # 3. FATURAMENTO POR TIPO DE CLIENTE
 # ══════════════════════════════════════════════════════════
-print("\n" + "─" * 60)
-print("  3. FATURAMENTO POR TIPO DE CLIENTE")
-print("─" * 60)
-
-fat_tipo = df.groupby("tipo_cliente")["valor_fatura"].agg(
-    qtd="count", total="sum", media="mean", mediana="median"
-).round(2)
-fat_tipo["pct_receita"] = (fat_tipo["total"] / fat_tipo["total"].sum() * 100).round(1)
-print(f"\n{fat_tipo.to_string()}")
-
-print("\n  Inadimplência por tipo:")
-for tp in df["tipo_cliente"].unique():
-    sub  = df[df["tipo_cliente"] == tp]
-    atr  = (sub["status_fatura"] == "atrasada").sum()
-    taxa = atr / len(sub) * 100
-    print(f"    {tp}: {atr}/{len(sub)} atrasadas → {taxa:.1f}%")
+def secao3(analise):
+    acc = analise.acc
+    _linha()
+    print("  3. FATURAMENTO POR TIPO DE CLIENTE")
+    print("─" * 60)
+
+    fat_tipo = acc.faturamento_por_tipo()
+    print(f"\n{fat_tipo.to_string()}")
+
+    print("\n  Inadimplência por tipo:")
+    inad_tipo = acc.atraso_por_tipo()
+    for tp, row in inad_tipo.iterrows():
+        print(f"    {tp}: {int(row['atrasadas'])}/{int(row['qtd'])} atrasadas → {row['tx_atraso']:.1f}%")
+
 
 # ══════════════════════════════════════════════════════════
 # 4. ANÁLISE DE VENCIMENTOS
 # ══════════════════════════════════════════════════════════
-print("\n" + "─" * 60)
-print("  4. ANÁLISE DE VENCIMENTOS")
-print("─" * 60)
-
-dias_top = df["dia_vencimento"].value_counts().sort_values(ascending=False).head(8)
-print(f"\n  Top 8 dias de vencimento:\n{dias_top.to_string()}")
-
-print("\n  Taxa de atraso por dia de vencimento (dias com ≥ 5 faturas):")
-resumo_dia = (
-    df.groupby("dia_vencimento")
-      .apply(lambda x: pd.Series({
-          "qtd":       len(x),
-          "atrasadas": (x["status_fatura"] == "atrasada").sum(),
-          "tx_atraso": (x["status_fatura"] == "atrasada").mean() * 100
-      }))
-      .query("qtd >= 5")
-      .sort_values("tx_atraso", ascending=False)
-      .round(1)
-)
-print(resumo_dia.to_string())
+def secao4(analise):
+    acc = analise.acc
+    _linha()
+    print("  4. ANÁLISE DE VENCIMENTOS")
+    print("─" * 60)
+
+    vol_dia  = acc.volume_por_dia()
+    dias_top = vol_dia.sort_values(ascending=False, kind="stable").head(8)
+    print(f"\n  Top 8 dias de vencimento:\n{dias_top.to_string()}")
+
+    print("\n  Taxa de atraso por dia de vencimento (dias com ≥ 5 faturas):")
+    resumo_dia = acc.resumo_dia(qtd_minima=5)
+    print(resumo_dia.to_string())
+
 
 # ══════════════════════════════════════════════════════════
 # 5. ANÁLISE DE ATRASOS (TEMPO)
 # ══════════════════════════════════════════════════════════
-print("\n" + "─" * 60)
-print("  5. ATRASO POR COMPETÊNCIA (TENDÊNCIA)")
-print("─" * 60)
+def secao5(analise):
+    tend = analise.acc.tendencia()
+    _linha()
+    print("  5. ATRASO POR COMPETÊNCIA (TENDÊNCIA)")
+    print("─" * 60)
 
-tend = df.groupby("competencia").apply(lambda x: pd.Series({
-    "total":   len(x),
-    "atrasadas": (x["status_fatura"] == "atrasada").sum(),
-    "tx_atraso": round((x["status_fatura"] == "atrasada").mean() * 100, 1),
-    "valor_atrasado": x.loc[x["status_fatura"] == "atrasada", "valor_fatura"].sum()
-})).reset_index()
+    print(f"\n{tend.to_string(index=False)}")
+    print(f"\n  Variação {analise.painel.periodo}: {analise.painel['tendencia'].valor:+.1f} p.p.")
 
-print(f"\n{tend.to_string(index=False)}")
-print(f"\n  Variação Jun→Ago: +{tend['tx_atraso'].iloc[-1] - tend['tx_atraso'].iloc[0]:.1f} p.p.")
 
 # ══════════════════════════════════════════════════════════
 # 6. CLIENTES VIP
 # ══════════════════════════════════════════════════════════
-print("\n" + "─" * 60)
-print("  6. CLIENTES VIP (TOP 10 POR VALOR)")
-print("─" * 60)
-
-vip = (
-    df.groupby(["id_cliente", "tipo_cliente"])
-      .agg(
-          total_faturado=("valor_fatura", "sum"),
-          num_faturas=("valor_fatura", "count"),
-          consumo_total=("consumo_energia_kwh", "sum"),
-          inadimplente=("status_fatura", lambda x: (x == "atrasada").any())
-      )
-      .sort_values("total_faturado", ascending=False)
-      .head(10)
-      .reset_index()
-)
-vip["rank"] = range(1, 11)
-vip["id_curto"] = ["VIP_" + str(i).zfill(2) for i in range(1, 11)]
-print(
-    vip[["rank","id_curto","tipo_cliente","total_faturado",
-         "num_faturas","consumo_total","inadimplente"]]
-    .to_string(index=False)
-)
+def secao6(analise):
+    _linha()
+    print("  6. CLIENTES VIP (TOP 10 POR VALOR)")
+    print("─" * 60)
+
+    vip = analise.resumo_cli.vip.copy()
+    vip["rank"] = range(1, len(vip) + 1)
+    vip["id_curto"] = ["VIP_" + str(i).zfill(2) for i in vip["rank"]]
+    print(
+        vip[["rank","id_curto","tipo_cliente","total_faturado",
+             "num_faturas","consumo_total","inadimplente"]]
+        .to_string(index=False)
+    )
+
 
 # ══════════════════════════════════════════════════════════
 # 7. FREQUÊNCIA DE ATRASO POR CLIENTE
 # ══════════════════════════════════════════════════════════
-print("\n" + "─" * 60)
-print("  7. FREQUÊNCIA DE ATRASO POR CLIENTE")
-print("─" * 60)
-
-freq = (
-    df.groupby("id_cliente")
-      .apply(lambda x: pd.Series({
-          "total_fat":   len(x),
-          "atrasadas":   (x["status_fatura"] == "atrasada").sum(),
-          "tx_atraso":   round((x["status_fatura"] == "atrasada").mean() * 100, 1)
-      }))
-      .reset_index()
-)
-
-print(f"\n  Clientes sem nenhum atraso       : {(freq['atrasadas'] == 0).sum()}")
-print(f"  Clientes com algum atraso        : {(freq['atrasadas'] > 0).sum()}")
-print(f"  Clientes 100% inadimplentes      : {(freq['tx_atraso'] == 100).sum()}")
-print(f"  Clientes com > 50% de atraso     : {(freq['tx_atraso'] > 50).sum()}")
-print(f"  Máx. atrasos por cliente         : {int(freq['atrasadas'].max())}")
-
-# distribuição
-dist_atr = freq["atrasadas"].value_counts().sort_index()
-print(f"\n  Distribuição por qtd de atrasos:")
-for k, v in dist_atr.items():
-    print(f"    {int(k)} atraso(s): {v} clientes")
+def secao7(analise):
+    _linha()
+    print("  7. FREQUÊNCIA DE ATRASO POR CLIENTE")
+    print("─" * 60)
+
+    # perfil: nº de clientes por (total_fat, atrasadas) — exato e mesclável
+    perfil     = analise.resumo_cli.perfil
+    com_atraso = perfil[perfil["atrasadas"] > 0]
+    sem_atraso = perfil.loc[perfil["atrasadas"] == 0, "clientes"].sum()
+    c_100      = perfil.loc[perfil["tx_atraso"] == 100, "clientes"].sum()
+
+    print(f"\n  Clientes sem nenhum atraso       : {sem_atraso}")
+    print(f"  Clientes com algum atraso        : {com_atraso['clientes'].sum()}")
+    print(f"  Clientes 100% inadimplentes      : {c_100}")
+    print(f"  Clientes com > 50% de atraso     : {perfil.loc[perfil['tx_atraso'] > 50, 'clientes'].sum()}")
+    print(f"  Máx. atrasos por cliente         : {int(perfil['atrasadas'].max())}")
+
+    # distribuição
+    dist_atr = perfil.groupby("atrasadas")["clientes"].sum()
+    print(f"\n  Distribuição por qtd de atrasos:")
+    for k, v in dist_atr.items():
+        print(f"    {int(k)} atraso(s): {v} clientes")
+
+
+# ══════════════════════════════════════════════════════════
+# 8. PAINEL DE KPIs
+# ══════════════════════════════════════════════════════════
+def secao8(analise):
+    _linha()
+    print("  8. PAINEL DE KPIs")
+    print("─" * 60)
+
+    print()
+    for rotulo, texto, status in analise.painel.tabela()[1:]:
+        print(f"  {rotulo:<28} {texto:>16}   {status}")
+
+
+SECOES = {1: secao1, 2: secao2, 3: secao3, 4: secao4,
+          5: secao5, 6: secao6, 7: secao7, 8: secao8}
+# leem o resumo por cliente (vip/perfil)
+SECOES_CLIENTES = {6, 7}
 
 
 # ══════════════════════════════════════════════════════════
 # GRÁFICOS
 # ══════════════════════════════════════════════════════════
-print("\n" + "=" * 60)
-print("  Gerando gráficos...")
-print("=" * 60)
-
-reais = FuncFormatter(lambda x, _: f"R${x:,.0f}")
-pct   = FuncFormatter(lambda x, _: f"{x:.0f}%")
-
-
-# ── FIG 1: Visão Geral de Inadimplência ───────────────────
-fig1, axes = plt.subplots(1, 3, figsize=(16, 5))
-fig1.patch.set_facecolor(BG)
-fig1.suptitle("1 · VISÃO GERAL DE INADIMPLÊNCIA", fontsize=13,
-              fontweight="bold", color=AMARELO, y=1.02)
-
-# 1a - Pizza de status
-ax = axes[0]
-ax.set_facecolor(SURFACE)
-sizes  = [status_counts.get("paga",0),
-          status_counts.get("atrasada",0),
-          status_counts.get("em aberto",0)]
-labels = ["Paga\n79.3%", "Atrasada\n20.2%", "Em Aberto\n0.4%"]
-colors = [VERDE, VERMELHO, TEAL]
-wedges, texts = ax.pie(sizes, labels=labels, colors=colors,
-                       startangle=90, pctdistance=0.8,
-                       wedgeprops=dict(width=0.55, edgecolor=BG, linewidth=2))
-for t in texts:
-    t.set_color(BRANCO); t.set_fontsize(9)
-ax.set_title("Status das Faturas", fontsize=10, color=AMARELO, pad=10)
-ax.text(0, 0, f"697\nfaturas", ha="center", va="center",
-        fontsize=10, color=BRANCO, fontweight="bold")
-
-# 1b - Evolução mensal
-ax = axes[1]
-comp_sorted = sorted(df["competencia"].unique())
-tx_mes = [
-    (df[df["competencia"] == c]["status_fatura"] == "atrasada").mean() * 100
-    for c in comp_sorted
-]
-meses_label = ["Jun/21", "Jul/21", "Ago/21"]
-bars = ax.bar(meses_label, tx_mes, color=[VERDE, AMARELO, VERMELHO],
-              width=0.5, edgecolor=BG, linewidth=1.5)
-for bar, v in zip(bars, tx_mes):
-    ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.3,
-            f"{v:.1f}%", ha="center", va="bottom", fontsize=10,
-            color=BRANCO, fontweight="bold")
-ax.set_title("Taxa de Atraso por Competência", fontsize=10, color=AMARELO, pad=10)
-ax.set_ylabel("% Atrasadas", color=MUTED)
-ax.yaxis.set_major_formatter(pct)
-ax.set_ylim(0, 30)
-
-# 1c - Valor atrasado por competência
-ax = axes[2]
-val_atr = [
-    df[(df["competencia"] == c) & (df["status_fatura"] == "atrasada")]["valor_fatura"].sum()
-    for c in comp_sorted
-]
-bars = ax.bar(meses_label, val_atr, color=[VERDE, AMARELO, VERMELHO],
-              width=0.5, edgecolor=BG, linewidth=1.5)
-for bar, v in zip(bars, val_atr):
-    ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 50,
-            f"R${v:,.0f}", ha="center", va="bottom", fontsize=8.5,
-            color=BRANCO, fontweight="bold")
-ax.set_title("Valor em Atraso por Competência", fontsize=10, color=AMARELO, pad=10)
-ax.set_ylabel("Valor (R$)", color=MUTED)
-ax.yaxis.set_major_formatter(reais)
-
-plt.tight_layout()
-fig1.savefig("/home/claude/fig1_inadimplencia.png", dpi=150, bbox_inches="tight",
-             facecolor=BG)
-print("  ✔ fig1_inadimplencia.png")
-
-
-# ── FIG 2: Consumo de Energia ─────────────────────────────
-fig2, axes = plt.subplots(1, 3, figsize=(16, 5))
-fig2.patch.set_facecolor(BG)
-fig2.suptitle("2 · COMPORTAMENTO DE CONSUMO DE ENERGIA", fontsize=13,
-              fontweight="bold", color=AMARELO, y=1.02)
-
-# 2a - Boxplot consumo por tipo
-ax = axes[0]
-data_pf = df[df["tipo_cliente"] == "PF"]["consumo_energia_kwh"]
-data_pj = df[df["tipo_cliente"] == "PJ"]["consumo_energia_kwh"]
-bp = ax.boxplot([data_pf, data_pj], labels=["PF", "PJ"],
-                patch_artist=True, notch=False,
-                medianprops=dict(color=BG, linewidth=2),
-                whiskerprops=dict(color=MUTED),
-                capprops=dict(color=MUTED),
-                flierprops=dict(marker="o", color=MUTED, alpha=0.5, markersize=3))
-bp["boxes"][0].set_facecolor(AMARELO)
-bp["boxes"][0].set_alpha(0.7)
-bp["boxes"][1].set_facecolor(TEAL)
-bp["boxes"][1].set_alpha(0.7)
-ax.set_title("Distribuição de Consumo por Tipo", fontsize=10, color=AMARELO, pad=10)
-ax.set_ylabel("kWh", color=MUTED)
-
-# 2b - Média consumo por status
-ax = axes[1]
-cons_status = df.groupby("status_fatura")["consumo_energia_kwh"].mean().sort_values()
-cores_status = {
-    "atrasada": VERMELHO, "paga": VERDE, "em aberto": AMARELO
-}
-colors_list = [cores_status[s] for s in cons_status.index]
-bars = ax.barh(cons_status.index, cons_status.values, color=colors_list,
-               edgecolor=BG, height=0.5)
-for bar, v in zip(bars, cons_status.values):
-    ax.text(v + 3, bar.get_y() + bar.get_height()/2,
-            f"{v:.0f} kWh", va="center", fontsize=9, color=BRANCO)
-ax.set_title("Consumo Médio por Status", fontsize=10, color=AMARELO, pad=10)
-ax.set_xlabel("kWh médio", color=MUTED)
-
-# 2c - Histograma do consumo geral
-ax = axes[2]
-ax.hist(df["consumo_energia_kwh"], bins=30, color=TEAL, alpha=0.7,
-        edgecolor=BG, linewidth=0.5)
-ax.axvline(df["consumo_energia_kwh"].median(), color=AMARELO,
-           linewidth=1.5, linestyle="--", label=f"Mediana: {df['consumo_energia_kwh'].median():.0f}")
-ax.axvline(df["consumo_energia_kwh"].mean(), color=VERMELHO,
-           linewidth=1.5, linestyle="--", label=f"Média: {df['consumo_energia_kwh'].mean():.0f}")
-ax.set_title("Distribuição de Consumo (todos)", fontsize=10, color=AMARELO, pad=10)
-ax.set_xlabel("kWh", color=MUTED)
-ax.set_ylabel("Frequência", color=MUTED)
-ax.legend(fontsize=8, facecolor=SURFACE, edgecolor=MUTED)
-
-plt.tight_layout()
-fig2.savefig("/home/claude/fig2_consumo.png", dpi=150, bbox_inches="tight",
-             facecolor=BG)
-print("  ✔ fig2_consumo.png")
-
-
-# ── FIG 3: Faturamento por Tipo de Cliente ────────────────
-fig3, axes = plt.subplots(1, 3, figsize=(16, 5))
-fig3.patch.set_facecolor(BG)
-fig3.suptitle("3 · FATURAMENTO POR TIPO DE CLIENTE", fontsize=13,
-              fontweight="bold", color=AMARELO, y=1.02)
-
-# 3a - Receita total
-ax = axes[0]
-receita = df.groupby("tipo_cliente")["valor_fatura"].sum()
-bars = ax.bar(receita.index, receita.values,
-              color=[AMARELO, TEAL], width=0.4, edgecolor=BG, linewidth=1.5)
-for bar, v in zip(bars, receita.values):
-    ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 500,
-            f"R${v:,.0f}", ha="center", fontsize=9, color=BRANCO, fontweight="bold")
-ax.set_title("Receita Total por Tipo", fontsize=10, color=AMARELO, pad=10)
-ax.yaxis.set_major_formatter(reais)
-
-# 3b - Ticket médio
-ax = axes[1]
-ticket = df.groupby("tipo_cliente")["valor_fatura"].mean()
-bars = ax.bar(ticket.index, ticket.values,
-              color=[AMARELO, TEAL], width=0.4, edgecolor=BG, linewidth=1.5)
-for bar, v in zip(bars, ticket.values):
-    ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 5,
-            f"R${v:.0f}", ha="center", fontsize=9, color=BRANCO, fontweight="bold")
-ax.set_title("Ticket Médio por Tipo", fontsize=10, color=AMARELO, pad=10)
-ax.yaxis.set_major_formatter(reais)
-
-# 3c - Taxa de atraso por tipo
-ax = axes[2]
-atr_tipo = df.groupby("tipo_cliente").apply(
-    lambda x: (x["status_fatura"] == "atrasada").mean() * 100
-)
-bars = ax.bar(atr_tipo.index, atr_tipo.values,
-              color=[AMARELO, TEAL], width=0.4, edgecolor=BG, linewidth=1.5)
-for bar, v in zip(bars, atr_tipo.values):
-    ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.3,
-            f"{v:.1f}%", ha="center", fontsize=9, color=BRANCO, fontweight="bold")
-ax.set_title("Taxa de Inadimplência por Tipo", fontsize=10, color=AMARELO, pad=10)
-ax.set_ylabel("% Atrasadas", color=MUTED)
-ax.yaxis.set_major_formatter(pct)
-
-plt.tight_layout()
-fig3.savefig("/home/claude/fig3_tipo_cliente.png", dpi=150, bbox_inches="tight",
-             facecolor=BG)
-print("  ✔ fig3_tipo_cliente.png")
-
-
-# ── FIG 4: Análise de Vencimentos ────────────────────────
-fig4, axes = plt.subplots(1, 2, figsize=(14, 5))
-fig4.patch.set_facecolor(BG)
-fig4.suptitle("4 · ANÁLISE DE VENCIMENTOS DAS FATURAS", fontsize=13,
-              fontweight="bold", color=AMARELO, y=1.02)
-
-# 4a - Volume por dia de vencimento
-ax = axes[0]
-vol_dia = df["dia_vencimento"].value_counts().sort_index()
-cores = [VERMELHO if v in [22, 27] else AMARELO if v in [11] else TEAL
-         for v in vol_dia.index]
-ax.bar(vol_dia.index, vol_dia.values, color=cores, width=0.7,
-       edgecolor=BG, linewidth=0.8)
-ax.set_title("Volume de Faturas por Dia de Vencimento", fontsize=10,
-             color=AMARELO, pad=10)
-ax.set_xlabel("Dia do Mês", color=MUTED)
-ax.set_ylabel("Qtd. Faturas", color=MUTED)
-patch_amarelo = mpatches.Patch(color=AMARELO, label="Dia 11 (melhor)")
-patch_verm    = mpatches.Patch(color=VERMELHO, label="Dias 22 e 27 (piores)")
-patch_teal    = mpatches.Patch(color=TEAL, label="Demais dias")
-ax.legend(handles=[patch_amarelo, patch_verm, patch_teal],
-          fontsize=8, facecolor=SURFACE, edgecolor=MUTED)
-
-# 4b - Taxa de atraso por dia (dias com ≥ 5 faturas)
-ax = axes[1]
-resumo_d = resumo_dia.sort_values("dia_vencimento" if "dia_vencimento" in resumo_dia.columns else resumo_dia.index.name or "index")
-resumo_d = resumo_dia.reset_index().sort_values("dia_vencimento")
-cores2   = [VERMELHO if v >= 22 else AMARELO if v < 18 else TEAL
-            for v in resumo_d["dia_vencimento"]]
-ax.scatter(resumo_d["dia_vencimento"], resumo_d["tx_atraso"],
-           s=resumo_d["qtd"] * 2.5, c=cores2, alpha=0.8, edgecolors=BG, linewidth=1)
-ax.axhline(tx_atrasada, color=VERMELHO, linestyle="--", linewidth=1,
-           label=f"Média geral: {tx_atrasada:.1f}%")
-for _, row in resumo_d.iterrows():
-    if row["qtd"] >= 25:
-        ax.annotate(f"Dia {int(row['dia_vencimento'])}\n{row['tx_atraso']:.0f}%",
-                    (row["dia_vencimento"], row["tx_atraso"]),
-                    xytext=(5, 5), textcoords="offset points",
-                    fontsize=7.5, color=BRANCO)
-ax.set_title("Taxa de Atraso por Dia de Vencimento\n(tamanho = volume)", fontsize=10,
-             color=AMARELO, pad=10)
-ax.set_xlabel("Dia do Mês", color=MUTED)
-ax.set_ylabel("% Atrasadas", color=MUTED)
-ax.yaxis.set_major_formatter(pct)
-ax.legend(fontsize=8, facecolor=SURFACE, edgecolor=MUTED)
-
-plt.tight_layout()
-fig4.savefig("/home/claude/fig4_vencimentos.png", dpi=150, bbox_inches="tight",
-             facecolor=BG)
-print("  ✔ fig4_vencimentos.png")
-
-
-# ── FIG 5: Clientes VIP ───────────────────────────────────
-fig5, axes = plt.subplots(1, 2, figsize=(14, 6))
-fig5.patch.set_facecolor(BG)
-fig5.suptitle("6 · CLIENTES VIP — TOP 10 POR VALOR FATURADO", fontsize=13,
-              fontweight="bold", color=AMARELO, y=1.02)
-
-# 5a - Barras horizontais
-ax = axes[0]
-vip_sorted = vip.sort_values("total_faturado")
-cores_vip  = [VERMELHO if r else VERDE for r in vip_sorted["inadimplente"]]
-bars = ax.barh(vip_sorted["id_curto"], vip_sorted["total_faturado"],
-               color=cores_vip, edgecolor=BG, height=0.6)
-for bar, v in zip(bars, vip_sorted["total_faturado"]):
-    ax.text(v + 20, bar.get_y() + bar.get_height()/2,
-            f"R${v:,.0f}", va="center", fontsize=8, color=BRANCO)
-ax.set_title("Valor Total Faturado", fontsize=10, color=AMARELO, pad=10)
-ax.xaxis.set_major_formatter(reais)
-p_verm = mpatches.Patch(color=VERMELHO, label="Com atraso")
-p_verd = mpatches.Patch(color=VERDE, label="Sem atraso")
-ax.legend(handles=[p_verm, p_verd], fontsize=8,
-          facecolor=SURFACE, edgecolor=MUTED)
-
-# 5b - Consumo vs faturamento (scatter)
-ax = axes[1]
-vip_all = (
-    df.groupby(["id_cliente","tipo_cliente"])
-      .agg(total=("valor_fatura","sum"), consumo=("consumo_energia_kwh","sum"))
-      .reset_index()
-)
-pf_d = vip_all[vip_all["tipo_cliente"] == "PF"]
-pj_d = vip_all[vip_all["tipo_cliente"] == "PJ"]
-ax.scatter(pf_d["consumo"], pf_d["total"], c=AMARELO, alpha=0.5, s=20,
-           edgecolors="none", label="PF")
-ax.scatter(pj_d["consumo"], pj_d["total"], c=TEAL, alpha=0.7, s=40,
-           edgecolors="none", label="PJ")
-# destaque top 10
-for _, row in vip.iterrows():
-    row_full = vip_all[vip_all["id_cliente"] == row["id_cliente"]]
-    if not row_full.empty:
-        ax.scatter(row_full["consumo"], row_full["total"],
-                   c=VERMELHO, s=80, zorder=5, edgecolors=BRANCO, linewidth=0.8)
-ax.set_title("Consumo Total vs Valor Faturado\n(vermelho = TOP 10 VIP)", fontsize=10,
-             color=AMARELO, pad=10)
-ax.set_xlabel("Consumo Total (kWh)", color=MUTED)
-ax.set_ylabel("Valor Total (R$)", color=MUTED)
-ax.xaxis.set_major_formatter(FuncFormatter(lambda x,_: f"{x:,.0f}"))
-ax.yaxis.set_major_formatter(reais)
-ax.legend(fontsize=8, facecolor=SURFACE, edgecolor=MUTED)
-
-plt.tight_layout()
-fig5.savefig("/home/claude/fig5_vip.png", dpi=150, bbox_inches="tight",
-             facecolor=BG)
-print("  ✔ fig5_vip.png")
-
-
-# ── FIG 6: Frequência de Atraso por Cliente ───────────────
-fig6, axes = plt.subplots(1, 3, figsize=(16, 5))
-fig6.patch.set_facecolor(BG)
-fig6.suptitle("7 · FREQUÊNCIA DE ATRASO POR CLIENTE", fontsize=13,
-              fontweight="bold", color=AMARELO, y=1.02)
-
-# 6a - Distribuição de clientes por qtd de atrasos
-ax = axes[0]
-dist = freq["atrasadas"].value_counts().sort_index()
-cores_dist = [VERDE if k == 0 else AMARELO if k == 1 else VERMELHO for k in dist.index]
-bars = ax.bar([str(int(k)) for k in dist.index], dist.values,
-              color=cores_dist, edgecolor=BG, linewidth=1.5, width=0.5)
-for bar, v in zip(bars, dist.values):
-    ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 2,
-            str(v), ha="center", fontsize=10, color=BRANCO, fontweight="bold")
-ax.set_title("Clientes por Nº de Atrasos", fontsize=10, color=AMARELO, pad=10)
-ax.set_xlabel("Qtd. de Atrasos", color=MUTED)
-ax.set_ylabel("Nº de Clientes", color=MUTED)
-
-# 6b - Histograma taxa de atraso (só quem atrasa)
-ax = axes[1]
-atraso_clientes = freq[freq["atrasadas"] > 0]["tx_atraso"]
-ax.hist(atraso_clientes, bins=10, color=VERMELHO, alpha=0.75,
-        edgecolor=BG, linewidth=0.8)
-ax.set_title("Taxa de Atraso — Clientes com ≥ 1 Atraso", fontsize=10,
-             color=AMARELO, pad=10)
-ax.set_xlabel("% de Faturas Atrasadas", color=MUTED)
-ax.set_ylabel("Nº de Clientes", color=MUTED)
-ax.axvline(atraso_clientes.mean(), color=AMARELO, linestyle="--", linewidth=1.5,
-           label=f"Média: {atraso_clientes.mean():.0f}%")
-ax.legend(fontsize=8, facecolor=SURFACE, edgecolor=MUTED)
-
-# 6c - Pizza: perfil de adimplência
-ax = axes[2]
-sem_atraso = (freq["atrasadas"] == 0).sum()
-c_100      = (freq["tx_atraso"] == 100).sum()
-c_parcial  = ((freq["atrasadas"] > 0) & (freq["tx_atraso"] < 100)).sum()
-sizes_p = [sem_atraso, c_parcial, c_100]
-labels_p = [f"Sem atraso\n{sem_atraso}", f"Atraso parcial\n{c_parcial}", f"100% inadimp.\n{c_100}"]
-wedges2, texts2 = ax.pie(sizes_p, labels=labels_p,
-                          colors=[VERDE, AMARELO, VERMELHO],
-                          startangle=90,
-                          wedgeprops=dict(width=0.55, edgecolor=BG, linewidth=2))
-for t in texts2:
-    t.set_color(BRANCO); t.set_fontsize(9)
-ax.set_title("Perfil de Adimplência dos Clientes", fontsize=10, color=AMARELO, pad=10)
-ax.text(0, 0, f"{df['id_cliente'].nunique()}\nclientes", ha="center", va="center",
-        fontsize=9, color=BRANCO, fontweight="bold")
-
-plt.tight_layout()
-fig6.savefig("/home/claude/fig6_frequencia_atraso.png", dpi=150, bbox_inches="tight",
-             facecolor=BG)
-print("  ✔ fig6_frequencia_atraso.png")
-
-
-# ── FIG 7: Heatmap correlação e resumo final ──────────────
-fig7, axes = plt.subplots(1, 2, figsize=(14, 5))
-fig7.patch.set_facecolor(BG)
-fig7.suptitle("8 · CORRELAÇÕES E PAINEL DE RISCO", fontsize=13,
-              fontweight="bold", color=AMARELO, y=1.02)
-
-# 7a - Heatmap
-ax = axes[0]
-df_num = df[["valor_fatura","consumo_energia_kwh","dia_vencimento"]].copy()
-df_num["inadimplente"] = (df["status_fatura"] == "atrasada").astype(int)
-df_num["is_pj"]        = (df["tipo_cliente"] == "PJ").astype(int)
-corr = df_num.corr()
-sns.heatmap(corr, ax=ax, cmap="YlOrRd", annot=True, fmt=".2f",
-            linewidths=0.5, linecolor=BG,
-            cbar_kws={"shrink": 0.8},
-            annot_kws={"size": 9},
-            xticklabels=["Valor","Consumo","Dia Venc.","Inadimp.","É PJ"],
-            yticklabels=["Valor","Consumo","Dia Venc.","Inadimp.","É PJ"])
-ax.set_title("Matriz de Correlação", fontsize=10, color=AMARELO, pad=10)
-ax.tick_params(colors=BRANCO)
-
-# 7b - Resumo de KPIs como tabela visual
-ax = axes[1]
-ax.axis("off")
-kpis = [
-    ["Métrica",                    "Valor",         "Status"],
-    ["Total de faturas",           "697",           "—"],
-    ["Clientes únicos",            "466",           "—"],
-    ["Taxa de inadimplência",      "20.2%",         "⚠ ALTO"],
-    ["Valor em atraso",            "R$ 23.715",     "⚠ ALTO"],
-    ["Clientes 100% inadimp.",     "97 (20.8%)",    "⚠ ALTO"],
-    ["Ticket médio PJ vs PF",      "3.4× maior",    "✔ OPO."],
-    ["Melhor dia de vencimento",   "Dia 11 (16.8%)", "✔ BOM"],
-    ["Pior dia de vencimento",     "Dia 27 (24.3%)", "⚠ RUIM"],
-    ["Tendência inadimplência",    "+9 p.p. em 3m", "⚠ PIORA"],
-    ["Clientes sem nenhum atraso", "369 (79.2%)",   "✔ BOM"],
-]
-tbl = ax.table(cellText=kpis[1:], colLabels=kpis[0],
-               loc="center", cellLoc="left")
-tbl.auto_set_font_size(False)
-tbl.set_fontsize(8.5)
-tbl.scale(1.3, 1.55)
-for (r, c), cell in tbl.get_celld().items():
-    cell.set_edgecolor(MUTED)
-    if r == 0:
-        cell.set_facecolor(AMARELO)
-        cell.set_text_props(color=BG, fontweight="bold")
-    elif "⚠" in cell.get_text().get_text():
-        cell.set_facecolor("#3d1a1a")
-        cell.set_text_props(color=VERMELHO)
-    elif "✔" in cell.get_text().get_text():
-        cell.set_facecolor("#0f2d1f")
-        cell.set_text_props(color=VERDE)
-    else:
-        cell.set_facecolor(SURFACE)
-        cell.set_text_props(color=BRANCO)
-ax.set_title("Painel de KPIs — Resumo Executivo", fontsize=10,
-             color=AMARELO, pad=10, y=0.98)
+def gerar_graficos(analise, dir_saida=DIR_SAIDA, figuras=None,
+                   processos=PROCESSOS_FIG, forcar=False, rolagem=None):
+    """
+    Renderiza as figuras pedidas; só aqui o matplotlib é importado.
+    A fig8 só existe com `rolagem` (gerar_rolagem).
+    """
+    from graficos import entradas_figuras, renderizar
+
+    _linha("=")
+    print("  Gerando gráficos...")
+    print("=" * 60)
+
+    # entradas de cada figura: só agregados prontos (ver graficos.py); a
+    # base completa só existe no caminho particionado (fig5)
+    entradas = entradas_figuras(analise.acc, analise.resumo_cli, analise.df,
+                                corr=analise.corr, painel=analise.painel,
+                                rolagem=rolagem)
+    with etapa("graficos"):
+        return renderizar(entradas, dir_saida, figuras=figuras,
+                          processos=processos, forcar=forcar)
+
 
-plt.tight_layout()
-fig7.savefig("/home/claude/fig7_correlacao_kpis.png", dpi=150, bbox_inches="tight",
-             facecolor=BG)
-print("  ✔ fig7_correlacao_kpis.png")
+# ══════════════════════════════════════════════════════════
+# ESTADOS POR COMPETÊNCIA (RISCO E ROLAGEM)
+# ══════════════════════════════════════════════════════════
+def estados_por_competencia(caminho, processos_carga=None, validar=True):
+    """
+    {competencia: AcumuladorFaturamento} da entrada, relida e agregada
+    por competência — para as análises mês a mês sem o armazém.
+    """
+    from ingestao import descobrir_arquivos, ingerir_arquivos
+
+    arquivos = descobrir_arquivos(caminho) if multiplos_arquivos(caminho) else [caminho]
+    validacao = {"quarentena": None, "limite_rejeicao": None} if validar else None
+    meses = {}
+    with etapa("estados_mes"):
+        for parcial in ingerir_arquivos(arquivos, COLUNAS_ANALISE, processos_carga,
+                                        por_competencia=True, validacao=validacao,
+                                        relatorio=False):
+            for comp, estado in parcial.estados.items():
+                parte = AcumuladorFaturamento.de_estado(estado)
+                meses[comp] = meses[comp].mesclar(parte) if comp in meses else parte
+    return meses
 
 
-print("\n" + "=" * 60)
-print("  Análise concluída! 7 gráficos gerados.")
-print("=" * 60)
+# ══════════════════════════════════════════════════════════
+# ESCORE DE RISCO (LOTE)
+# ══════════════════════════════════════════════════════════
+def gerar_risco(caminho, saida, dir_armazem=None, processos_carga=None, validar=True,
+                n_topo=10, meses=None):
+    """
+    Ajusta o escore de risco (risco.py) sobre os estados por competência
+    e grava o ranking completo em `saida` (CSV) e o modelo ao lado
+    (.pkl), para consultas de faturas novas. Com o armazém, os meses vêm
+    do disco; sem ele, de `meses` (estados_por_competencia) ou da
+    entrada lida de novo, agregada por competência.
+    """
+    from risco import EscoreRisco
+
+    _linha("=")
+    print("  Escore de risco de inadimplência...")
+    print("=" * 60)
+
+    with etapa("risco"):
+        if dir_armazem is not None:
+            escore = EscoreRisco.de_armazem(dir_armazem)
+        else:
+            if meses is None:
+                meses = estados_por_competencia(caminho, processos_carga, validar)
+            escore = EscoreRisco.de_estados(meses)
+        escore.ajustar()
+        ranking = escore.ranking()
+
+    m = escore.metricas
+    print(f"\n  Alvo: atraso em {m['competencia_alvo']} "
+          f"({m['taxa_alvo']:.1%} dos {m['treino'] + m['teste']} clientes recorrentes)")
+    print(f"  AUC (teste, {m['teste']} clientes): {m['auc_teste']:.3f}")
+    print(f"\n  Pesos por desvio-padrão:\n{escore.modelo.coeficientes().round(3).to_string()}")
+    print(f"\n  Maior risco:\n{ranking.head(n_topo).to_string(index=False)}")
+
+    saida = Path(saida)
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    ranking.to_csv(saida, sep=";", index=False, decimal=",")
+    escore.salvar(saida.with_suffix(".pkl"))
+    print(f"\n  Ranking: {saida} ({len(ranking)} clientes); modelo: {saida.with_suffix('.pkl')}")
+    return escore
+
+
+# ══════════════════════════════════════════════════════════
+# ROLAGEM DE STATUS ENTRE COMPETÊNCIAS
+# ══════════════════════════════════════════════════════════
+def gerar_rolagem(caminho, saida=None, dir_armazem=None, processos_carga=None,
+                  validar=True, meses=None):
+    """
+    Matrizes de transição de status entre competências consecutivas e
+    sequências de atraso por cliente (rolagem.py). Os meses vêm como no
+    escore de risco; com `saida`, grava as sequências por cliente (CSV).
+    """
+    from rolagem import RolagemClientes
+
+    _linha("=")
+    print("  Rolagem de status entre competências...")
+    print("=" * 60)
+
+    with etapa("rolagem"):
+        if dir_armazem is not None:
+            rolagem = RolagemClientes.de_armazem(dir_armazem)
+        else:
+            if meses is None:
+                meses = estados_por_competencia(caminho, processos_carga, validar)
+            rolagem = RolagemClientes.de_estados(meses)
+        matriz = rolagem.matriz()
+
+    print(f"\n  Competências: {rolagem.competencias} "
+          f"({len(rolagem.transicoes)} transições mês a mês)")
+    print(f"\n  Clientes por status (mês anterior → mês seguinte):\n{matriz.to_string()}")
+    print(f"\n  Rolagem (% da linha):\n{rolagem.taxas().round(1).to_string()}")
+    print(f"\n  Por competência (%):\n{rolagem.taxas_por_mes().round(1).to_string()}")
+    dist = rolagem.distribuicao_sequencias()
+    print(f"\n  Clientes por maior sequência de meses em atraso:\n{dist.to_string()}")
+
+    if saida is not None:
+        saida = Path(saida)
+        saida.parent.mkdir(parents=True, exist_ok=True)
+        sequencias = rolagem.sequencias()
+        sequencias.to_csv(saida, sep=";", index=False)
+        print(f"\n  Sequências por cliente: {saida} ({len(sequencias)} clientes)")
+    return rolagem
+
+
+# ══════════════════════════════════════════════════════════
+# AGING DAS FATURAS EM ABERTO
+# ══════════════════════════════════════════════════════════
+def gerar_aging(caminho, saida=None, datas=None, dir_cache=None, validar=True):
+    """
+    Faixas de dias de atraso das faturas atrasadas e em aberto (aging.py)
+    por competência e tipo de cliente, em cada data de `datas` (padrão: o
+    último vencimento em aberto). A entrada é relida só com as colunas do
+    aging; com `saida`, grava todas as datas em formato longo (CSV).
+    """
+    from aging import COLUNAS, AgingVencimentos
+
+    _linha("=")
+    print("  Aging das faturas em aberto...")
+    print("=" * 60)
+
+    if multiplos_arquivos(caminho):
+        from ingestao import descobrir_arquivos
+        arquivos = descobrir_arquivos(caminho)
+    else:
+        arquivos = [caminho]
+    aging = AgingVencimentos()
+    with etapa("aging"):
+        for arquivo in arquivos:
+            validador = ValidadorFaturas(limite_rejeicao=None) if validar else None
+            if dir_cache is not None:
+                from cache import carregar_blocos
+                fonte = carregar_blocos(arquivo, dir_cache, COLUNAS, relatorio=False,
+                                        validador=validador)
+            else:
+                fonte = (b[COLUNAS] for b in ler_em_blocos(arquivo, relatorio=False,
+                                                           validador=validador))
+            for bloco in fonte:
+                aging.atualizar(bloco)
+        if datas is None:
+            datas = [aging.data_maxima()]
+        aging_datas = aging.snapshots(datas)
+
+    ultima = aging_datas["data_referencia"].max()
+    print(f"\n  Datas de referência: {len(datas)} "
+          f"({pd.Timestamp(min(datas)).date()} a {pd.Timestamp(ultima).date()})")
+    por_faixa = (aging_datas[aging_datas["data_referencia"] == ultima]
+                 .groupby(["tipo_cliente", "faixa"], observed=True)[["faturas", "valor"]].sum())
+    print(f"\n  Em {pd.Timestamp(ultima).date()}, por tipo e faixa de atraso:\n"
+          f"{por_faixa.round(2).to_string()}")
+    print(f"\n  Faturas por competência:\n{aging.resumo(ultima, ['competencia']).to_string()}")
+
+    if saida is not None:
+        saida = Path(saida)
+        saida.parent.mkdir(parents=True, exist_ok=True)
+        aging_datas.to_csv(saida, sep=";", index=False, decimal=",")
+        print(f"\n  Aging: {saida} ({len(aging_datas)} linhas)")
+    return aging
+
+
+def executar(caminho=CAMINHO_BASE, secoes=None, figuras=None, dir_saida=DIR_SAIDA,
+             dir_cache=None, dir_armazem=None, processos=1,
+             processos_fig=PROCESSOS_FIG, motor="pandas", processos_carga=None,
+             validar=True, quarentena=None, limite_rejeicao=LIMITE_REJEICAO,
+             dir_memo=None, aproximado=False, risco=None, cubo=None, rolagem=None,
+             aging=None, datas_referencia=None, por_cliente=True):
+    """
+    Análise completa: carga, seções (None = 1–8; sem as 6 e 7 com
+    `por_cliente=False`, que exige `aproximado`), figuras
+    (None = todas; [] = nenhuma, sem importar matplotlib) e, com
+    `risco` (CSV de saída), o ranking de risco por cliente. Com `cubo`,
+    grava o cubo de KPIs para consultas ad hoc (cubo_kpis.py). Com
+    `rolagem` (CSV das sequências por cliente), a rolagem de status
+    entre competências e a fig8. Com `aging` (CSV), as faixas de atraso
+    das faturas em aberto em cada data de `datas_referencia`.
+    """
+    print("=" * 60)
+    print("  ANÁLISE DE FATURAMENTO")
+    print("=" * 60)
+
+    if secoes is None:
+        secoes = sorted(n for n in SECOES if por_cliente or n not in SECOES_CLIENTES)
+    elif not por_cliente and SECOES_CLIENTES & set(secoes):
+        raise ValueError(f"Seções {sorted(SECOES_CLIENTES & set(secoes))} exigem o "
+                         "estado por cliente (sem --sem-clientes).")
+    com_figuras = figuras is None or len(figuras) > 0
+    # a fig7 sai dos co-momentos do acumulador: a base linha a linha não
+    # fica em memória por causa das figuras (no DuckDB, manter_base só
+    # pede o estado por cliente e a correlação ao banco)
+    analise = carregar(caminho, dir_cache, dir_armazem, processos,
+                       manter_base=com_figuras and motor == "duckdb", motor=motor,
+                       processos_carga=processos_carga, validar=validar,
+                       quarentena=quarentena, limite_rejeicao=limite_rejeicao,
+                       dir_memo=dir_memo, aproximado=aproximado,
+                       por_cliente=por_cliente)
+    secao0(analise)
+    if cubo is not None:
+        from cubo_kpis import CuboKpis
+        with etapa("cubo_kpis"):
+            destino = CuboKpis.de_acumulador(analise.acc).salvar(cubo)
+        print(f"\nCubo de KPIs         : {destino} (consultas: python cubo_kpis.py {destino})")
+    for n in secoes:
+        with etapa(f"secao{n}", linhas=analise.acc.linhas):
+            SECOES[n](analise)
+
+    # risco e rolagem leem os mesmos estados por competência: sem o
+    # armazém, a entrada é relida uma vez só para os dois
+    meses = None
+    if risco is not None and rolagem is not None and dir_armazem is None:
+        meses = estados_por_competencia(caminho, processos_carga, validar)
+    rol = None
+    if rolagem is not None:
+        rol = gerar_rolagem(caminho, rolagem, dir_armazem, processos_carga, validar, meses)
+
+    gerados = []
+    if com_figuras:
+        gerados = gerar_graficos(analise, dir_saida, figuras, processos_fig, rolagem=rol)
+    if risco is not None:
+        gerar_risco(caminho, risco, dir_armazem, processos_carga, validar, meses=meses)
+    if aging is not None:
+        gerar_aging(caminho, aging, datas_referencia, dir_cache, validar)
+
+    _linha("=")
+    print(f"  Análise concluída! {len(gerados)} gráficos gerados.")
+    print("=" * 60)
+    return analise
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Análise de faturamento (seções 1–8 e figuras)")
+    ap.add_argument("entrada", nargs="?", default=str(CAMINHO_BASE),
+                    help="CSV da base, ou diretório/glob com um CSV por região")
+    ap.add_argument("--saida", default=DIR_SAIDA, help="diretório das figuras")
+    ap.add_argument("--secoes", type=int, nargs="*", choices=sorted(SECOES),
+                    help="seções impressas (padrão: todas; vazio: nenhuma)")
+    ap.add_argument("--figuras", nargs="*",
+                    help="ex.: fig1 fig4 (padrão: todas; vazio: nenhuma)")
+    ap.add_argument("--sem-figuras", action="store_true",
+                    help="só os números; não importa matplotlib")
+    ap.add_argument("--dir-cache", help="cache Arrow da base limpa (cache.py)")
+    ap.add_argument("--dir-armazem", help="armazém incremental por competência")
+    ap.add_argument("--dir-memo", help="tabelas derivadas caras em disco (memo.py)")
+    ap.add_argument("--processos", type=int, default=1,
+                    help="> 1: seções 6 e 7 particionadas por cliente")
+    ap.add_argument("--processos-carga", type=int,
+                    help="leitura de vários arquivos em paralelo (padrão: núcleos)")
+    ap.add_argument("--quarentena",
+                    help=f"CSV das linhas reprovadas (padrão: SAIDA/{QUARENTENA})")
+    ap.add_argument("--max-reprovadas", type=float, default=LIMITE_REJEICAO,
+                    help="fração de linhas reprovadas que aborta a carga")
+    ap.add_argument("--sem-validacao", action="store_true",
+                    help="parser tipado direto, sem quarentena")
+    ap.add_argument("--aproximado", action="store_true",
+                    help="clientes únicos e medianas por esboços mescláveis (esbocos.py)")
+    ap.add_argument("--sem-clientes", action="store_true",
+                    help="com --aproximado: sem estado por cliente (memória fixa); "
+                         "clientes únicos pelo HyperLogLog, sem as seções 6 e 7")
+    ap.add_argument("--risco", metavar="CSV",
+                    help="ranking de risco por cliente (risco.py); modelo em CSV.pkl")
+    ap.add_argument("--rolagem", metavar="CSV",
+                    help="rolagem de status entre competências (rolagem.py) e fig8; "
+                         "sequências de atraso por cliente em CSV")
+    ap.add_argument("--aging", metavar="CSV",
+                    help="faixas de dias de atraso das faturas em aberto (aging.py)")
+    ap.add_argument("--datas-referencia", nargs="*", metavar="DATA",
+                    help="datas do aging: AAAA-MM-DD ou INICIO:FIM diário "
+                         "(padrão: último vencimento)")
+    ap.add_argument("--cubo", metavar="ARQ",
+                    help="grava o cubo de KPIs (Arrow) para consultas ad hoc (cubo_kpis.py)")
+    ap.add_argument("--motor", choices=MOTORES, default="pandas",
+                    help="duckdb: agregação fora da memória (CSV, Parquet ou tabela)")
+    ap.add_argument("--processos-fig", type=int, default=PROCESSOS_FIG)
+    ap.add_argument("--metricas", metavar="DIR",
+                    help="instrumenta as etapas e exporta DIR/etapas.{json,csv}")
+    ap.add_argument("--perfil", choices=["cprofile", "tracemalloc"])
+    ap.add_argument("--etapas-perfil", nargs="*")
+    ap.add_argument("--limite", nargs="*", default=[], metavar="ETAPA=SEG",
+                    help="alerta quando a etapa passar de SEG segundos")
+    args = ap.parse_args(argv)
+    if args.figuras and "fig8" in args.figuras and not args.rolagem:
+        ap.error("--figuras fig8 requer --rolagem CSV")     # antes da carga
+    if args.sem_clientes and (not args.aproximado or args.motor != "pandas"):
+        ap.error("--sem-clientes requer --aproximado (motor pandas)")
+
+    warnings.filterwarnings("ignore")
+    datas = None
+    if args.datas_referencia:
+        from aging import datas_referencia
+        datas = datas_referencia(args.datas_referencia)
+    if args.metricas:
+        limites = {e: float(s) for e, s in (item.split("=", 1) for item in args.limite)}
+        ativar(perfil=args.perfil, etapas_perfil=args.etapas_perfil,
+               dir_perfil=args.metricas, limites=limites)
+
+    analise = executar(args.entrada,
+                       secoes=args.secoes,
+                       figuras=[] if args.sem_figuras else args.figuras,
+                       dir_saida=args.saida,
+                       dir_cache=args.dir_cache,
+                       dir_armazem=args.dir_armazem,
+                       processos=args.processos,
+                       processos_carga=args.processos_carga,
+                       validar=not args.sem_validacao,
+                       quarentena=args.quarentena or Path(args.saida) / QUARENTENA,
+                       limite_rejeicao=args.max_reprovadas,
+                       dir_memo=args.dir_memo,
+                       aproximado=args.aproximado,
+                       por_cliente=not args.sem_clientes,
+                       risco=args.risco,
+                       cubo=args.cubo,
+                       rolagem=args.rolagem,
+                       aging=args.aging,
+                       datas_referencia=datas,
+                       processos_fig=args.processos_fig,
+                       motor=args.motor)
+
+    if args.metricas:
+        instr = atual()
+        print()
+        instr.imprimir()
+        memo = analise.acc.memo.resumo()
+        print(f"\n  Tabelas derivadas    : {memo['calculos']} calculadas, "
+              f"{memo['acertos']} reaproveitadas, {memo['do_disco']} lidas do disco")
+        for nome, tempo, limite in instr.lentas():
+            print(f"  ⚠ etapa lenta: {nome} levou {tempo:.2f}s (limite {limite:.2f}s)")
+        caminho_json, _ = instr.exportar(args.metricas)
+        print(f"\n  Métricas por etapa   : {caminho_json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+=============================================================
+  BENCHMARK — groupby().apply(lambda) × AGREGAÇÃO VETORIZADA
+  Compara os caminhos antigos das seções 4, 5, 7 e fig 3c
+  com `is_atrasada` pré-calculado + agg nomeado/crosstab.
+
+  Uso:
+    python benchmarks/bench_vetorizacao.py --linhas 2000000 --clientes 1000000
+=============================================================
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def gerar_base(linhas, clientes, semente=42):
+    """Base sintética mínima com as colunas usadas nas seções comparadas."""
+    rng = np.random.default_rng(semente)
+    ids = np.char.add("C", rng.integers(0, clientes, linhas).astype(str))
+    return pd.DataFrame({
+        "competencia":    rng.choice(["2021-06", "2021-07", "2021-08"], linhas),
+        "id_cliente":     ids,
+        "valor_fatura":   rng.gamma(2.0, 100.0, linhas).round(2),
+        "tipo_cliente":   rng.choice(["PF", "PJ"], linhas, p=[0.95, 0.05]),
+        "status_fatura":  rng.choice(["paga", "atrasada", "em aberto"], linhas,
+                                     p=[0.79, 0.20, 0.01]),
+        "dia_vencimento": rng.integers(1, 29, linhas),
+    })
+
+
+# ── Caminhos antigos (groupby.apply) ──────────────────────
+def resumo_dia_apply(df):
+    return (
+        df.groupby("dia_vencimento")
+          .apply(lambda x: pd.Series({
+              "qtd":       len(x),
+              "atrasadas": (x["status_fatura"] == "atrasada").sum(),
+              "tx_atraso": (x["status_fatura"] == "atrasada").mean() * 100
+          }))
+    )
+
+
+def tend_apply(df):
+    return df.groupby("competencia").apply(lambda x: pd.Series({
+        "total":   len(x),
+        "atrasadas": (x["status_fatura"] == "atrasada").sum(),
+        "tx_atraso": round((x["status_fatura"] == "atrasada").mean() * 100, 1),
+        "valor_atrasado": x.loc[x["status_fatura"] == "atrasada", "valor_fatura"].sum()
+    }))
+
+
+def freq_apply(df):
+    return df.groupby("id_cliente").apply(lambda x: pd.Series({
+        "total_fat":   len(x),
+        "atrasadas":   (x["status_fatura"] == "atrasada").sum(),
+        "tx_atraso":   round((x["status_fatura"] == "atrasada").mean() * 100, 1)
+    }))
+
+
+def atr_tipo_apply(df):
+    return df.groupby("tipo_cliente").apply(
+        lambda x: (x["status_fatura"] == "atrasada").mean() * 100
+    )
+
+
+# ── Caminhos vetorizados ──────────────────────────────────
+def resumo_dia_vetor(df):
+    r = df.groupby("dia_vencimento").agg(
+        qtd=("is_atrasada", "size"), atrasadas=("is_atrasada", "sum"))
+    r["tx_atraso"] = r["atrasadas"] / r["qtd"] * 100
+    return r
+
+
+def tend_vetor(df):
+    t = df.groupby("competencia").agg(
+        total=("is_atrasada", "size"), atrasadas=("is_atrasada", "sum"),
+        valor_atrasado=("valor_atrasado", "sum"))
+    t["tx_atraso"] = (t["atrasadas"] / t["total"] * 100).round(1)
+    return t[["total", "atrasadas", "tx_atraso", "valor_atrasado"]]
+
+
+def freq_vetor(df):
+    f = df.groupby("id_cliente").agg(
+        total_fat=("is_atrasada", "size"), atrasadas=("is_atrasada", "sum"))
+    f["tx_atraso"] = (f["atrasadas"] / f["total_fat"] * 100).round(1)
+    return f
+
+
+def atr_tipo_vetor(df):
+    return pd.crosstab(df["tipo_cliente"], df["status_fatura"],
+                       normalize="index")["atrasada"] * 100
+
+
+def preparar(df):
+    """Colunas auxiliares calculadas uma vez para todos os caminhos vetorizados."""
+    is_atr = (df["status_fatura"] == "atrasada").to_numpy()
+    return df.assign(
+        is_atrasada=is_atr.astype("int64"),
+        valor_atrasado=np.where(is_atr, df["valor_fatura"], 0.0),
+    )
+
+
+CASOS = [
+    ("seção 4 resumo_dia", resumo_dia_apply, resumo_dia_vetor),
+    ("seção 5 tend",       tend_apply,       tend_vetor),
+    ("seção 7 freq",       freq_apply,       freq_vetor),
+    ("fig 3c atr_tipo",    atr_tipo_apply,   atr_tipo_vetor),
+]
+
+
+def cronometrar(func, df):
+    t0 = time.perf_counter()
+    res = func(df)
+    return res, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2].strip())
+    parser.add_argument("--linhas", type=int, default=2_000_000)
+    parser.add_argument("--clientes", type=int, default=1_000_000)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    df = gerar_base(args.linhas, args.clientes, args.semente)
+    print(f"Base sintética: {len(df):,} linhas, "
+          f"{df['id_cliente'].nunique():,} clientes distintos")
+
+    t0 = time.perf_counter()
+    df_vet = preparar(df)
+    t_prep = time.perf_counter() - t0
+    print(f"Pré-cálculo is_atrasada/valor_atrasado: {t_prep:.3f}s\n")
+
+    print(f"{'caso':<20} {'apply (s)':>10} {'vetor (s)':>10} {'speedup':>9}")
+    for nome, antigo, novo in CASOS:
+        r_antigo, t_antigo = cronometrar(antigo, df)
+        r_novo, t_novo     = cronometrar(novo, df_vet)
+        np.testing.assert_allclose(
+            np.asarray(r_antigo, dtype=float),
+            np.asarray(r_novo, dtype=float),
+            rtol=1e-9,
+        )
+        print(f"{nome:<20} {t_antigo:>10.3f} {t_novo:>10.3f} "
+              f"{t_antigo / t_novo:>8.1f}×")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+=============================================================
+  GERADOR DE BASE SINTÉTICA DE FATURAMENTO
+  Mesmo esquema de base_faturamento.csv (separador ";",
+  decimal com vírgula, datas dd/mm/aaaa, id_cliente em
+  base64 de hash), parametrizado por linhas, clientes e
+  competências. Grava em blocos: 10^8 linhas não precisam
+  caber em memória.
+
+  Uso:
+    python benchmarks/gerador.py saida.csv --linhas 1000000 \\
+        --clientes 400000 --meses 3
+=============================================================
+"""
+
+import argparse
+import base64
+import hashlib
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CABECALHO = ("competencia;id_cliente;valor_fatura;tipo_cliente;"
+             "consumo_energia_kwh;status_fatura;data_vencimento\n")
+COMPETENCIA_INICIAL = "2021-06"
+TARIFA_KWH  = 0.82          # valor_fatura ≈ consumo × tarifa
+FRACAO_PJ   = 0.05
+PRIMO       = 2_147_483_647  # permuta os pares (competência, cliente)
+BLOCO       = 1_000_000
+
+
+def _ids_clientes(n):
+    """id_cliente no formato da base real: base64 de um hash de 16 bytes."""
+    return np.array([
+        base64.b64encode(hashlib.md5(str(i).encode()).digest()).decode()
+        for i in range(n)
+    ])
+
+
+def _perfil_clientes(clientes, rng):
+    """Atributos fixos de cada cliente: tipo, dia de vencimento, porte e risco."""
+    pj     = rng.random(clientes) < FRACAO_PJ
+    dia    = rng.choice([5, 10, 11, 15, 18, 20, 22, 25, 27], clientes)
+    porte  = np.where(pj, rng.lognormal(5.5, 0.9, clientes),
+                          rng.lognormal(4.0, 0.7, clientes))
+    risco  = rng.beta(1.2, 4.0, clientes)
+    return pj, dia, porte, risco
+
+
+def gerar_csv(caminho, linhas, clientes, meses=3, semente=42, bloco=BLOCO):
+    """
+    Grava `linhas` faturas de até `clientes` clientes em `meses`
+    competências. Cada par (competência, cliente) aparece no máximo uma
+    vez, como na base real, então `linhas` ≤ clientes × meses.
+    """
+    total_pares = clientes * meses
+    if linhas > total_pares:
+        raise ValueError(
+            f"linhas ({linhas}) > clientes × meses ({total_pares}): "
+            "cada cliente tem no máximo uma fatura por competência."
+        )
+    if np.gcd(PRIMO, total_pares) != 1:
+        raise ValueError("clientes × meses não pode ser múltiplo de 2147483647.")
+
+    rng = np.random.default_rng(semente)
+    ids = _ids_clientes(clientes)
+    pj, dia, porte, risco = _perfil_clientes(clientes, rng)
+
+    inicio = pd.Period(COMPETENCIA_INICIAL, freq="M")
+    comps  = np.array([str(inicio + m) for m in range(meses)])
+    vencs  = [inicio + m + 1 for m in range(meses)]   # vence no mês seguinte
+
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        f.write(CABECALHO)
+        for ini in range(0, linhas, bloco):
+            n = min(bloco, linhas - ini)
+            # permutação de [0, clientes × meses) sem materializá-la
+            par = (np.arange(ini, ini + n, dtype=np.int64) * PRIMO) % total_pares
+            mes, cli = np.divmod(par, clientes)
+
+            consumo = np.maximum(1, rng.poisson(porte[cli])).astype(np.int64)
+            valor   = (consumo * TARIFA_KWH * rng.normal(1.0, 0.03, n)).round(2)
+            sorteio = rng.random(n)
+            status  = np.where(sorteio < risco[cli], "atrasada",
+                      np.where(sorteio < risco[cli] + 0.01, "em aberto", "paga"))
+            datas   = np.array([
+                [f"{d:02d}/{v.month:02d}/{v.year}" for d in range(29)] for v in vencs
+            ])[mes, dia[cli]]
+
+            pd.DataFrame({
+                "competencia":         comps[mes],
+                "id_cliente":          ids[cli],
+                "valor_fatura":        np.char.replace(valor.astype(str), ".", ","),
+                "tipo_cliente":        np.where(pj[cli], "PJ", "PF"),
+                "consumo_energia_kwh": consumo,
+                "status_fatura":       status,
+                "data_vencimento":     datas,
+            }).to_csv(f, sep=";", header=False, index=False)
+    return caminho
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[2].strip())
+    ap.add_argument("saida")
+    ap.add_argument("--linhas",   type=int, default=1_000_000)
+    ap.add_argument("--clientes", type=int, default=None,
+                    help="padrão: linhas / meses (todos os clientes em todo mês)")
+    ap.add_argument("--meses",    type=int, default=3)
+    ap.add_argument("--semente",  type=int, default=42)
+    args = ap.parse_args()
+
+    clientes = args.clientes or -(-args.linhas // args.meses)
+    t0 = time.perf_counter()
+    gerar_csv(args.saida, args.linhas, clientes, args.meses, args.semente)
+    print(f"{args.linhas:,} linhas / {clientes:,} clientes / {args.meses} meses "
+          f"→ {args.saida} ({time.perf_counter() - t0:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+=============================================================
+  SUÍTE DE BENCHMARK — CARGA, SEÇÕES 1–7 E FIGURAS
+  Gera bases sintéticas (gerador.py) em cada tamanho pedido
+  e mede, etapa por etapa, tempo de parede, tempo de CPU e
+  (com --memoria) pico de alocação via tracemalloc. Os
+  resultados vão para benchmarks/resultados/*.json, com a
+  revisão git e as versões das bibliotecas, para comparar
+  execuções entre versões.
+
+  Uso:
+    python benchmarks/suite.py --linhas 1e4 1e5 1e6
+    python benchmarks/suite.py --linhas 1e7 --memoria --sem-figuras
+    python benchmarks/suite.py --comparar antigo.json novo.json
+=============================================================
+"""
+
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import numpy as np
+import pandas as pd
+
+from agregacao import AcumuladorFaturamento
+from carga import TAMANHO_BLOCO, ler_em_blocos
+from gerador import gerar_csv
+from graficos import FIGURAS, entradas_figuras, renderizar_figura
+from validacao import ValidadorFaturas
+
+DIR_RESULTADOS = Path(__file__).resolve().parent / "resultados"
+TOLERANCIA     = 0.10   # regressão: etapa > 10% mais lenta
+
+# o que cada seção do script consulta no acumulador
+SECOES = {
+    "secao1": lambda acc: (acc.status_counts(), acc.valor_por_status(), acc.tendencia()),
+    "secao2": lambda acc: (acc.consumo_por_tipo(), acc.consumo_por_status(),
+                           acc.consumo_por_competencia()),
+    "secao3": lambda acc: (acc.faturamento_por_tipo(), acc.atraso_por_tipo()),
+    "secao4": lambda acc: (acc.volume_por_dia(), acc.resumo_dia(qtd_minima=5)),
+    "secao5": lambda acc: acc.tendencia(),
+    "secao6": lambda acc: acc.vip(10),
+    "secao7": lambda acc: (acc.perfil_atraso(), acc.frequencia_atraso()),
+}
+
+
+def _medir(func, memoria=False):
+    """Executa `func()` e devolve (resultado, métricas)."""
+    if memoria:
+        tracemalloc.start()
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    resultado = func()
+    metricas = {"tempo_s": time.perf_counter() - t0,
+                "cpu_s":   time.process_time() - cpu0}
+    if memoria:
+        metricas["pico_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return resultado, metricas
+
+
+def _rss_mb():
+    # ru_maxrss é em KiB no Linux e em bytes no macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def executar_tamanho(csv, memoria=False, figuras=True, tamanho_bloco=TAMANHO_BLOCO):
+    """Mede todas as etapas sobre um CSV já gerado."""
+    etapas = {}
+    linhas = 0
+
+    def carga():
+        nonlocal linhas
+        acc = AcumuladorFaturamento()
+        for bloco in ler_em_blocos(csv, tamanho_bloco, relatorio=False):
+            acc.atualizar(bloco)
+            linhas += len(bloco)
+        return acc
+
+    acc, etapas["carga"] = _medir(carga, memoria)
+    etapas["carga"]["linhas_s"] = linhas / etapas["carga"]["tempo_s"]
+
+    # mesma leitura passando pelo validador (texto → tipos + quarentena)
+    def carga_validada():
+        validador = ValidadorFaturas()
+        for _ in ler_em_blocos(csv, tamanho_bloco, relatorio=False, validador=validador):
+            pass
+        return validador.linhas
+
+    _, etapas["carga_validada"] = _medir(carga_validada, memoria)
+    etapas["carga_validada"]["linhas_s"] = linhas / etapas["carga_validada"]["tempo_s"]
+
+    # modo aproximado sem estado por cliente: o que um painel precisa em
+    # bases grandes (clientes únicos + medianas por esboços, esbocos.py)
+    def carga_aprox():
+        aprox = AcumuladorFaturamento(por_cliente=False, aproximado=True)
+        for bloco in ler_em_blocos(csv, tamanho_bloco, relatorio=False):
+            aprox.atualizar(bloco)
+        return aprox.clientes_unicos(), aprox.consumo_por_tipo(), aprox.faturamento_por_tipo()
+
+    _, etapas["carga_aprox"] = _medir(carga_aprox, memoria)
+    etapas["carga_aprox"]["linhas_s"] = linhas / etapas["carga_aprox"]["tempo_s"]
+
+    for nome, secao in SECOES.items():
+        _, etapas[nome] = _medir(lambda: secao(acc), memoria)
+
+    if figuras:
+        # todas as figuras, inclusive a correlação da fig7, saem do acumulador
+        entradas = entradas_figuras(acc, acc.resumo_clientes(10))
+        with tempfile.TemporaryDirectory() as dir_saida:
+            for nome in FIGURAS:
+                if nome not in entradas:
+                    etapas[nome] = {"pulada": True}
+                    continue
+                _, etapas[nome] = _medir(
+                    lambda: renderizar_figura(nome, entradas[nome](), dir_saida), memoria)
+    return {"linhas": linhas, "etapas": etapas, "rss_max_mb": _rss_mb()}
+
+
+def _metadados():
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=RAIZ, capture_output=True,
+                                  text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    import matplotlib
+    return {
+        "data":       datetime.now().isoformat(timespec="seconds"),
+        "revisao":    git("rev-parse", "--short", "HEAD"),
+        "alterado":   bool(git("status", "--porcelain", "--untracked-files=no")),
+        "python":     platform.python_version(),
+        "plataforma": platform.platform(),
+        "versoes":    {"numpy": np.__version__, "pandas": pd.__version__,
+                       "matplotlib": matplotlib.__version__},
+    }
+
+
+def comparar(caminho_a, caminho_b, tolerancia=TOLERANCIA):
+    """Razão B/A do tempo de cada etapa; marca as que pioraram além da tolerância."""
+    a = json.loads(Path(caminho_a).read_text(encoding="utf-8"))
+    b = json.loads(Path(caminho_b).read_text(encoding="utf-8"))
+    print(f"A: {a['meta']['revisao']} ({a['meta']['data']})")
+    print(f"B: {b['meta']['revisao']} ({b['meta']['data']})")
+    regressoes = 0
+    for tamanho, res_b in b["resultados"].items():
+        res_a = a["resultados"].get(tamanho)
+        if res_a is None:
+            continue
+        print(f"\n── {int(tamanho):,} linhas ──")
+        for etapa, mb in res_b["etapas"].items():
+            ma = res_a["etapas"].get(etapa, {})
+            if "tempo_s" not in ma or "tempo_s" not in mb:
+                continue
+            razao = mb["tempo_s"] / ma["tempo_s"] if ma["tempo_s"] else float("inf")
+            marca = "  ◀ REGRESSÃO" if razao > 1 + tolerancia else ""
+            regressoes += bool(marca)
+            print(f"  {etapa:<14} {ma['tempo_s']:>9.3f}s → {mb['tempo_s']:>9.3f}s"
+                  f"  ×{razao:.2f}{marca}")
+    return regressoes
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark de análise de faturamento")
+    ap.add_argument("--linhas", type=float, nargs="+", default=[1e4, 1e5, 1e6],
+                    help="tamanhos da base (aceita notação 1e8)")
+    ap.add_argument("--clientes", type=float, default=None,
+                    help="padrão: linhas / meses")
+    ap.add_argument("--meses", type=int, default=3)
+    ap.add_argument("--semente", type=int, default=42)
+    ap.add_argument("--dir-dados", default=None,
+                    help="onde guardar os CSVs gerados (reaproveitados entre execuções)")
+    ap.add_argument("--memoria", action="store_true",
+                    help="pico de alocação por etapa (tracemalloc; deixa tudo mais lento)")
+    ap.add_argument("--sem-figuras", action="store_true")
+    ap.add_argument("--saida", default=None)
+    ap.add_argument("--comparar", nargs=2, metavar=("A", "B"))
+    args = ap.parse_args()
+
+    if args.comparar:
+        sys.exit(1 if comparar(*args.comparar) else 0)
+
+    dir_dados = Path(args.dir_dados or Path(tempfile.gettempdir()) / "bench_faturamento")
+    meta = _metadados()
+    resultados = {}
+    for n in map(int, args.linhas):
+        clientes = int(args.clientes) if args.clientes else -(-n // args.meses)
+        csv = dir_dados / f"base_{n}_{clientes}_{args.meses}_{args.semente}.csv"
+        if not csv.exists():
+            print(f"Gerando {csv.name} ...")
+            gerar_csv(csv, n, clientes, args.meses, args.semente)
+
+        print(f"\n── {n:,} linhas / {clientes:,} clientes ──")
+        res = executar_tamanho(csv, args.memoria, not args.sem_figuras)
+        res["clientes"] = clientes
+        for etapa, m in res["etapas"].items():
+            if m.get("pulada"):
+                print(f"  {etapa:<14} (pulada)")
+                continue
+            pico = f"  pico {m['pico_mb']:8.1f} MB" if "pico_mb" in m else ""
+            print(f"  {etapa:<14} {m['tempo_s']:>9.3f}s  cpu {m['cpu_s']:>9.3f}s{pico}")
+        print(f"  RSS máx.  {res['rss_max_mb']:.0f} MB")
+        resultados[str(n)] = res
+
+    saida = Path(args.saida) if args.saida else (
+        DIR_RESULTADOS / f"{datetime.now():%Y%m%d-%H%M%S}-{meta['revisao'] or 'sem-git'}.json")
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps({"meta": meta, "resultados": resultados}, indent=2,
+                                ensure_ascii=False), encoding="utf-8")
+    print(f"\nResultados: {saida}")
+
+
+if __name__ == "__main__":
+    main()
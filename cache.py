@@ -0,0 +1,150 @@
+"""
+=============================================================
+  CACHE COLUNAR DA BASE LIMPA (ARROW IPC / FEATHER v2)
+  A primeira execução grava os blocos já tipados (inclusive
+  dia_vencimento e mes_vencimento) em um arquivo Arrow sem
+  compressão; as seguintes fazem memory-map desse arquivo e
+  leem só as colunas pedidas, sem parsing de texto.
+=============================================================
+"""
+
+import glob
+import hashlib
+import os
+import re
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+except ImportError:          # cache desativado sem pyarrow
+    pa = None
+
+from carga import TAMANHO_BLOCO, ler_em_blocos
+from instrumentacao import etapa
+
+VERSAO_CACHE = 1   # incrementar quando o esquema limpo mudar
+
+
+def disponivel():
+    return pa is not None
+
+
+def chave_fonte(caminho, conteudo=False, validado=None):
+    """
+    Chave da fonte: caminho absoluto + tamanho + mtime (barato). Com
+    `conteudo=True`, usa o hash BLAKE2 do arquivo inteiro — mais lento,
+    mas imune a cópias que preservam mtime. `validado` (True/False)
+    distingue os blocos gravados com e sem a validação da carga.
+    """
+    caminho = Path(caminho).resolve()
+    h = hashlib.blake2b(digest_size=8)
+    h.update(f"v{VERSAO_CACHE}|{caminho}".encode())
+    if validado is not None:
+        h.update(f"|validado={bool(validado)}".encode())
+    if conteudo:
+        with open(caminho, "rb") as f:
+            for pedaco in iter(lambda: f.read(1 << 20), b""):
+                h.update(pedaco)
+    else:
+        st = caminho.stat()
+        h.update(f"|{st.st_size}|{st.st_mtime_ns}".encode())
+    return h.hexdigest()
+
+
+def _modo(validado):
+    return "v" if validado else "nv"
+
+
+def caminho_cache(caminho, dir_cache, conteudo=False, validado=True):
+    """`<stem>-v-<chave>.arrow` (validado) ou `<stem>-nv-<chave>.arrow`."""
+    chave = chave_fonte(caminho, conteudo, validado)
+    return Path(dir_cache) / f"{Path(caminho).stem}-{_modo(validado)}-{chave}.arrow"
+
+
+def _caches_da_fonte(arquivo):
+    """
+    Caches do mesmo stem e do mesmo modo de `arquivo` — e só deles (não
+    `<stem>-2021-08-...`, nem o cache do outro modo, que continua
+    válido). Os `<stem>-<chave>.arrow` de antes do modo no nome, que
+    não são mais lidos, também entram.
+    """
+    stem, modo, _ = arquivo.stem.rsplit("-", 2)
+    padrao = re.compile(re.escape(stem) + rf"(?:-{modo})?-[0-9a-f]{{16}}\.arrow")
+    return [a for a in arquivo.parent.glob(f"{glob.escape(stem)}-*.arrow")
+            if padrao.fullmatch(a.name)]
+
+
+def ler_blocos_cache(arquivo, colunas=None):
+    """Gera DataFrames a partir dos record batches do arquivo mapeado."""
+    with pa.memory_map(str(arquivo), "r") as fonte:
+        leitor = pa.ipc.open_file(fonte)
+        nomes  = colunas or leitor.schema.names
+        for i in range(leitor.num_record_batches):
+            with etapa("arrow") as span:
+                bloco = leitor.get_batch(i).select(nomes).to_pandas()
+                span.linhas = len(bloco)
+            yield bloco
+
+
+def _gravar_passando(blocos, arquivo):
+    """
+    Repassa os blocos ao consumidor enquanto os grava em `arquivo`. A
+    escrita vai para um temporário renomeado só no final, então uma
+    execução interrompida nunca deixa um cache incompleto.
+    """
+    arquivo.parent.mkdir(parents=True, exist_ok=True)
+    tmp = arquivo.with_suffix(f".tmp{os.getpid()}")
+    escritor = None
+    try:
+        for bloco in blocos:
+            lote = pa.RecordBatch.from_pandas(bloco, preserve_index=False)
+            if escritor is None:
+                escritor = pa.ipc.new_file(str(tmp), lote.schema)
+            escritor.write_batch(lote)
+            yield bloco
+        if escritor is not None:
+            escritor.close()
+            escritor = None
+            # remove caches antigos da mesma fonte antes de publicar o novo
+            for antigo in _caches_da_fonte(arquivo):
+                antigo.unlink(missing_ok=True)
+            os.replace(tmp, arquivo)
+    finally:
+        if escritor is not None:
+            escritor.close()
+        if tmp.exists():
+            tmp.unlink()
+
+
+def carregar_blocos(caminho, dir_cache=None, colunas=None,
+                    tamanho_bloco=TAMANHO_BLOCO, relatorio=True, validador=None):
+    """
+    Blocos da base limpa, vindos do cache quando ele existe para a versão
+    atual da fonte; caso contrário, do CSV (gravando o cache no caminho).
+    Sem `dir_cache` ou sem pyarrow, equivale a `ler_em_blocos`.
+
+    `colunas` restringe a leitura do cache às colunas necessárias; no
+    primeiro carregamento o cache é gravado completo e a projeção é
+    aplicada só aos blocos entregues.
+
+    O `validador` (validacao.py) só atua quando o CSV é lido: o cache
+    guarda os blocos já validados, e a quarentena é a da gravação. Com
+    e sem validação, os caches são distintos (a chave inclui o modo).
+    """
+    if dir_cache is None or not disponivel():
+        blocos = ler_em_blocos(caminho, tamanho_bloco, relatorio, validador)
+        yield from (b[colunas] if colunas else b for b in blocos)
+        return
+
+    arquivo = caminho_cache(caminho, dir_cache, validado=validador is not None)
+    if arquivo.exists():
+        if relatorio:
+            print(f"  Cache colunar        : {arquivo.name} (memory-map)")
+        yield from ler_blocos_cache(arquivo, colunas)
+        return
+
+    blocos = _gravar_passando(ler_em_blocos(caminho, tamanho_bloco, relatorio, validador),
+                              arquivo)
+    yield from (b[colunas] if colunas else b for b in blocos)
+    if relatorio:
+        print(f"  Cache colunar gravado: {arquivo}")
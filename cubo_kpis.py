@@ -0,0 +1,168 @@
+"""
+=============================================================
+  CUBO DE KPIs MATERIALIZADO (CONSULTAS AD HOC)
+  O cubo do acumulador — (competencia, tipo_cliente,
+  status_fatura, dia_vencimento) → faturas, valor, consumo,
+  mais as medidas de atraso já separadas — gravado em um
+  Arrow IPC compacto (dimensões como dicionário, zstd).
+  Qualquer recorte ou roll-up das tabelas das seções sai
+  dele em milissegundos, sem reler a base:
+
+    python cubo_kpis.py cubo.arrow --por competencia tipo_cliente
+    python cubo_kpis.py cubo.arrow --por dia_vencimento \\
+        --filtro tipo_cliente=PJ competencia=2021-08,2021-09
+=============================================================
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:          # cubo indisponível sem pyarrow
+    pa = None
+
+from agregacao import DIMENSOES
+
+# somáveis em qualquer roll-up; as taxas são recalculadas depois da soma
+MEDIDAS = ["qtd", "valor", "consumo", "atrasadas", "valor_atrasado"]
+DERIVADAS = ["tx_atraso", "pct_valor_atraso", "ticket_medio", "consumo_medio"]
+VERSAO_CUBO = 1
+
+
+def _derivar(t):
+    t["tx_atraso"]        = t["atrasadas"] / t["qtd"] * 100
+    t["pct_valor_atraso"] = t["valor_atrasado"] / t["valor"] * 100
+    t["ticket_medio"]     = t["valor"] / t["qtd"]
+    t["consumo_medio"]    = t["consumo"] / t["qtd"]
+    return t
+
+
+class CuboKpis:
+    """
+        cubo = CuboKpis.de_acumulador(acc)       # ou CuboKpis.carregar("cubo.arrow")
+        cubo.salvar("cubo.arrow")
+        cubo.consultar(por=["competencia", "tipo_cliente", "dia_vencimento"])
+        cubo.consultar(filtros={"tipo_cliente": "PJ", "competencia": "2021-08"})
+
+    `consultar` devolve as MEDIDAS somadas por `por` (total geral sem
+    `por`) mais as DERIVADAS: tx_atraso e pct_valor_atraso em %,
+    ticket_medio em R$ e consumo_medio em kWh por fatura.
+    """
+
+    def __init__(self, tabela):
+        faltam = [c for c in DIMENSOES + MEDIDAS if c not in tabela.columns]
+        if faltam:
+            raise ValueError(f"Cubo sem as colunas {faltam}")
+        self.tabela = tabela
+
+    @classmethod
+    def de_acumulador(cls, acc):
+        t = acc.cubo.reset_index()
+        atrasada = (t["status_fatura"] == "atrasada").to_numpy()
+        return cls(pd.DataFrame({
+            "competencia":    t["competencia"].astype("category"),
+            "tipo_cliente":   t["tipo_cliente"],
+            "status_fatura":  t["status_fatura"],
+            "dia_vencimento": t["dia_vencimento"].astype("int8"),
+            "qtd":            t["qtd"].astype("int64"),
+            "valor":          t["valor"].astype("float64"),
+            "consumo":        t["consumo"].astype("int64"),
+            "atrasadas":      np.where(atrasada, t["qtd"], 0).astype("int64"),
+            "valor_atrasado": np.where(atrasada, t["valor"], 0.0),
+        }))
+
+    # ── consultas ─────────────────────────────────────────
+    def _mascara(self, filtros):
+        t = self.tabela
+        mascara = np.ones(len(t), dtype=bool)
+        for dim, valores in (filtros or {}).items():
+            if dim not in DIMENSOES:
+                raise ValueError(f"Dimensão desconhecida: {dim!r} (use uma de {DIMENSOES})")
+            if not isinstance(valores, (list, tuple, set)):
+                valores = [valores]
+            if dim == "dia_vencimento":
+                valores = [int(v) for v in valores]
+            mascara &= t[dim].isin(valores).to_numpy()
+        return mascara
+
+    def consultar(self, por=None, filtros=None):
+        por = [por] if isinstance(por, str) else list(por or [])
+        desconhecidas = [d for d in por if d not in DIMENSOES]
+        if desconhecidas:
+            raise ValueError(f"Dimensões desconhecidas: {desconhecidas} (use {DIMENSOES})")
+        t = self.tabela[self._mascara(filtros)]
+        if por:
+            r = t.groupby(por, observed=True)[MEDIDAS].sum()
+        else:
+            r = t[MEDIDAS].agg(["sum"]).rename(index={"sum": "total"})
+        return _derivar(r)
+
+    # ── persistência ──────────────────────────────────────
+    def salvar(self, caminho):
+        if pa is None:
+            raise ImportError("O cubo de KPIs requer o pacote pyarrow.")
+        caminho = Path(caminho)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        tabela = pa.Table.from_pandas(self.tabela, preserve_index=False)
+        tabela = tabela.replace_schema_metadata({"versao_cubo": str(VERSAO_CUBO)})
+        opcoes = pa.ipc.IpcWriteOptions(compression="zstd")
+        tmp = caminho.with_suffix(f".tmp{os.getpid()}")
+        with pa.ipc.new_file(str(tmp), tabela.schema, options=opcoes) as escritor:
+            escritor.write_table(tabela)
+        os.replace(tmp, caminho)
+        return caminho
+
+    @classmethod
+    def carregar(cls, caminho):
+        if pa is None:
+            raise ImportError("O cubo de KPIs requer o pacote pyarrow.")
+        with pa.memory_map(str(caminho), "r") as fonte:
+            tabela = pa.ipc.open_file(fonte).read_all()
+        versao = (tabela.schema.metadata or {}).get(b"versao_cubo")
+        if versao != str(VERSAO_CUBO).encode():
+            raise ValueError(f"{caminho}: versão de cubo {versao!r}, esperada {VERSAO_CUBO}")
+        return cls(tabela.to_pandas())
+
+
+def _filtros(itens):
+    """["tipo_cliente=PJ", "competencia=2021-08,2021-09"] → {dim: [valores]}."""
+    filtros = {}
+    for item in itens:
+        dim, sep, valores = item.partition("=")
+        if not sep:
+            raise ValueError(f"Filtro sem '=': {item!r} (use DIMENSAO=V1,V2)")
+        filtros[dim] = valores.split(",")
+    return filtros
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Roll-up e recorte do cubo de KPIs")
+    ap.add_argument("cubo", help="arquivo gravado por analise_faturamento.py --cubo")
+    ap.add_argument("--por", nargs="*", default=[], choices=DIMENSOES,
+                    help="dimensões do roll-up (nenhuma: total geral)")
+    ap.add_argument("--filtro", nargs="*", default=[], metavar="DIM=V1,V2",
+                    help="recorte, ex.: tipo_cliente=PJ competencia=2021-08")
+    ap.add_argument("--medidas", nargs="*", choices=MEDIDAS + DERIVADAS,
+                    help="colunas exibidas (padrão: todas)")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    cubo = CuboKpis.carregar(args.cubo)
+    t1 = time.perf_counter()
+    r = cubo.consultar(args.por, _filtros(args.filtro))
+    t2 = time.perf_counter()
+    if args.medidas:
+        r = r[args.medidas]
+    print(r.round(2).to_string())
+    print(f"\n  {len(cubo.tabela)} células; leitura {(t1 - t0) * 1000:.1f} ms, "
+          f"consulta {(t2 - t1) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+=============================================================
+  ESBOÇOS APROXIMADOS (MODO APROXIMADO DO ACUMULADOR)
+  Para bases grandes demais para contagens exatas: clientes
+  únicos por HyperLogLog e quantis (medianas, quartis do
+  boxplot) por histograma de buckets logarítmicos — o
+  esquema do DDSketch. Ambos têm tamanho fixo, são
+  mescláveis entre blocos, processos e competências e têm
+  limite de erro conhecido:
+
+    HyperLogLog(p)   : 2^p registros de 1 byte; erro padrão
+                       1,04/√(2^p) — p=14: 16 KiB, ≈ 0,81%
+    buckets (alfa)   : todo quantil devolvido fica a até
+                       ±alfa (relativo) do valor exato —
+                       alfa=0,5%: ~230 buckets por década
+
+  Os buckets são códigos int64 que preservam a ordem dos
+  valores, então entram como nível comum dos histogramas do
+  acumulador (agregacao.py) — soma, mescla e subtração
+  continuam as mesmas.
+=============================================================
+"""
+
+import numpy as np
+import pandas as pd
+
+ALFA = 0.005          # erro relativo máximo dos quantis
+PRECISAO_HLL = 14     # 2^14 registros
+
+_GAMA = (1 + ALFA) / (1 - ALFA)
+_LOG_GAMA = np.log(_GAMA)
+_DESLOCAMENTO = 1 << 16   # códigos positivos para |x| >= _GAMA ** -65536
+_MISTURA = np.uint64(0x9E3779B97F4A7C15)
+
+
+def codificar(valores):
+    """
+    Valor → código do bucket: 0 para zero; ±(k + deslocamento) para
+    |x| em (γ^(k-1), γ^k]. A ordem dos códigos é a ordem dos valores.
+    """
+    x = np.asarray(valores, dtype="float64")
+    k = np.ceil(np.log(np.abs(x), where=x != 0, out=np.ones_like(x)) / _LOG_GAMA)
+    codigos = np.sign(x).astype("int64") * (k.astype("int64") + _DESLOCAMENTO)
+    if isinstance(valores, pd.Series):
+        return pd.Series(codigos, index=valores.index, name=valores.name)
+    return codigos
+
+
+def decodificar(codigos):
+    """Código → valor representativo do bucket (a ±alfa de todo valor nele)."""
+    c = np.asarray(codigos, dtype="int64")
+    k = np.abs(c) - _DESLOCAMENTO
+    return np.sign(c) * 2 * _GAMA ** k.astype("float64") / (_GAMA + 1)
+
+
+def hash_estavel(valores):
+    """
+    Hash uint64 estável entre processos. Textos ASCII viram bytes de
+    largura fixa misturados 8 a 8 — ~4x mais rápido que hash_array
+    sobre objetos; o resto cai no hash_array.
+    """
+    try:
+        texto = np.asarray(valores, dtype="S")
+    except UnicodeEncodeError:
+        return pd.util.hash_array(np.asarray(valores, dtype=object))
+    largura = max(texto.itemsize, 1)
+    bytes_ = np.zeros((len(texto), -(-largura // 8) * 8), dtype="uint8")
+    bytes_[:, :texto.itemsize] = texto.view("uint8").reshape(len(texto), texto.itemsize)
+    palavras = bytes_.view("<u8")
+    h = np.zeros(len(texto), dtype="uint64")
+    for j in range(palavras.shape[1]):
+        h = (h ^ palavras[:, j]) * _MISTURA
+        h ^= h >> np.uint64(29)
+    return pd.util.hash_array(h)     # finalizador: espalha os bits
+
+
+def _bits(x):
+    """Posição do bit mais alto + 1 (bit_length) de um array uint64 não nulo."""
+    alto  = (x >> np.uint64(32)).astype("float64")
+    baixo = (x & np.uint64(0xFFFFFFFF)).astype("float64")
+    # metades de 32 bits cabem exatas em float64: frexp dá o bit_length
+    return np.where(alto > 0, np.frexp(alto)[1] + 32, np.frexp(baixo)[1])
+
+
+class HyperLogLog:
+    """
+    Contagem distinta aproximada:
+
+        hll = HyperLogLog()
+        hll.atualizar(bloco["id_cliente"])
+        hll.mesclar(outro_hll)      # máximo registro a registro
+        hll.estimativa()            # ± erro_padrao() (relativo)
+
+    Não admite subtração: um estado que precisa descontar um mês deve
+    ser refeito por mescla dos meses restantes.
+    """
+
+    def __init__(self, precisao=PRECISAO_HLL):
+        if not 4 <= precisao <= 18:
+            raise ValueError(f"precisao fora de 4..18: {precisao}")
+        self.precisao  = precisao
+        self.registros = np.zeros(1 << precisao, dtype="uint8")
+
+    def atualizar(self, valores):
+        if len(valores) == 0:
+            return self
+        h = hash_estavel(valores)
+        p = np.uint64(self.precisao)
+        indice = (h >> (np.uint64(64) - p)).astype("intp")
+        # bit-guarda limita o posto a 64 - p + 1 quando o resto é todo zero
+        resto = (h << p) | (np.uint64(1) << (p - np.uint64(1)))
+        posto = (65 - _bits(resto)).astype("uint8")
+        np.maximum.at(self.registros, indice, posto)
+        return self
+
+    def mesclar(self, outro):
+        if outro.precisao != self.precisao:
+            raise ValueError("HyperLogLog de precisões diferentes não se mesclam.")
+        np.maximum(self.registros, outro.registros, out=self.registros)
+        return self
+
+    def estimativa(self):
+        m = len(self.registros)
+        alfa_m = 0.7213 / (1 + 1.079 / m)
+        bruta = alfa_m * m * m / np.ldexp(1.0, -self.registros.astype("int64")).sum()
+        vazios = int((self.registros == 0).sum())
+        if bruta <= 2.5 * m and vazios:
+            return int(round(m * np.log(m / vazios)))   # contagem linear
+        return int(round(bruta))
+
+    def erro_padrao(self):
+        return 1.04 / np.sqrt(len(self.registros))
+
+    # ── persistência ──────────────────────────────────────
+    def estado(self):
+        return {"precisao": self.precisao, "registros": self.registros.copy()}
+
+    @classmethod
+    def de_estado(cls, estado):
+        hll = cls(estado["precisao"])
+        hll.registros[:] = estado["registros"]
+        return hll
@@ -0,0 +1,730 @@
+"""
+=============================================================
+  RENDERIZAÇÃO DAS FIGURAS (fig1–fig8)
+  Cada figura é uma tarefa independente sobre agregados já
+  calculados: pode ser renderizada em paralelo (um processo
+  por figura), escolhida individualmente, ou pulada quando
+  o hash das suas entradas não mudou desde a última vez.
+=============================================================
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import matplotlib.patches as mpatches
+from matplotlib.colors import LinearSegmentedColormap, LogNorm
+from matplotlib.ticker import FuncFormatter
+
+from agregacao import ClientesCodificados, estatisticas_boxplot, grade_densidade
+from instrumentacao import ativar, atual, etapa
+from kpis import PainelKpis
+
+# ── Estilo global ──────────────────────────────────────────
+plt.rcParams.update({
+    "figure.facecolor":  "#0d0f14",
+    "axes.facecolor":    "#161a23",
+    "axes.edgecolor":    "#2a3045",
+    "axes.labelcolor":   "#a0aec0",
+    "axes.titlecolor":   "#e8ecf4",
+    "xtick.color":       "#6b7a99",
+    "ytick.color":       "#6b7a99",
+    "grid.color":        "#2a3045",
+    "text.color":        "#e8ecf4",
+    "font.family":       "monospace",
+    "axes.grid":         True,
+    "grid.alpha":        0.5,
+    "axes.spines.top":   False,
+    "axes.spines.right": False,
+})
+
+AMARELO  = "#f0c040"
+TEAL     = "#4fd1c5"
+VERMELHO = "#f87171"
+VERDE    = "#4ade80"
+ROXO     = "#a78bfa"
+BRANCO   = "#e8ecf4"
+MUTED    = "#6b7a99"
+BG       = "#0d0f14"
+SURFACE  = "#161a23"
+
+reais = FuncFormatter(lambda x, _: f"R${x:,.0f}")
+pct   = FuncFormatter(lambda x, _: f"{x:.0f}%")
+
+MANIFESTO = ".figuras.json"
+
+# acima disso, o painel 5b troca o scatter por cliente pela grade de densidade
+LIMITE_PONTOS = 20_000
+
+
+# ── FIG 1: Visão Geral de Inadimplência ───────────────────
+def fig1(e):
+    fig1, axes = plt.subplots(1, 3, figsize=(16, 5))
+    fig1.patch.set_facecolor(BG)
+    fig1.suptitle("1 · VISÃO GERAL DE INADIMPLÊNCIA", fontsize=13,
+                  fontweight="bold", color=AMARELO, y=1.02)
+
+    # 1a - Pizza de status
+    ax = axes[0]
+    ax.set_facecolor(SURFACE)
+    status_counts = e["status_counts"]
+    sizes  = [status_counts.get("paga",0),
+              status_counts.get("atrasada",0),
+              status_counts.get("em aberto",0)]
+    pct_status = e["pct_status"]
+    labels = [f"Paga\n{pct_status['paga']:.1f}%",
+              f"Atrasada\n{pct_status['atrasada']:.1f}%",
+              f"Em Aberto\n{pct_status['em aberto']:.1f}%"]
+    colors = [VERDE, VERMELHO, TEAL]
+    wedges, texts = ax.pie(sizes, labels=labels, colors=colors,
+                           startangle=90, pctdistance=0.8,
+                           wedgeprops=dict(width=0.55, edgecolor=BG, linewidth=2))
+    for t in texts:
+        t.set_color(BRANCO); t.set_fontsize(9)
+    ax.set_title("Status das Faturas", fontsize=10, color=AMARELO, pad=10)
+    ax.text(0, 0, f"{e['total_faturas']}\nfaturas", ha="center", va="center",
+            fontsize=10, color=BRANCO, fontweight="bold")
+
+    # 1b - Evolução mensal
+    ax = axes[1]
+    tx_mes = e["tx_mes"]
+    meses_label = e["meses"]
+    cores_mes = [{"baixa": VERDE, "media": AMARELO, "alta": VERMELHO}[n]
+                 for n in e["nivel_mes"]]
+    bars = ax.bar(meses_label, tx_mes, color=cores_mes,
+                  width=0.5, edgecolor=BG, linewidth=1.5)
+    for bar, v in zip(bars, tx_mes):
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.3,
+                f"{v:.1f}%", ha="center", va="bottom", fontsize=10,
+                color=BRANCO, fontweight="bold")
+    ax.set_title("Taxa de Atraso por Competência", fontsize=10, color=AMARELO, pad=10)
+    ax.set_ylabel("% Atrasadas", color=MUTED)
+    ax.yaxis.set_major_formatter(pct)
+    ax.set_ylim(0, max(30, max(tx_mes) * 1.25))
+
+    # 1c - Valor atrasado por competência
+    ax = axes[2]
+    val_atr = e["val_atr"]
+    bars = ax.bar(meses_label, val_atr, color=cores_mes,
+                  width=0.5, edgecolor=BG, linewidth=1.5)
+    for bar, v in zip(bars, val_atr):
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 50,
+                f"R${v:,.0f}", ha="center", va="bottom", fontsize=8.5,
+                color=BRANCO, fontweight="bold")
+    ax.set_title("Valor em Atraso por Competência", fontsize=10, color=AMARELO, pad=10)
+    ax.set_ylabel("Valor (R$)", color=MUTED)
+    ax.yaxis.set_major_formatter(reais)
+    return fig1
+
+
+# ── FIG 2: Consumo de Energia ─────────────────────────────
+def fig2(e):
+    fig2, axes = plt.subplots(1, 3, figsize=(16, 5))
+    fig2.patch.set_facecolor(BG)
+    fig2.suptitle("2 · COMPORTAMENTO DE CONSUMO DE ENERGIA", fontsize=13,
+                  fontweight="bold", color=AMARELO, y=1.02)
+
+    # 2a - Boxplot consumo por tipo (estatísticas pré-calculadas do histograma)
+    ax = axes[0]
+    bp = ax.bxp(e["box_consumo"],
+                    patch_artist=True,
+                    medianprops=dict(color=BG, linewidth=2),
+                    whiskerprops=dict(color=MUTED),
+                    capprops=dict(color=MUTED),
+                    flierprops=dict(marker="o", color=MUTED, alpha=0.5, markersize=3))
+    bp["boxes"][0].set_facecolor(AMARELO)
+    bp["boxes"][0].set_alpha(0.7)
+    bp["boxes"][1].set_facecolor(TEAL)
+    bp["boxes"][1].set_alpha(0.7)
+    ax.set_title("Distribuição de Consumo por Tipo", fontsize=10, color=AMARELO, pad=10)
+    ax.set_ylabel("kWh", color=MUTED)
+
+    # 2b - Média consumo por status
+    ax = axes[1]
+    cons_status = e["cons_status"].sort_values()
+    cores_status = {
+        "atrasada": VERMELHO, "paga": VERDE, "em aberto": AMARELO
+    }
+    colors_list = [cores_status[s] for s in cons_status.index]
+    bars = ax.barh(cons_status.index, cons_status.values, color=colors_list,
+                   edgecolor=BG, height=0.5)
+    for bar, v in zip(bars, cons_status.values):
+        ax.text(v + 3, bar.get_y() + bar.get_height()/2,
+                f"{v:.0f} kWh", va="center", fontsize=9, color=BRANCO)
+    ax.set_title("Consumo Médio por Status", fontsize=10, color=AMARELO, pad=10)
+    ax.set_xlabel("kWh médio", color=MUTED)
+
+    # 2c - Histograma do consumo geral (contagens por kWh, já agregadas)
+    ax = axes[2]
+    hist = e["hist_consumo"]
+    ax.hist(hist.index, bins=30, weights=hist.values, color=TEAL, alpha=0.7,
+            edgecolor=BG, linewidth=0.5)
+    ax.axvline(e["mediana_consumo"], color=AMARELO,
+               linewidth=1.5, linestyle="--", label=f"Mediana: {e['mediana_consumo']:.0f}")
+    ax.axvline(e["media_consumo"], color=VERMELHO,
+               linewidth=1.5, linestyle="--", label=f"Média: {e['media_consumo']:.0f}")
+    ax.set_title("Distribuição de Consumo (todos)", fontsize=10, color=AMARELO, pad=10)
+    ax.set_xlabel("kWh", color=MUTED)
+    ax.set_ylabel("Frequência", color=MUTED)
+    ax.legend(fontsize=8, facecolor=SURFACE, edgecolor=MUTED)
+    return fig2
+
+
+# ── FIG 3: Faturamento por Tipo de Cliente ────────────────
+def fig3(e):
+    fig3, axes = plt.subplots(1, 3, figsize=(16, 5))
+    fig3.patch.set_facecolor(BG)
+    fig3.suptitle("3 · FATURAMENTO POR TIPO DE CLIENTE", fontsize=13,
+                  fontweight="bold", color=AMARELO, y=1.02)
+
+    # 3a - Receita total
+    ax = axes[0]
+    receita = e["receita"]
+    bars = ax.bar(receita.index, receita.values,
+                  color=[AMARELO, TEAL], width=0.4, edgecolor=BG, linewidth=1.5)
+    for bar, v in zip(bars, receita.values):
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 500,
+                f"R${v:,.0f}", ha="center", fontsize=9, color=BRANCO, fontweight="bold")
+    ax.set_title("Receita Total por Tipo", fontsize=10, color=AMARELO, pad=10)
+    ax.yaxis.set_major_formatter(reais)
+
+    # 3b - Ticket médio
+    ax = axes[1]
+    ticket = e["ticket"]
+    bars = ax.bar(ticket.index, ticket.values,
+                  color=[AMARELO, TEAL], width=0.4, edgecolor=BG, linewidth=1.5)
+    for bar, v in zip(bars, ticket.values):
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 5,
+                f"R${v:.0f}", ha="center", fontsize=9, color=BRANCO, fontweight="bold")
+    ax.set_title("Ticket Médio por Tipo", fontsize=10, color=AMARELO, pad=10)
+    ax.yaxis.set_major_formatter(reais)
+
+    # 3c - Taxa de atraso por tipo
+    ax = axes[2]
+    atr_tipo = e["atr_tipo"]
+    bars = ax.bar(atr_tipo.index, atr_tipo.values,
+                  color=[AMARELO, TEAL], width=0.4, edgecolor=BG, linewidth=1.5)
+    for bar, v in zip(bars, atr_tipo.values):
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.3,
+                f"{v:.1f}%", ha="center", fontsize=9, color=BRANCO, fontweight="bold")
+    ax.set_title("Taxa de Inadimplência por Tipo", fontsize=10, color=AMARELO, pad=10)
+    ax.set_ylabel("% Atrasadas", color=MUTED)
+    ax.yaxis.set_major_formatter(pct)
+    return fig3
+
+
+# ── FIG 4: Análise de Vencimentos ────────────────────────
+def fig4(e):
+    fig4, axes = plt.subplots(1, 2, figsize=(14, 5))
+    fig4.patch.set_facecolor(BG)
+    fig4.suptitle("4 · ANÁLISE DE VENCIMENTOS DAS FATURAS", fontsize=13,
+                  fontweight="bold", color=AMARELO, y=1.02)
+
+    # 4a - Volume por dia de vencimento
+    ax = axes[0]
+    vol_dia = e["vol_dia"]
+    melhores, piores = e["dias_melhores"], e["dias_piores"]
+    cores = [VERMELHO if v in piores else AMARELO if v in melhores else TEAL
+             for v in vol_dia.index]
+    ax.bar(vol_dia.index, vol_dia.values, color=cores, width=0.7,
+           edgecolor=BG, linewidth=0.8)
+    ax.set_title("Volume de Faturas por Dia de Vencimento", fontsize=10,
+                 color=AMARELO, pad=10)
+    ax.set_xlabel("Dia do Mês", color=MUTED)
+    ax.set_ylabel("Qtd. Faturas", color=MUTED)
+    def _dias(ds):
+        return (f"Dia {ds[0]}" if len(ds) == 1
+                else "Dias " + ", ".join(map(str, ds[:-1])) + f" e {ds[-1]}")
+    patch_amarelo = mpatches.Patch(color=AMARELO, label=f"{_dias(melhores)} (melhor)")
+    patch_verm    = mpatches.Patch(color=VERMELHO, label=f"{_dias(piores)} (piores)")
+    patch_teal    = mpatches.Patch(color=TEAL, label="Demais dias")
+    ax.legend(handles=[patch_amarelo, patch_verm, patch_teal],
+              fontsize=8, facecolor=SURFACE, edgecolor=MUTED)
+
+    # 4b - Taxa de atraso por dia (dias com ≥ 5 faturas)
+    ax = axes[1]
+    resumo_d = e["resumo_dia"].reset_index().sort_values("dia_vencimento")
+    tx_atrasada = e["tx_atrasada"]
+    # acima da média geral em vermelho, abaixo em amarelo (só o volume relevante)
+    cores2   = [TEAL if q < e["volume_minimo"] else VERMELHO if tx > tx_atrasada
+                else AMARELO
+                for q, tx in zip(resumo_d["qtd"], resumo_d["tx_atraso"])]
+    ax.scatter(resumo_d["dia_vencimento"], resumo_d["tx_atraso"],
+               s=resumo_d["qtd"] * 2.5, c=cores2, alpha=0.8, edgecolors=BG, linewidth=1)
+    ax.axhline(tx_atrasada, color=VERMELHO, linestyle="--", linewidth=1,
+               label=f"Média geral: {tx_atrasada:.1f}%")
+    for _, row in resumo_d.iterrows():
+        if row["qtd"] >= e["volume_minimo"]:
+            ax.annotate(f"Dia {int(row['dia_vencimento'])}\n{row['tx_atraso']:.0f}%",
+                        (row["dia_vencimento"], row["tx_atraso"]),
+                        xytext=(5, 5), textcoords="offset points",
+                        fontsize=7.5, color=BRANCO)
+    ax.set_title("Taxa de Atraso por Dia de Vencimento\n(tamanho = volume)", fontsize=10,
+                 color=AMARELO, pad=10)
+    ax.set_xlabel("Dia do Mês", color=MUTED)
+    ax.set_ylabel("% Atrasadas", color=MUTED)
+    ax.yaxis.set_major_formatter(pct)
+    ax.legend(fontsize=8, facecolor=SURFACE, edgecolor=MUTED)
+    return fig4
+
+
+# ── FIG 5: Clientes VIP ───────────────────────────────────
+def fig5(e):
+    fig5, axes = plt.subplots(1, 2, figsize=(14, 6))
+    fig5.patch.set_facecolor(BG)
+    fig5.suptitle("6 · CLIENTES VIP — TOP 10 POR VALOR FATURADO", fontsize=13,
+                  fontweight="bold", color=AMARELO, y=1.02)
+
+    # 5a - Barras horizontais
+    ax = axes[0]
+    vip = e["vip"]
+    vip_sorted = vip.sort_values("total_faturado")
+    cores_vip  = [VERMELHO if r else VERDE for r in vip_sorted["inadimplente"]]
+    bars = ax.barh(vip_sorted["id_curto"], vip_sorted["total_faturado"],
+                   color=cores_vip, edgecolor=BG, height=0.6)
+    for bar, v in zip(bars, vip_sorted["total_faturado"]):
+        ax.text(v + 20, bar.get_y() + bar.get_height()/2,
+                f"R${v:,.0f}", va="center", fontsize=8, color=BRANCO)
+    ax.set_title("Valor Total Faturado", fontsize=10, color=AMARELO, pad=10)
+    ax.xaxis.set_major_formatter(reais)
+    p_verm = mpatches.Patch(color=VERMELHO, label="Com atraso")
+    p_verd = mpatches.Patch(color=VERDE, label="Sem atraso")
+    ax.legend(handles=[p_verm, p_verd], fontsize=8,
+              facecolor=SURFACE, edgecolor=MUTED)
+
+    # 5b - Consumo vs faturamento: um ponto por cliente, ou grade de
+    # densidade (contagens 2D) quando a base tem clientes demais
+    ax = axes[1]
+    if "grade" in e:
+        g = e["grade"]
+        cmap = LinearSegmentedColormap.from_list("densidade", [SURFACE, TEAL, AMARELO])
+        malha = ax.pcolormesh(g["x_bordas"], g["y_bordas"],
+                              np.ma.masked_equal(g["contagens"], 0),
+                              cmap=cmap, norm=LogNorm(), shading="flat")
+        cbar = plt.colorbar(malha, ax=ax, shrink=0.8)
+        cbar.set_label("Nº de clientes", color=MUTED)
+        subtitulo = "densidade de clientes"
+    else:
+        vip_all = e["vip_all"]
+        pf_d = vip_all[vip_all["tipo_cliente"] == "PF"]
+        pj_d = vip_all[vip_all["tipo_cliente"] == "PJ"]
+        ax.scatter(pf_d["consumo"], pf_d["total"], c=AMARELO, alpha=0.5, s=20,
+                   edgecolors="none", label="PF")
+        ax.scatter(pj_d["consumo"], pj_d["total"], c=TEAL, alpha=0.7, s=40,
+                   edgecolors="none", label="PJ")
+        subtitulo = "vermelho = TOP 10 VIP"
+    # destaque top 10: a própria tabela VIP já traz consumo e total
+    ax.scatter(vip["consumo_total"], vip["total_faturado"], label="TOP 10 VIP",
+               c=VERMELHO, s=80, zorder=5, edgecolors=BRANCO, linewidth=0.8)
+    ax.set_title(f"Consumo Total vs Valor Faturado\n({subtitulo})", fontsize=10,
+                 color=AMARELO, pad=10)
+    ax.set_xlabel("Consumo Total (kWh)", color=MUTED)
+    ax.set_ylabel("Valor Total (R$)", color=MUTED)
+    ax.xaxis.set_major_formatter(FuncFormatter(lambda x,_: f"{x:,.0f}"))
+    ax.yaxis.set_major_formatter(reais)
+    ax.legend(fontsize=8, facecolor=SURFACE, edgecolor=MUTED)
+    return fig5
+
+
+# ── FIG 6: Frequência de Atraso por Cliente ───────────────
+def fig6(e):
+    fig6, axes = plt.subplots(1, 3, figsize=(16, 5))
+    fig6.patch.set_facecolor(BG)
+    fig6.suptitle("7 · FREQUÊNCIA DE ATRASO POR CLIENTE", fontsize=13,
+                  fontweight="bold", color=AMARELO, y=1.02)
+
+    perfil     = e["perfil"]
+    com_atraso = perfil[perfil["atrasadas"] > 0]
+    sem_atraso = perfil.loc[perfil["atrasadas"] == 0, "clientes"].sum()
+    c_100      = perfil.loc[perfil["tx_atraso"] == 100, "clientes"].sum()
+    c_parcial  = com_atraso.loc[com_atraso["tx_atraso"] < 100, "clientes"].sum()
+
+    # 6a - Distribuição de clientes por qtd de atrasos
+    ax = axes[0]
+    dist = perfil.groupby("atrasadas")["clientes"].sum()
+    cores_dist = [VERDE if k == 0 else AMARELO if k == 1 else VERMELHO for k in dist.index]
+    bars = ax.bar([str(int(k)) for k in dist.index], dist.values,
+                  color=cores_dist, edgecolor=BG, linewidth=1.5, width=0.5)
+    for bar, v in zip(bars, dist.values):
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 2,
+                str(v), ha="center", fontsize=10, color=BRANCO, fontweight="bold")
+    ax.set_title("Clientes por Nº de Atrasos", fontsize=10, color=AMARELO, pad=10)
+    ax.set_xlabel("Qtd. de Atrasos", color=MUTED)
+    ax.set_ylabel("Nº de Clientes", color=MUTED)
+
+    # 6b - Histograma taxa de atraso (só quem atrasa)
+    ax = axes[1]
+    # histograma ponderado pelo perfil: mesmo resultado do histograma por cliente
+    ax.hist(com_atraso["tx_atraso"], bins=10, weights=com_atraso["clientes"],
+            color=VERMELHO, alpha=0.75, edgecolor=BG, linewidth=0.8)
+    media_tx = np.average(com_atraso["tx_atraso"], weights=com_atraso["clientes"])
+    ax.set_title("Taxa de Atraso — Clientes com ≥ 1 Atraso", fontsize=10,
+                 color=AMARELO, pad=10)
+    ax.set_xlabel("% de Faturas Atrasadas", color=MUTED)
+    ax.set_ylabel("Nº de Clientes", color=MUTED)
+    ax.axvline(media_tx, color=AMARELO, linestyle="--", linewidth=1.5,
+               label=f"Média: {media_tx:.0f}%")
+    ax.legend(fontsize=8, facecolor=SURFACE, edgecolor=MUTED)
+
+    # 6c - Pizza: perfil de adimplência
+    ax = axes[2]
+    sizes_p = [sem_atraso, c_parcial, c_100]
+    labels_p = [f"Sem atraso\n{sem_atraso}", f"Atraso parcial\n{c_parcial}", f"100% inadimp.\n{c_100}"]
+    wedges2, texts2 = ax.pie(sizes_p, labels=labels_p,
+                              colors=[VERDE, AMARELO, VERMELHO],
+                              startangle=90,
+                              wedgeprops=dict(width=0.55, edgecolor=BG, linewidth=2))
+    for t in texts2:
+        t.set_color(BRANCO); t.set_fontsize(9)
+    ax.set_title("Perfil de Adimplência dos Clientes", fontsize=10, color=AMARELO, pad=10)
+    ax.text(0, 0, f"{e['n_clientes']}\nclientes", ha="center", va="center",
+            fontsize=9, color=BRANCO, fontweight="bold")
+    return fig6
+
+
+# ── FIG 7: Heatmap correlação e resumo final ──────────────
+def fig7(e):
+    import seaborn as sns
+
+    fig7, axes = plt.subplots(1, 2, figsize=(14, 5))
+    fig7.patch.set_facecolor(BG)
+    fig7.suptitle("8 · CORRELAÇÕES E PAINEL DE RISCO", fontsize=13,
+                  fontweight="bold", color=AMARELO, y=1.02)
+
+    # 7a - Heatmap
+    ax = axes[0]
+    sns.heatmap(e["corr"], ax=ax, cmap="YlOrRd", annot=True, fmt=".2f",
+                linewidths=0.5, linecolor=BG,
+                cbar_kws={"shrink": 0.8},
+                annot_kws={"size": 9},
+                xticklabels=["Valor","Consumo","Dia Venc.","Inadimp.","É PJ"],
+                yticklabels=["Valor","Consumo","Dia Venc.","Inadimp.","É PJ"])
+    ax.set_title("Matriz de Correlação", fontsize=10, color=AMARELO, pad=10)
+    ax.tick_params(colors=BRANCO)
+
+    # 7b - Resumo de KPIs como tabela visual
+    ax = axes[1]
+    ax.axis("off")
+    kpis = e["kpis"]
+    tbl = ax.table(cellText=kpis[1:], colLabels=kpis[0],
+                   loc="center", cellLoc="left")
+    tbl.auto_set_font_size(False)
+    tbl.set_fontsize(8.5)
+    tbl.scale(1.3, 1.55)
+    for (r, c), cell in tbl.get_celld().items():
+        cell.set_edgecolor(MUTED)
+        if r == 0:
+            cell.set_facecolor(AMARELO)
+            cell.set_text_props(color=BG, fontweight="bold")
+        elif "⚠" in cell.get_text().get_text():
+            cell.set_facecolor("#3d1a1a")
+            cell.set_text_props(color=VERMELHO)
+        elif "✔" in cell.get_text().get_text():
+            cell.set_facecolor("#0f2d1f")
+            cell.set_text_props(color=VERDE)
+        else:
+            cell.set_facecolor(SURFACE)
+            cell.set_text_props(color=BRANCO)
+    ax.set_title("Painel de KPIs — Resumo Executivo", fontsize=10,
+                 color=AMARELO, pad=10, y=0.98)
+    return fig7
+
+
+# ── FIG 8: Rolagem de status entre competências ──────────
+def fig8(e):
+    import seaborn as sns
+
+    fig8, axes = plt.subplots(1, 3, figsize=(16, 5))
+    fig8.patch.set_facecolor(BG)
+    fig8.suptitle("9 · ROLAGEM DE STATUS ENTRE COMPETÊNCIAS", fontsize=13,
+                  fontweight="bold", color=AMARELO, y=1.02)
+
+    # 8a - Matriz de rolagem (% da linha)
+    ax = axes[0]
+    taxas = e["taxas"][["paga", "em aberto", "atrasada", "sem fatura"]]
+    cmap = LinearSegmentedColormap.from_list("rolagem", [SURFACE, AMARELO, VERMELHO])
+    sns.heatmap(taxas, ax=ax, cmap=cmap, vmin=0, vmax=100,
+                annot=taxas.map(lambda v: f"{v:.1f}%"), fmt="",
+                linewidths=0.5, linecolor=BG,
+                cbar_kws={"shrink": 0.8, "format": pct},
+                annot_kws={"size": 9},
+                xticklabels=["Paga", "Em Aberto", "Atrasada", "Sem Fatura"],
+                yticklabels=["Paga", "Em Aberto", "Atrasada"])
+    ax.set_title(f"Rolagem — Mês Anterior → Seguinte\n({e['transicoes']} transições)",
+                 fontsize=10, color=AMARELO, pad=10)
+    ax.set_xlabel("Status no mês seguinte", color=MUTED)
+    ax.set_ylabel("Status no mês anterior", color=MUTED)
+    ax.tick_params(colors=BRANCO)
+
+    # 8b - Principais transições por competência
+    ax = axes[1]
+    por_mes = e["por_mes"]
+    for (nome, serie), cor in zip(por_mes.items(), [VERMELHO, AMARELO, VERDE]):
+        ax.plot(por_mes.index, serie.values, color=cor, marker="o", linewidth=2,
+                markersize=6, label=nome)
+        ax.annotate(f"{serie.values[-1]:.1f}%", (len(serie) - 1, serie.values[-1]),
+                    xytext=(6, 0), textcoords="offset points", va="center",
+                    fontsize=8.5, color=cor, fontweight="bold")
+    ax.set_title("Rolagem por Competência", fontsize=10, color=AMARELO, pad=10)
+    ax.set_ylabel("% dos clientes no status de origem", color=MUTED)
+    ax.yaxis.set_major_formatter(pct)
+    ax.set_ylim(0, max(50, por_mes.max().max() * 1.25))
+    ax.legend(fontsize=8, facecolor=SURFACE, edgecolor=MUTED)
+
+    # 8c - Clientes por maior sequência de meses em atraso
+    ax = axes[2]
+    dist = e["sequencias"]
+    cores = [AMARELO if k == 1 else VERMELHO for k in dist.index]
+    bars = ax.bar([str(k) for k in dist.index], dist.values, color=cores,
+                  edgecolor=BG, linewidth=1.5, width=0.5)
+    for bar, v in zip(bars, dist.values):
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height(),
+                f"{v:,}", ha="center", va="bottom", fontsize=9, color=BRANCO,
+                fontweight="bold")
+    ax.set_title("Maior Sequência de Meses em Atraso", fontsize=10, color=AMARELO, pad=10)
+    ax.set_xlabel("Meses seguidos em atraso", color=MUTED)
+    ax.set_ylabel("Nº de Clientes", color=MUTED)
+    return fig8
+
+
+# nome → (arquivo de saída, função que monta a figura)
+FIGURAS = {
+    "fig1": ("fig1_inadimplencia.png",     fig1),
+    "fig2": ("fig2_consumo.png",           fig2),
+    "fig3": ("fig3_tipo_cliente.png",      fig3),
+    "fig4": ("fig4_vencimentos.png",       fig4),
+    "fig5": ("fig5_vip.png",               fig5),
+    "fig6": ("fig6_frequencia_atraso.png", fig6),
+    "fig7": ("fig7_correlacao_kpis.png",   fig7),
+    "fig8": ("fig8_rolagem_status.png",    fig8),
+}
+
+# figuras que dependem de uma entrada opcional → o que pedir para tê-las
+REQUISITOS = {
+    "fig5": "o estado por cliente (sem --processos > 1) ou a base linha a linha",
+    "fig6": "o perfil por cliente (sem --sem-clientes)",
+    "fig7": "os co-momentos do acumulador, a correlação (`corr`) ou a base linha a linha",
+    "fig8": "a rolagem de status (--rolagem CSV; `rolagem` em entradas_figuras)",
+}
+
+
+# ── Entradas ──────────────────────────────────────────────
+def entradas_figuras(acc, resumo, df=None, corr=None, painel=None, rolagem=None):
+    """
+    Entradas de cada figura a partir do acumulador (agregacao.py) e do
+    resumo por cliente (seções 6/7). São funções, avaliadas só para as
+    figuras pedidas. A correlação da fig7 vem dos co-momentos do
+    acumulador (momentos.py) ou de `corr` já calculada; `df` (linhas)
+    só entra na fig7 de estados sem co-momentos e, sem estado por
+    cliente no acumulador, na fig5 — sem nenhum deles, a figura fica
+    de fora.
+    Rótulos, cores de destaque e o painel da fig7 vêm de `painel`
+    (kpis.PainelKpis; calculado aqui se não for passado). A fig8 vem
+    de `rolagem` (rolagem.RolagemClientes), quando houver.
+    """
+    if painel is None:
+        painel = PainelKpis(acc, resumo)
+
+    def _vip():
+        vip = resumo.vip.copy()
+        vip["id_curto"] = ["VIP_" + str(i).zfill(2) for i in range(1, len(vip) + 1)]
+        return vip
+
+    def _fig1():
+        tend = acc.tendencia()
+        return {
+            "status_counts": acc.status_counts(),
+            "tx_mes":        painel.tx_mes,
+            "val_atr":       tend["valor_atrasado"].tolist(),
+            "pct_status":    painel.pct_status,
+            "total_faturas": painel.total_faturas,
+            "meses":         painel.meses,
+            "nivel_mes":     painel.nivel_mes,
+        }
+
+    def _fig2():
+        hist = acc.histograma_consumo()
+        return {
+            "box_consumo":     [estatisticas_boxplot(acc.histograma_consumo(tp), tp)
+                                for tp in ["PF", "PJ"]],
+            "cons_status":     acc.consumo_por_status()["media"],
+            "hist_consumo":    hist,
+            "mediana_consumo": estatisticas_boxplot(hist, "")["med"],
+            "media_consumo":   (hist.index.to_numpy() * hist.to_numpy()).sum() / hist.sum(),
+        }
+
+    def _fig3():
+        fat_tipo = acc.faturamento_por_tipo()
+        return {
+            "receita":  fat_tipo["total"],
+            "ticket":   fat_tipo["media"],
+            "atr_tipo": acc.atraso_por_tipo()["tx_atraso"],
+        }
+
+    def _fig4():
+        return {
+            "vol_dia":     acc.volume_por_dia(),
+            "resumo_dia":  acc.resumo_dia(qtd_minima=5),
+            "tx_atrasada":   painel.tx_atrasada,
+            "dias_melhores": painel.dias_melhores,
+            "dias_piores":   painel.dias_piores,
+            "volume_minimo": painel.volume_minimo_dia,
+        }
+
+    def _fig5():
+        # por cliente: do acumulador quando ele guarda esse estado, senão da
+        # base; o painel não mostra ids, então eles ficam como códigos int32
+        clientes = (acc.tabela_clientes() if acc.por_cliente
+                    else ClientesCodificados().atualizar(df).tabela(decodificar=False))
+        if len(clientes) > LIMITE_PONTOS:
+            return {"vip": _vip(), "grade": grade_densidade(clientes["consumo_total"],
+                                                            clientes["total_faturado"])}
+        vip_all = clientes.rename(columns={"total_faturado": "total",
+                                           "consumo_total": "consumo"})
+        return {"vip": _vip(),
+                "vip_all": vip_all[["id_cliente","tipo_cliente","total","consumo"]]}
+
+    def _fig6():
+        return {"perfil": resumo.perfil, "n_clientes": resumo.n_clientes}
+
+    def _fig7():
+        if corr is not None:
+            return {"corr": corr, "kpis": painel.tabela()}
+        if acc.tem_momentos:
+            return {"corr": acc.correlacao(), "kpis": painel.tabela()}
+        df_num = df[["valor_fatura","consumo_energia_kwh","dia_vencimento"]].copy()
+        df_num["inadimplente"] = (df["status_fatura"] == "atrasada").astype(int)
+        df_num["is_pj"]        = (df["tipo_cliente"] == "PJ").astype(int)
+        return {"corr": df_num.corr(), "kpis": painel.tabela()}
+
+    def _fig8():
+        return {"taxas":      rolagem.taxas(),
+                "por_mes":    rolagem.taxas_por_mes(),
+                "sequencias": rolagem.distribuicao_sequencias(),
+                "transicoes": int(rolagem.matriz().to_numpy().sum())}
+
+    entradas = {"fig1": _fig1, "fig2": _fig2, "fig3": _fig3, "fig4": _fig4}
+    if resumo.perfil is not None:
+        entradas["fig6"] = _fig6
+    if acc.por_cliente or df is not None:
+        entradas["fig5"] = _fig5
+    if df is not None or corr is not None or acc.tem_momentos:
+        entradas["fig7"] = _fig7
+    if rolagem is not None:
+        entradas["fig8"] = _fig8
+    return dict(sorted(entradas.items()))
+
+
+# ── Execução ──────────────────────────────────────────────
+def _hash_entrada(nome, entrada):
+    """Hash do conteúdo das entradas + do código de renderização."""
+    h = hashlib.sha256()
+    h.update(Path(__file__).read_bytes())
+    h.update(nome.encode())
+    h.update(pickle.dumps(entrada, protocol=4))
+    return h.hexdigest()
+
+
+def renderizar_figura(nome, entrada, dir_saida):
+    """Tarefa de um worker: monta, salva e fecha uma figura."""
+    arquivo, montar = FIGURAS[nome]
+    with etapa("montar"):
+        fig = montar(entrada)
+        plt.tight_layout()
+    with etapa("savefig"):
+        fig.savefig(Path(dir_saida) / arquivo, dpi=150, bbox_inches="tight",
+                    facecolor=BG)
+    plt.close(fig)
+    return arquivo
+
+
+def _tarefa_figura(nome, entrada, dir_saida, parametros):
+    """Worker do pool: renderiza sob a instrumentação pedida e devolve os spans."""
+    instr = ativar(**parametros)
+    with instr.etapa(nome):
+        arquivo = renderizar_figura(nome, entrada, dir_saida)
+    return arquivo, instr.registros
+
+
+def renderizar(entradas, dir_saida, figuras=None, processos=1, forcar=False):
+    """
+    Renderiza as figuras pedidas a partir de `entradas` ({nome: dict} ou
+    {nome: função sem argumentos que devolve o dict}; as funções só são
+    chamadas para as figuras pedidas).
+
+    figuras   : None = todas as disponíveis em `entradas`; lista vazia = nenhuma.
+    processos : > 1 distribui as figuras em um pool de processos.
+    forcar    : ignora o manifesto de hashes e renderiza tudo de novo.
+
+    Figuras cujo hash de entrada coincide com o do manifesto
+    (`.figuras.json` em `dir_saida`) e cujo arquivo ainda existe são
+    puladas. Retorna a lista de arquivos efetivamente renderizados. Se
+    uma figura falhar, o manifesto é gravado mesmo assim com as que
+    ficaram prontas, e o primeiro erro é relançado.
+    """
+    dir_saida = Path(dir_saida)
+    dir_saida.mkdir(parents=True, exist_ok=True)
+    nomes = [n for n in FIGURAS if n in entradas] if figuras is None else list(figuras)
+    desconhecidas = [n for n in nomes if n not in FIGURAS]
+    if desconhecidas:
+        raise ValueError(f"Figuras desconhecidas: {desconhecidas}")
+    sem_entrada = [n for n in nomes if n not in entradas]
+    if sem_entrada:
+        raise ValueError("Figuras sem entrada nesta execução: " + "; ".join(
+            f"{n} requer {REQUISITOS.get(n, 'sua entrada')}" for n in sem_entrada))
+
+    caminho_manifesto = dir_saida / MANIFESTO
+    manifesto = (json.loads(caminho_manifesto.read_text())
+                 if caminho_manifesto.exists() else {})
+
+    pendentes, hashes = [], {}
+    for nome in nomes:
+        if callable(entradas[nome]):
+            with etapa(f"{nome}.entrada"):
+                entradas[nome] = entradas[nome]()
+        hashes[nome] = _hash_entrada(nome, entradas[nome])
+        arquivo = dir_saida / FIGURAS[nome][0]
+        if not forcar and manifesto.get(nome) == hashes[nome] and arquivo.exists():
+            print(f"  = {arquivo.name} (sem alterações)")
+            continue
+        pendentes.append(nome)
+        manifesto.pop(nome, None)      # só volta quando o novo arquivo estiver salvo
+
+    try:
+        if processos > 1 and len(pendentes) > 1:
+            with ProcessPoolExecutor(max_workers=min(processos, len(pendentes))) as pool:
+                parametros = atual().parametros()
+                futuros = {n: pool.submit(_tarefa_figura, n, entradas[n], dir_saida,
+                                          parametros)
+                           for n in pendentes}
+                erro = None
+                for nome in pendentes:
+                    # as demais figuras do pool seguem: as prontas entram no manifesto
+                    try:
+                        arquivo, registros = futuros[nome].result()
+                    except Exception as e:
+                        erro = erro or e
+                        continue
+                    atual().registrar(registros)
+                    print(f"  ✔ {arquivo}")
+                    manifesto[nome] = hashes[nome]
+                if erro is not None:
+                    raise erro
+        else:
+            for nome in pendentes:
+                with etapa(nome):
+                    arquivo = renderizar_figura(nome, entradas[nome], dir_saida)
+                print(f"  ✔ {arquivo}")
+                manifesto[nome] = hashes[nome]
+    finally:
+        tmp = caminho_manifesto.with_name(f"{MANIFESTO}.tmp{os.getpid()}")
+        tmp.write_text(json.dumps(manifesto, indent=2))
+        os.replace(tmp, caminho_manifesto)
+    return [FIGURAS[n][0] for n in pendentes]
@@ -0,0 +1,230 @@
+"""
+=============================================================
+  ARMAZÉM INCREMENTAL DE AGREGADOS POR COMPETÊNCIA
+  Cada competência (mês) tem seu estado de acumulador gravado
+  em disco, ao lado de um estado global. Ingerir um mês novo
+  ou reapresentar um mês existente só processa as linhas
+  desse mês: global = global − mês antigo + mês novo.
+
+  Layout:
+    <dir>/global.pkl         (cubo, histogramas, co-momentos)
+    <dir>/global_clientes.pkl (estado por cliente, o maior)
+    <dir>/competencias/<competencia>.pkl
+    <dir>/manifesto.json
+    <dir>/pendente.json      (só durante uma publicação)
+
+  Uma confirmação toca vários arquivos, e um mês trocado sem
+  o global correspondente faria a próxima reapresentação
+  descontar um estado que o global nunca somou. Por isso os
+  arquivos novos são gravados primeiro com o sufixo .novo;
+  o diário pendente.json (gravado de uma vez) é o ponto de
+  confirmação; só então os .novo são publicados e o diário
+  apagado. Ao abrir o armazém, um diário que sobrou é
+  concluído, e .novo sem diário são descartados.
+=============================================================
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from agregacao import AcumuladorFaturamento
+
+
+NOVO = ".novo"     # sufixo dos arquivos gravados e ainda não publicados
+
+
+def _gravar_atomico(caminho, objeto):
+    tmp = caminho.with_suffix(f".tmp{os.getpid()}")
+    pd.to_pickle(objeto, tmp)
+    os.replace(tmp, caminho)
+
+
+def _gravar_json_atomico(caminho, objeto):
+    tmp = caminho.with_suffix(f".tmp{os.getpid()}")
+    tmp.write_text(json.dumps(objeto, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, caminho)
+
+
+def _novo(caminho):
+    return caminho.with_name(caminho.name + NOVO)
+
+
+class ArmazemCompetencias:
+    """
+    Uso típico, com a mesma interface do acumulador:
+
+        armazem = ArmazemCompetencias("agregados/")
+        for bloco in ler_em_blocos("faturamento_2021-09.csv"):
+            armazem.atualizar(bloco)
+        armazem.confirmar(substituir=True)   # reapresentação permitida
+        acc = armazem.acumulador()           # KPIs globais atualizados
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = Path(diretorio)
+        (self.diretorio / "competencias").mkdir(parents=True, exist_ok=True)
+        self._pendentes = {}
+        self._recuperar()
+
+    # ── leitura ───────────────────────────────────────────
+    @property
+    def _manifesto_path(self):
+        return self.diretorio / "manifesto.json"
+
+    def manifesto(self):
+        if not self._manifesto_path.exists():
+            return {}
+        return json.loads(self._manifesto_path.read_text(encoding="utf-8"))
+
+    def competencias(self):
+        return sorted(self.manifesto())
+
+    @property
+    def _diario_path(self):
+        return self.diretorio / "pendente.json"
+
+    @property
+    def _global_path(self):
+        return self.diretorio / "global.pkl"
+
+    @property
+    def _clientes_path(self):
+        return self.diretorio / "global_clientes.pkl"
+
+    def _caminho_mes(self, competencia):
+        return self.diretorio / "competencias" / f"{competencia}.pkl"
+
+    def acumulador_mes(self, competencia):
+        return AcumuladorFaturamento.de_estado(pd.read_pickle(self._caminho_mes(competencia)))
+
+    def acumulador(self, por_cliente=True):
+        """
+        Estado global (todas as competências), sem reler os meses. Sem
+        `por_cliente`, só global.pkl é lido: o estado por cliente fica
+        em global_clientes.pkl.
+        """
+        caminho = self._global_path
+        if not caminho.exists():
+            return AcumuladorFaturamento(por_cliente)
+        estado = pd.read_pickle(caminho)
+        if not por_cliente:
+            estado = {**estado, "por_cliente": False, "clientes": None}
+        elif self._clientes_path.exists():
+            # armazéns anteriores guardam os clientes dentro de global.pkl
+            estado = {**estado, "clientes": pd.read_pickle(self._clientes_path)}
+        return AcumuladorFaturamento.de_estado(estado)
+
+    def _gravar_global(self, glob, sufixo=NOVO):
+        """Grava as duas partes do global; devolve os caminhos (sem o sufixo)."""
+        estado = glob.estado()
+        partes = {self._global_path:   {**estado, "clientes": None},
+                  self._clientes_path: estado["clientes"]}
+        for caminho, parte in partes.items():
+            _gravar_atomico(caminho.with_name(caminho.name + sufixo), parte)
+        return list(partes)
+
+    # ── ingestão ──────────────────────────────────────────
+    def atualizar(self, bloco):
+        """Separa o bloco por competência e acumula em estados pendentes."""
+        for comp, parte in bloco.groupby("competencia", sort=False):
+            if comp not in self._pendentes:
+                self._pendentes[comp] = AcumuladorFaturamento()
+            self._pendentes[comp].atualizar(parte)
+        return self
+
+    def incorporar(self, competencia, acc):
+        """Soma aos pendentes um acumulador já agregado de uma competência."""
+        if competencia not in self._pendentes:
+            self._pendentes[competencia] = AcumuladorFaturamento()
+        self._pendentes[competencia].mesclar(acc)
+        return self
+
+    def confirmar(self, substituir=False, fonte=None):
+        """
+        Grava os meses pendentes e atualiza o estado global. Sem
+        `substituir`, uma competência já armazenada é erro — nada é
+        gravado. Com `substituir`, o mês antigo é descontado do global
+        antes de somar o novo (reapresentação).
+        """
+        manifesto = self.manifesto()
+        repetidas = sorted(c for c in self._pendentes if c in manifesto)
+        if repetidas and not substituir:
+            raise ValueError(
+                f"Competência(s) já armazenada(s): {repetidas}. "
+                "Use substituir=True para reapresentar."
+            )
+
+        glob = self.acumulador()
+        publicar = []
+        for comp in sorted(self._pendentes):
+            novo = self._pendentes[comp]
+            if comp in manifesto:
+                glob.subtrair(self.acumulador_mes(comp))
+            glob.mesclar(novo)
+            _gravar_atomico(_novo(self._caminho_mes(comp)), novo.estado())
+            publicar.append(self._caminho_mes(comp))
+            manifesto[comp] = {
+                "linhas":        novo.linhas,
+                "fonte":         str(fonte) if fonte else None,
+                "atualizado_em": datetime.now().isoformat(timespec="seconds"),
+            }
+        publicar += self._gravar_global(glob)
+
+        self._publicar(manifesto, publicar)
+        confirmadas = sorted(self._pendentes)
+        self._pendentes = {}
+        return confirmadas
+
+    def remover(self, competencia):
+        manifesto = self.manifesto()
+        if competencia not in manifesto:
+            raise KeyError(competencia)
+        glob = self.acumulador().subtrair(self.acumulador_mes(competencia))
+        publicar = self._gravar_global(glob)
+        del manifesto[competencia]
+        self._publicar(manifesto, publicar, apagar=[self._caminho_mes(competencia)])
+
+    # ── publicação em duas fases ──────────────────────────
+    def _publicar(self, manifesto, publicar, apagar=()):
+        """
+        Com os .novo de `publicar` já gravados: grava o diário (ponto de
+        confirmação) e o executa. Uma queda depois do diário é concluída
+        na próxima abertura; antes dele, nada publicado mudou.
+        """
+        diario = {"manifesto": manifesto,
+                  "publicar":  [str(c.relative_to(self.diretorio)) for c in publicar],
+                  "apagar":    [str(c.relative_to(self.diretorio)) for c in apagar]}
+        _gravar_json_atomico(self._diario_path, diario)
+        self._executar_diario(diario)
+
+    def _executar_diario(self, diario):
+        # idempotente: pode ser repetido após uma queda no meio
+        for relativo in diario["publicar"]:
+            caminho = self.diretorio / relativo
+            if _novo(caminho).exists():
+                os.replace(_novo(caminho), caminho)
+        for relativo in diario["apagar"]:
+            (self.diretorio / relativo).unlink(missing_ok=True)
+        _gravar_json_atomico(self._manifesto_path, diario["manifesto"])
+        self._diario_path.unlink()
+
+    def _recuperar(self):
+        """Conclui uma publicação interrompida, ou descarta os .novo órfãos."""
+        if self._diario_path.exists():
+            self._executar_diario(json.loads(self._diario_path.read_text(encoding="utf-8")))
+            return
+        for orfao in [_novo(self._global_path), _novo(self._clientes_path),
+                      *(self.diretorio / "competencias").glob(f"*.pkl{NOVO}")]:
+            orfao.unlink(missing_ok=True)
+
+    def reconstruir(self):
+        """Refaz o estado global mesclando todos os meses (O(histórico))."""
+        glob = AcumuladorFaturamento()
+        for comp in self.competencias():
+            glob.mesclar(self.acumulador_mes(comp))
+        self._gravar_global(glob, sufixo="")
+        return glob
@@ -0,0 +1,99 @@
+"""
+=============================================================
+  ÍNDICE DE CLIENTES CODIFICADO (DICIONÁRIO → INT32)
+  id_cliente é um hash base64 de 24 caracteres. Cada id
+  recebe, na primeira vez em que aparece, um código inteiro
+  denso (0, 1, 2, ...); agregados por cliente viram arrays
+  indexados pelo código e o texto só volta na saída final.
+=============================================================
+"""
+
+import numpy as np
+import pandas as pd
+
+MAX_CODIGO = np.iinfo(np.int32).max
+
+
+class IndiceClientes:
+    """
+    Mapeamento id_cliente ↔ código int32, só de inserção: o código de
+    um id nunca muda, então arrays indexados por código continuam
+    válidos à medida que a base cresce.
+
+    Os ids ficam em segmentos de `pd.Index` (hash table própria). Um
+    segmento novo por bloco com ids inéditos, fundido com o anterior
+    quando não for menor que a metade dele: poucos segmentos a
+    consultar, e cada id é re-indexado O(log C) vezes no total.
+
+        indice  = IndiceClientes()
+        codigos = indice.codificar(bloco["id_cliente"])   # int32
+        ids     = indice.decodificar(codigos)
+    """
+
+    def __init__(self, ids=None):
+        self._segmentos = []
+        self._n = 0
+        self._valores = None
+        if ids is not None and len(ids):
+            self._anexar(pd.Index(ids))
+
+    def __len__(self):
+        return self._n
+
+    def _anexar(self, novos):
+        if self._n + len(novos) > MAX_CODIGO:
+            raise OverflowError("Mais clientes do que cabe em códigos int32.")
+        self._segmentos.append(novos)
+        self._n += len(novos)
+        self._valores = None
+        while (len(self._segmentos) > 1
+               and len(self._segmentos[-2]) <= 2 * len(self._segmentos[-1])):
+            ultimo = self._segmentos.pop()
+            self._segmentos[-1] = self._segmentos[-1].append(ultimo)
+
+    def _localizar_unicos(self, unicos):
+        codigos = np.full(len(unicos), -1, dtype=np.int32)
+        base = 0
+        for seg in self._segmentos:
+            faltam = np.flatnonzero(codigos < 0)
+            if not len(faltam):
+                break
+            pos = seg.get_indexer(unicos[faltam])
+            achou = pos >= 0
+            codigos[faltam[achou]] = pos[achou] + base
+            base += len(seg)
+        return codigos
+
+    def localizar(self, ids):
+        """Códigos dos ids; -1 para os que não estão no índice."""
+        locais, unicos = pd.factorize(np.asarray(ids))
+        return self._localizar_unicos(pd.Index(unicos))[locais]
+
+    def codificar(self, ids):
+        """Códigos dos ids, incluindo no índice os inéditos."""
+        locais, unicos = pd.factorize(np.asarray(ids))
+        unicos  = pd.Index(unicos)
+        codigos = self._localizar_unicos(unicos)
+        faltam  = codigos < 0
+        if faltam.any():
+            codigos[faltam] = np.arange(self._n, self._n + faltam.sum(), dtype=np.int32)
+            self._anexar(unicos[faltam])
+        return codigos[locais]
+
+    def valores(self):
+        """Todos os ids, na ordem dos códigos."""
+        if self._valores is None:
+            self._valores = (np.concatenate([s.to_numpy() for s in self._segmentos])
+                             if self._segmentos else np.array([], dtype=object))
+        return self._valores
+
+    def decodificar(self, codigos):
+        return self.valores()[codigos]
+
+    # ── persistência ──────────────────────────────────────
+    def salvar(self, caminho):
+        pd.to_pickle(self.valores(), caminho)
+
+    @classmethod
+    def carregar(cls, caminho):
+        return cls(pd.read_pickle(caminho))
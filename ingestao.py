@@ -0,0 +1,225 @@
+"""
+=============================================================
+  INGESTÃO CONCORRENTE DE VÁRIOS ARQUIVOS (UM POR REGIÃO)
+  A entrada pode ser um diretório de recebimento ou um glob
+  ("entrada/*_2021-08.csv"). Os cabeçalhos são validados
+  antes de qualquer parsing; depois cada arquivo é lido e
+  agregado por um processo do pool, e só o estado mesclável
+  (AcumuladorFaturamento) volta ao processo principal — com
+  as chaves aceitas, para as repetidas entre arquivos —, que
+  o mescla arquivo a arquivo enquanto os seguintes ainda
+  estão sendo lidos. Nenhum DataFrame com a base inteira é
+  montado, a menos que seja pedido.
+=============================================================
+"""
+
+import glob
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from agregacao import AcumuladorFaturamento
+from carga import COLUNAS, TAMANHO_BLOCO, ler_em_blocos
+from instrumentacao import ativar, atual, etapa
+from validacao import ValidadorFaturas
+
+PADRAO = "*.csv"
+SEPARADOR = ";"
+JANELA = 2               # arquivos em andamento (ou prontos, à espera) por processo
+
+# resultado de um arquivo: estados por competência (ou {None: estado}),
+# linhas lidas, base tipada quando pedida, spans medidos no worker,
+# resumo da validação (ValidadorFaturas.resumo(), ou None) e as chaves
+# (competencia, id_cliente) aceitas (ValidadorFaturas.chaves(), ou None)
+Parcial = namedtuple("Parcial", ["arquivo", "linhas", "estados", "base", "registros",
+                                 "qualidade", "chaves"])
+
+
+def multiplos_arquivos(entrada):
+    """True para diretório ou glob — o caminho de um único CSV segue serial."""
+    return Path(entrada).is_dir() or glob.has_magic(str(entrada))
+
+
+def descobrir_arquivos(entrada, padrao=PADRAO):
+    """Arquivos da entrada (diretório + `padrao`, glob ou caminho), ordenados."""
+    entrada = Path(entrada)
+    if entrada.is_dir():
+        arquivos = sorted(entrada.glob(padrao))
+    else:
+        arquivos = sorted(Path(a) for a in glob.glob(str(entrada)))
+    arquivos = [a for a in arquivos if a.is_file()]
+    if not arquivos:
+        raise FileNotFoundError(f"Nenhum arquivo encontrado em {entrada}")
+    return arquivos
+
+
+def ler_cabecalho(arquivo):
+    with open(arquivo, encoding="utf-8-sig") as f:
+        return [c.strip() for c in f.readline().rstrip("\r\n").split(SEPARADOR)]
+
+
+def validar_esquemas(arquivos):
+    """
+    Confere o cabeçalho de todos os arquivos antes de ler qualquer um:
+    todos precisam trazer as colunas do esquema (carga.COLUNAS; extras
+    são ignoradas pela leitura). Levanta ValueError listando cada
+    arquivo divergente.
+    """
+    erros = []
+    for arquivo in arquivos:
+        faltam = [c for c in COLUNAS if c not in ler_cabecalho(arquivo)]
+        if faltam:
+            erros.append(f"  {arquivo}: faltam {faltam}")
+    if erros:
+        raise ValueError("Esquema divergente em "
+                         f"{len(erros)} de {len(arquivos)} arquivo(s):\n" + "\n".join(erros))
+
+
+def quarentena_arquivo(quarentena, arquivo):
+    """Quarentena própria de cada arquivo: workers não disputam o mesmo CSV."""
+    quarentena = Path(quarentena)
+    return quarentena.with_name(f"{quarentena.stem}-{Path(arquivo).stem}{quarentena.suffix}")
+
+
+def _ingerir_arquivo(arquivo, colunas, por_cliente, por_competencia, manter_base,
+                     tamanho_bloco, dir_cache, validacao, aproximado, parametros,
+                     vistas=None):
+    """
+    Tarefa de um worker: lê um arquivo em blocos e devolve só o estado.
+    Com `vistas` (ValidadorFaturas de toda a ingestão), a validação usa
+    o índice de repetidas dele — revalidação no processo principal.
+    """
+    if parametros is not None:
+        ativar(**parametros)
+    validador = None
+    if validacao is not None:
+        quarentena = validacao["quarentena"]
+        validador = ValidadorFaturas(
+            quarentena_arquivo(quarentena, arquivo) if quarentena else None,
+            validacao["limite_rejeicao"])
+        if vistas is not None:
+            validador.herdar(vistas)
+    if dir_cache is not None:
+        from cache import carregar_blocos
+        blocos = carregar_blocos(arquivo, dir_cache, colunas, tamanho_bloco=tamanho_bloco,
+                                 relatorio=False, validador=validador)
+    else:
+        blocos = (b[colunas] for b in ler_em_blocos(arquivo, tamanho_bloco,
+                                                    relatorio=False, validador=validador))
+
+    accs, base, linhas = {}, [], 0
+    for bloco in blocos:
+        if validador is not None and not validador.linhas:
+            # do cache, já validado: as chaves entram no índice mesmo assim
+            validador.registrar(bloco)
+        with etapa("acumulador", linhas=len(bloco)):
+            if por_competencia:
+                for comp, parte in bloco.groupby("competencia", sort=False):
+                    accs.setdefault(comp, AcumuladorFaturamento()).atualizar(parte)
+            else:
+                accs.setdefault(None, AcumuladorFaturamento(por_cliente, aproximado)
+                                ).atualizar(bloco)
+        linhas += len(bloco)
+        if manter_base:
+            base.append(bloco)
+    estados = {comp: acc.estado() for comp, acc in accs.items()}
+    base = pd.concat(base, ignore_index=True) if base else None
+    registros = atual().registros if parametros is not None else []
+    qualidade = chaves = None
+    if validador is not None:
+        qualidade = validador.resumo()
+        chaves = validador.chaves() if vistas is None else None
+    return Parcial(str(arquivo), linhas, estados, base, registros, qualidade, chaves)
+
+
+def _em_janela(executor, arquivos, args, janela):
+    """
+    Resultados na ordem de `arquivos`, com no máximo `janela` tarefas
+    submetidas e ainda não consumidas: um Parcial pronto fica no pool só
+    até a vez dele, e um novo arquivo entra a cada um entregue.
+    """
+    pendentes = deque()
+    arquivos = iter(arquivos)
+    for arquivo in arquivos:
+        pendentes.append(executor.submit(_ingerir_arquivo, arquivo, *args))
+        if len(pendentes) >= janela:
+            break
+    while pendentes:
+        futuro = pendentes.popleft()
+        proximo = next(arquivos, None)
+        if proximo is not None:
+            pendentes.append(executor.submit(_ingerir_arquivo, proximo, *args))
+        yield futuro.result()
+
+
+def ingerir_arquivos(arquivos, colunas=COLUNAS, processos=None, por_cliente=True,
+                     por_competencia=False, manter_base=False,
+                     tamanho_bloco=TAMANHO_BLOCO, dir_cache=None, validacao=None,
+                     aproximado=False, relatorio=True):
+    """
+    Gera um `Parcial` por arquivo, na ordem de `arquivos`, enquanto os
+    demais continuam sendo lidos no pool (`processos` = núcleos por
+    padrão). Consumir na ordem mantém a mescla determinística.
+
+    por_competencia : estados separados por mês (armazém incremental).
+    manter_base     : cada Parcial traz também o DataFrame do arquivo.
+    dir_cache       : cache Arrow por arquivo (cache.py), lido no worker.
+    validacao       : {"quarentena": caminho ou None, "limite_rejeicao": x}
+                      valida cada arquivo no worker (validacao.py), com uma
+                      quarentena por arquivo; None = sem validação.
+                      Repetidas entre arquivos também: cada worker devolve
+                      as chaves aceitas e, se alguma já veio de um arquivo
+                      anterior, o arquivo é revalidado aqui contra elas
+                      (fica a primeira ocorrência, como no CSV único).
+    aproximado      : estados com esboços (esbocos.py) em vez de histogramas
+                      exatos; não vale com `por_competencia`.
+    """
+    arquivos  = [Path(a) for a in arquivos]
+    validar_esquemas(arquivos)
+    processos = min(processos or os.cpu_count() or 1, len(arquivos))
+    instr     = atual()
+    args = (colunas, por_cliente, por_competencia, manter_base, tamanho_bloco, dir_cache,
+            validacao, aproximado)
+
+    # (competencia, id_cliente) aceitos em todos os arquivos já entregues
+    vistas = ValidadorFaturas(None, None) if validacao is not None else None
+
+    t0 = time.perf_counter()
+    linhas = 0
+    if processos == 1:
+        # no próprio processo os spans já caem na instrumentação atual
+        parciais = (_ingerir_arquivo(a, *args, None) for a in arquivos)
+        executor = None
+    else:
+        parametros = instr.parametros() if instr.ativo else None
+        executor = ProcessPoolExecutor(max_workers=processos)
+        parciais = _em_janela(executor, arquivos, (*args, parametros), JANELA * processos)
+    try:
+        for arquivo in arquivos:
+            try:
+                parcial = next(parciais)
+            except Exception as e:
+                raise ValueError(f"Falha ao ingerir {arquivo}: {e}") from e
+            if vistas is not None and vistas.incorporar(parcial.chaves):
+                # repetidas de arquivos anteriores: o estado do worker as
+                # inclui, então o arquivo é relido do CSV e validado contra
+                # todas as chaves já aceitas (quarentena e limite inclusos)
+                instr.registrar(parcial.registros)
+                parcial = _ingerir_arquivo(arquivo, colunas, por_cliente, por_competencia,
+                                           manter_base, tamanho_bloco, None, validacao,
+                                           aproximado, None, vistas)
+            instr.registrar(parcial.registros)
+            linhas += parcial.linhas
+            yield parcial
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    if relatorio:
+        tempo = time.perf_counter() - t0
+        print(f"  Ingestão multi-arquivo: {len(arquivos)} arquivos, {linhas} linhas "
+              f"em {tempo:.2f}s ({processos} processos, {linhas / tempo:,.0f} linhas/s)")
@@ -0,0 +1,238 @@
+"""
+=============================================================
+  INSTRUMENTAÇÃO POR ETAPA (SPANS)
+  Cada etapa nomeada (carga, seções 1–7, cada figura) grava
+  tempo de parede, tempo de CPU, aumento do pico de RSS e
+  linhas processadas. Exporta em JSON/CSV e, opcionalmente,
+  roda cProfile ou tracemalloc nas etapas escolhidas.
+
+  Desativada (padrão), `etapa()` devolve um contexto nulo
+  compartilhado: o custo é uma chamada de função.
+
+    from instrumentacao import ativar, etapa
+    instr = ativar(perfil="cprofile", etapas_perfil={"secao7"})
+    with etapa("secao7", linhas=n):
+        ...
+    instr.exportar("metricas/")
+=============================================================
+"""
+
+import cProfile
+import csv
+import json
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+PERFIS = (None, "cprofile", "tracemalloc")
+CAMPOS = ["nome", "inicio", "tempo_s", "cpu_s", "rss_delta_mb", "linhas",
+          "pico_alocado_mb", "perfil"]
+
+
+def _rss_max_mb():
+    # ru_maxrss é em KiB no Linux e em bytes no macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+class _EtapaNula:
+    """Contexto das etapas com a instrumentação desligada: não faz nada."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, nome, valor):
+        pass
+
+
+_NULA = _EtapaNula()
+
+
+class _Etapa:
+    """Span em andamento. `linhas` pode ser preenchido dentro do bloco."""
+
+    def __init__(self, instr, nome, linhas):
+        self.instr  = instr
+        self.nome   = nome
+        self.linhas = linhas
+        self._perfilador = None
+        self._tracemalloc = False
+
+    def __enter__(self):
+        instr = self.instr
+        instr._pilha.append(self.nome)
+        self.nome = "/".join(instr._pilha)
+        if instr._perfilar(self._folha):
+            if instr.perfil == "cprofile" and not instr._cprofile_ativo:
+                self._perfilador = cProfile.Profile()
+                instr._cprofile_ativo = True
+                self._perfilador.enable()
+            elif instr.perfil == "tracemalloc" and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._tracemalloc = True
+        self._inicio = datetime.now().isoformat(timespec="milliseconds")
+        self._rss0   = _rss_max_mb()
+        self._cpu0   = time.process_time()
+        self._t0     = time.perf_counter()
+        return self
+
+    @property
+    def _folha(self):
+        return self.nome.rsplit("/", 1)[-1]
+
+    def __exit__(self, *exc):
+        tempo = time.perf_counter() - self._t0
+        cpu   = time.process_time() - self._cpu0
+        instr = self.instr
+        registro = {
+            "nome":            self.nome,
+            "inicio":          self._inicio,
+            "tempo_s":         tempo,
+            "cpu_s":           cpu,
+            "rss_delta_mb":    _rss_max_mb() - self._rss0,
+            "linhas":          self.linhas,
+            "pico_alocado_mb": None,
+            "perfil":          None,
+        }
+        if self._perfilador is not None:
+            self._perfilador.disable()
+            instr._cprofile_ativo = False
+            if instr.dir_perfil is not None:
+                arquivo = Path(instr.dir_perfil) / f"{self.nome.replace('/', '.')}.prof"
+                arquivo.parent.mkdir(parents=True, exist_ok=True)
+                self._perfilador.dump_stats(arquivo)
+                registro["perfil"] = str(arquivo)
+        if self._tracemalloc:
+            registro["pico_alocado_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+        instr.registros.append(registro)
+        instr._pilha.pop()
+        return False
+
+
+class Instrumentacao:
+    """
+    Coletor de spans. Etapas aninhadas recebem nomes com caminho
+    ("carga/csv"); o mesmo nome pode aparecer várias vezes (um span por
+    bloco, por exemplo) e `resumo()` soma as ocorrências.
+
+    perfil        : None, "cprofile" (um .prof por etapa em `dir_perfil`)
+                    ou "tracemalloc" (pico de alocação Python por etapa).
+    etapas_perfil : nomes (último componente) das etapas perfiladas;
+                    None = todas. Perfis não se aninham: dentro de uma
+                    etapa perfilada, as internas só são cronometradas.
+    limites       : {nome: segundos} — `lentas()` lista quem estourou.
+    """
+
+    def __init__(self, ativo=True, perfil=None, etapas_perfil=None,
+                 dir_perfil=None, limites=None):
+        if perfil not in PERFIS:
+            raise ValueError(f"perfil deve ser um de {PERFIS}")
+        self.ativo         = ativo
+        self.perfil        = perfil
+        self.etapas_perfil = set(etapas_perfil) if etapas_perfil is not None else None
+        self.dir_perfil    = dir_perfil
+        self.limites       = dict(limites or {})
+        self.registros     = []
+        self._pilha        = []
+        self._cprofile_ativo = False
+
+    def parametros(self):
+        """Configuração (sem registros) para recriar a instrumentação em um worker."""
+        return {"ativo": self.ativo, "perfil": self.perfil,
+                "etapas_perfil": self.etapas_perfil, "dir_perfil": self.dir_perfil}
+
+    def _perfilar(self, nome):
+        return (self.perfil is not None
+                and (self.etapas_perfil is None or nome in self.etapas_perfil))
+
+    def etapa(self, nome, linhas=None):
+        if not self.ativo:
+            return _NULA
+        return _Etapa(self, nome, linhas)
+
+    def registrar(self, registros, prefixo=None):
+        """Incorpora spans medidos em outro processo (ex.: workers de figura)."""
+        for r in registros:
+            r = dict(r)
+            if prefixo or self._pilha:
+                r["nome"] = "/".join([*self._pilha, *([prefixo] if prefixo else []),
+                                      r["nome"]])
+            self.registros.append(r)
+
+    # ── consulta e exportação ─────────────────────────────
+    def resumo(self):
+        """Totais por nome de etapa, na ordem da primeira ocorrência."""
+        tot = {}
+        for r in self.registros:
+            t = tot.setdefault(r["nome"], {"ocorrencias": 0, "tempo_s": 0.0,
+                                           "cpu_s": 0.0, "rss_delta_mb": 0.0,
+                                           "linhas": None})
+            t["ocorrencias"]  += 1
+            t["tempo_s"]      += r["tempo_s"]
+            t["cpu_s"]        += r["cpu_s"]
+            t["rss_delta_mb"] += r["rss_delta_mb"]
+            if r["linhas"] is not None:
+                t["linhas"] = (t["linhas"] or 0) + r["linhas"]
+        return tot
+
+    def lentas(self):
+        """[(nome, tempo_s, limite_s)] das etapas acima do limite configurado."""
+        return [(nome, t["tempo_s"], self.limites[nome.rsplit("/", 1)[-1]])
+                for nome, t in self.resumo().items()
+                if t["tempo_s"] > self.limites.get(nome.rsplit("/", 1)[-1], float("inf"))]
+
+    def imprimir(self):
+        print(f"  {'etapa':<28} {'n':>4} {'parede':>9} {'cpu':>9} {'ΔRSS':>8} {'linhas':>12}")
+        for nome, t in self.resumo().items():
+            linhas = f"{t['linhas']:,}" if t["linhas"] is not None else "-"
+            print(f"  {nome:<28} {t['ocorrencias']:>4} {t['tempo_s']:>8.3f}s "
+                  f"{t['cpu_s']:>8.3f}s {t['rss_delta_mb']:>6.0f}MB {linhas:>12}")
+
+    def exportar(self, diretorio, prefixo="etapas"):
+        """Grava `<prefixo>.json` e `<prefixo>.csv` em `diretorio`."""
+        diretorio = Path(diretorio)
+        diretorio.mkdir(parents=True, exist_ok=True)
+        caminho_json = diretorio / f"{prefixo}.json"
+        caminho_csv  = diretorio / f"{prefixo}.csv"
+        caminho_json.write_text(json.dumps(self.registros, indent=2, ensure_ascii=False),
+                                encoding="utf-8")
+        with open(caminho_csv, "w", newline="", encoding="utf-8") as f:
+            escritor = csv.DictWriter(f, fieldnames=CAMPOS)
+            escritor.writeheader()
+            escritor.writerows(self.registros)
+        return caminho_json, caminho_csv
+
+
+# ── instância do processo ─────────────────────────────────
+_atual = Instrumentacao(ativo=False)
+
+
+def atual():
+    return _atual
+
+
+def ativar(**parametros):
+    """Liga a instrumentação do processo (descarta spans anteriores)."""
+    global _atual
+    _atual = Instrumentacao(**parametros)
+    return _atual
+
+
+def desativar():
+    global _atual
+    _atual = Instrumentacao(ativo=False)
+    return _atual
+
+
+def etapa(nome, linhas=None):
+    """Span na instrumentação do processo; contexto nulo se desligada."""
+    return _atual.etapa(nome, linhas)
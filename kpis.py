@@ -0,0 +1,165 @@
+"""
+=============================================================
+  REGISTRO DE KPIs (PAINEL EXECUTIVO)
+  Todos os números citados em rótulos, legendas e no painel
+  da fig7 saem daqui, calculados uma vez a partir dos
+  agregados (acumulador + resumo por cliente). O status de
+  cada KPI (⚠/✔) vem de limites configuráveis, então o
+  relatório de um mês novo não tem nada para redigitar.
+=============================================================
+"""
+
+from collections import namedtuple
+
+MESES_ABREV = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun",
+               "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
+
+# limites dos status; percentuais em %, variação em pontos percentuais
+LIMITES = {
+    "tx_inadimplencia":   10.0,   # ⚠ ALTO a partir daqui
+    "pct_valor_atraso":   10.0,   # % do faturamento em atraso
+    "pct_clientes_100":   10.0,   # % de clientes 100% inadimplentes
+    "pct_sem_atraso":     75.0,   # ✔ BOM a partir daqui
+    "razao_ticket_pj":     2.0,   # ticket PJ/PF que indica oportunidade
+    "variacao_pp":         1.0,   # |Δ| da taxa no período que conta como tendência
+    "tx_mes_baixa":       15.0,   # cor das competências: verde abaixo disso,
+    "tx_mes_alta":        20.0,   #   vermelho a partir disso, amarelo entre
+    "volume_dia":          0.05,  # fração das faturas p/ um dia entrar no ranking
+    "n_piores_dias":       2,
+}
+
+Kpi = namedtuple("Kpi", ["rotulo", "valor", "texto", "status"])
+
+
+def rotulo_mes(competencia):
+    """'2021-06' → 'Jun/21'."""
+    ano, mes = competencia.split("-")[:2]
+    return f"{MESES_ABREV[int(mes) - 1]}/{ano[-2:]}"
+
+
+def _reais(v):
+    # milhar com ponto, sem centavos: R$ 23.715
+    return "R$ " + f"{v:,.0f}".replace(",", ".")
+
+
+def _sinal(v):
+    return f"+{v:.0f}" if v >= 0 else f"{v:.0f}"
+
+
+class PainelKpis:
+    """
+    KPIs e derivados usados pelas figuras. `kpis` preserva a ordem do
+    painel da fig7; os demais atributos alimentam rótulos e cores:
+
+      total_faturas, n_clientes, tx_atrasada, pct_status
+      meses, tx_mes, nivel_mes ("baixa" | "media" | "alta")
+      dias_melhores, dias_piores, volume_minimo_dia
+    """
+
+    def __init__(self, acc, resumo, limites=None):
+        lim = {**LIMITES, **(limites or {})}
+        self.limites = lim
+
+        status = acc.status_counts()
+        total  = acc.linhas
+        self.total_faturas = int(total)
+        self.n_clientes    = int(resumo.n_clientes)
+        self.pct_status    = {s: status.get(s, 0) / total * 100
+                              for s in ["paga", "atrasada", "em aberto"]}
+        self.tx_atrasada   = self.pct_status["atrasada"]
+
+        valor_total    = acc.valor_total()
+        valor_atrasado = acc.valor_por_status().get("atrasada", 0.0)
+        pct_valor      = valor_atrasado / valor_total * 100 if valor_total else 0.0
+
+        tend = acc.tendencia()
+        self.meses  = [rotulo_mes(c) for c in tend["competencia"]]
+        self.tx_mes = (tend["atrasadas"] / tend["total"] * 100).tolist()
+        self.nivel_mes = ["baixa" if t < lim["tx_mes_baixa"]
+                          else "alta" if t >= lim["tx_mes_alta"] else "media"
+                          for t in self.tx_mes]
+        variacao = tend["tx_atraso"].iloc[-1] - tend["tx_atraso"].iloc[0]
+
+        fat = acc.faturamento_por_tipo()
+        razao_ticket = (fat.loc["PJ", "media"] / fat.loc["PF", "media"]
+                        if {"PF", "PJ"} <= set(fat.index) else float("nan"))
+
+        # ranking de dias só entre os de volume relevante
+        self.volume_minimo_dia = max(1, int(round(lim["volume_dia"] * total)))
+        dias = acc.resumo_dia(qtd_minima=self.volume_minimo_dia)
+        dias = dias.sort_values("tx_atraso", kind="stable")
+        self.dias_melhores = [int(d) for d in dias.index[:1]]
+        self.dias_piores   = [int(d) for d in
+                              dias.index[::-1][:lim["n_piores_dias"]]
+                              if int(d) not in self.dias_melhores]
+
+        # sem perfil por cliente (modo aproximado sem estado por cliente),
+        # os KPIs de clientes ficam indisponíveis ("—")
+        perfil = resumo.perfil
+        n_cli  = max(self.n_clientes, 1)
+        if perfil is not None:
+            c_100      = int(perfil.loc[perfil["tx_atraso"] == 100, "clientes"].sum())
+            sem_atraso = int(perfil.loc[perfil["atrasadas"] == 0, "clientes"].sum())
+            pct_100    = c_100 / n_cli * 100
+            pct_sem    = sem_atraso / n_cli * 100
+
+        def alto(v, chave):
+            return "⚠ ALTO" if v >= lim[chave] else "✔ BOM"
+
+        def dia(d):
+            return f"Dia {d} ({dias.loc[d, 'tx_atraso']:.1f}%)" if d is not None else "—"
+
+        melhor = self.dias_melhores[0] if self.dias_melhores else None
+        pior   = self.dias_piores[0] if self.dias_piores else None
+        if abs(variacao) < lim["variacao_pp"]:
+            tendencia = "— ESTÁVEL"
+        else:
+            tendencia = "⚠ PIORA" if variacao > 0 else "✔ MELHORA"
+
+        self.kpis = {
+            "total_faturas":   Kpi("Total de faturas", total, f"{total}", "—"),
+            "clientes_unicos": Kpi("Clientes únicos", self.n_clientes,
+                                   f"{self.n_clientes}" if perfil is not None
+                                   else f"≈ {self.n_clientes}", "—"),
+            "tx_inadimplencia": Kpi("Taxa de inadimplência", self.tx_atrasada,
+                                    f"{self.tx_atrasada:.1f}%",
+                                    alto(self.tx_atrasada, "tx_inadimplencia")),
+            "valor_atraso":    Kpi("Valor em atraso", valor_atrasado,
+                                   _reais(valor_atrasado),
+                                   alto(pct_valor, "pct_valor_atraso")),
+            "clientes_100":    (Kpi("Clientes 100% inadimp.", c_100,
+                                    f"{c_100} ({pct_100:.1f}%)",
+                                    alto(pct_100, "pct_clientes_100"))
+                                if perfil is not None
+                                else Kpi("Clientes 100% inadimp.", None, "—", "—")),
+            "ticket_pj_pf":    Kpi("Ticket médio PJ vs PF", razao_ticket,
+                                   f"{razao_ticket:.1f}× maior",
+                                   "✔ OPO." if razao_ticket >= lim["razao_ticket_pj"]
+                                   else "—"),
+            "melhor_dia":      Kpi("Melhor dia de vencimento", melhor, dia(melhor),
+                                   "✔ BOM" if melhor is not None else "—"),
+            "pior_dia":        Kpi("Pior dia de vencimento", pior, dia(pior),
+                                   "⚠ RUIM" if pior is not None else "—"),
+            "tendencia":       Kpi("Tendência inadimplência", variacao,
+                                   f"{_sinal(variacao)} p.p. em {len(self.meses)}m",
+                                   tendencia),
+            "sem_atraso":      (Kpi("Clientes sem nenhum atraso", sem_atraso,
+                                    f"{sem_atraso} ({pct_sem:.1f}%)",
+                                    "✔ BOM" if pct_sem >= lim["pct_sem_atraso"]
+                                    else "⚠ BAIXO")
+                                if perfil is not None
+                                else Kpi("Clientes sem nenhum atraso", None, "—", "—")),
+        }
+
+    def __getitem__(self, chave):
+        return self.kpis[chave]
+
+    def tabela(self):
+        """Linhas [rótulo, valor, status] do painel, com cabeçalho."""
+        return ([["Métrica", "Valor", "Status"]]
+                + [[k.rotulo, k.texto, k.status] for k in self.kpis.values()])
+
+    @property
+    def periodo(self):
+        """'Jun→Ago' (primeira → última competência)."""
+        return f"{self.meses[0].split('/')[0]}→{self.meses[-1].split('/')[0]}"
@@ -0,0 +1,143 @@
+"""
+=============================================================
+  TABELAS DERIVADAS MEMOIZADAS
+  Tendência, rollups do cubo, medianas, top-k... cada tabela
+  derivada do acumulador é calculada uma vez por estado e
+  reaproveitada por seções, KPIs e figuras. Cada uma declara
+  de quais tabelas do estado depende ("cubo", "clientes",
+  "hist_consumo", "hist_valor", "momentos"); atualizar,
+  mesclar e subtrair avançam a versão dessas tabelas, e só as
+  derivadas afetadas são recalculadas.
+
+  Com um diretório e uma chave do estado (identidade barata
+  das fontes: caminho+tamanho+mtime dos CSVs, ou o manifesto
+  do armazém incremental), as derivadas caras também vão
+  para o disco e são reaproveitadas pela próxima execução
+  sobre as mesmas fontes.
+
+    class Acumulador:
+        @derivada("cubo")
+        def tendencia(self): ...
+=============================================================
+"""
+
+import functools
+import hashlib
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from instrumentacao import etapa
+
+TABELAS = ("cubo", "clientes", "hist_consumo", "hist_valor", "momentos")
+VERSAO_MEMO = 1   # incrementar quando o cálculo de alguma derivada mudar
+
+_AUSENTE = object()
+
+
+def _congelar(valor):
+    """Argumentos como chave de dicionário (listas viram tuplas)."""
+    if isinstance(valor, (list, tuple)):
+        return tuple(_congelar(v) for v in valor)
+    return valor
+
+
+def derivada(*dependencias, disco=False):
+    """
+    Memoiza um método do dono (que expõe `_memo`) por argumentos e pela
+    versão das tabelas em `dependencias`. O valor devolvido é
+    compartilhado entre as chamadas: quem o recebe não deve alterá-lo.
+
+    disco : a derivada também vai para o diretório do Memo, se houver —
+            para as que varrem o estado por cliente ou os histogramas;
+            as do cubo custam menos que ler um pickle.
+    """
+    desconhecidas = set(dependencias) - set(TABELAS)
+    if desconhecidas:
+        raise ValueError(f"Dependências desconhecidas: {sorted(desconhecidas)}")
+
+    def decorador(metodo):
+        @functools.wraps(metodo)
+        def memoizado(self, *args, **kwargs):
+            return self._memo.obter(self, metodo, dependencias, args, kwargs, disco)
+        return memoizado
+    return decorador
+
+
+def chave_estado(*partes):
+    """Chave curta a partir das identidades das fontes e das opções da carga."""
+    h = hashlib.blake2b(digest_size=8)
+    for parte in partes:
+        h.update(f"{parte}|".encode())
+    return h.hexdigest()
+
+
+class Memo:
+    """
+    Cache das derivadas de um dono (AcumuladorFaturamento). `versoes`
+    conta as alterações de cada tabela do estado; uma derivada guardada
+    vale enquanto as versões das suas dependências não mudarem.
+
+    diretorio, chave : grava/lê as derivadas marcadas `disco=True`
+                (pickle) sob `chave`, que identifica o estado carregado
+                (ver chave_estado). Hashear o estado em si custaria mais
+                que recalcular; sem chave, o cache fica só em memória.
+    """
+
+    def __init__(self, diretorio=None, chave=None):
+        self.diretorio = Path(diretorio) if diretorio is not None else None
+        self.chave     = chave
+        self.versoes   = dict.fromkeys(TABELAS, 0)
+        self.acertos   = 0
+        self.calculos  = 0
+        self.do_disco  = 0
+        self._valores  = {}    # (nome, args, kwargs) → (versões, valor)
+
+    def invalidar(self, *tabelas):
+        """Avança a versão das tabelas alteradas (todas, sem argumentos)."""
+        for tabela in tabelas or TABELAS:
+            self.versoes[tabela] += 1
+
+    def limpar(self):
+        self._valores.clear()
+
+    def obter(self, dono, metodo, dependencias, args, kwargs, disco=False):
+        nome   = metodo.__name__
+        chave  = (nome, _congelar(args), _congelar(tuple(sorted(kwargs.items()))))
+        versao = tuple(self.versoes[d] for d in dependencias)
+        guardado = self._valores.get(chave)
+        if guardado is not None and guardado[0] == versao:
+            self.acertos += 1
+            return guardado[1]
+
+        valor   = _AUSENTE
+        arquivo = None
+        if disco and self.diretorio is not None and self.chave is not None:
+            arquivo = self._arquivo(chave, versao)
+            if arquivo.exists():
+                valor = pd.read_pickle(arquivo)
+                self.do_disco += 1
+        if valor is _AUSENTE:
+            with etapa(f"derivada.{nome}"):
+                valor = metodo(dono, *args, **kwargs)
+            self.calculos += 1
+            if arquivo is not None:
+                arquivo.parent.mkdir(parents=True, exist_ok=True)
+                tmp = arquivo.with_suffix(f".tmp{os.getpid()}")
+                pd.to_pickle(valor, tmp)
+                os.replace(tmp, arquivo)
+        self._valores[chave] = (versao, valor)
+        return valor
+
+    # ── disco ─────────────────────────────────────────────
+    def _arquivo(self, chave, versao):
+        # a versão entra na chave: o estado alterado depois de carregado
+        # (atualizar/mesclar) não reaproveita o que foi gravado antes
+        h = hashlib.blake2b(digest_size=8)
+        h.update(f"v{VERSAO_MEMO}|{self.chave}|{chave!r}|{versao}".encode())
+        return self.diretorio / f"{chave[0]}-{h.hexdigest()}.pkl"
+
+    def resumo(self):
+        return {"acertos": self.acertos, "calculos": self.calculos,
+                "do_disco": self.do_disco}
@@ -0,0 +1,194 @@
+"""
+=============================================================
+  CO-MOMENTOS EM FLUXO (CORRELAÇÃO DA FIG7)
+  Médias e co-momentos centrados das variáveis numéricas,
+  atualizados bloco a bloco e mescláveis entre processos e
+  competências (fórmula de Chan et al. para variâncias em
+  paralelo). A matriz de correlação sai do estado sem
+  materializar a base nem cópias de colunas:
+
+    M2(a ∪ b) = M2(a) + M2(b) + δδᵀ · n_a·n_b / n,
+    δ = média(b) − média(a)
+
+  O estado fica por grupo (competência, por padrão): a
+  matriz global é a mescla dos grupos, e as matrizes por
+  competência saem da mesma passada. Como no resto do
+  acumulador, a subtração de um mês reapresentado é a
+  mescla ao contrário.
+=============================================================
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _coluna(nome):
+    return lambda bloco: bloco[nome].to_numpy(dtype="float64")
+
+
+def _indicadora(coluna, valor):
+    return lambda bloco: (bloco[coluna] == valor).to_numpy(dtype="float64")
+
+
+# nome → função do bloco; a ordem é a das linhas/colunas da matriz.
+# Para uma variável nova, basta registrá-la aqui.
+VARIAVEIS = {
+    "valor_fatura":        _coluna("valor_fatura"),
+    "consumo_energia_kwh": _coluna("consumo_energia_kwh"),
+    "dia_vencimento":      _coluna("dia_vencimento"),
+    "inadimplente":        _indicadora("status_fatura", "atrasada"),
+    "is_pj":               _indicadora("tipo_cliente", "PJ"),
+}
+VARIAVEIS_FIG7 = list(VARIAVEIS)
+
+
+def _momentos(x):
+    """(n, média, co-momentos centrados) de uma matriz linhas × variáveis."""
+    media = x.mean(axis=0)
+    c = x - media
+    return len(x), media, c.T @ c
+
+
+def _combinar(a, b):
+    na, ma, m2a = a
+    nb, mb, m2b = b
+    n = na + nb
+    delta = mb - ma
+    return n, ma + delta * (nb / n), m2a + m2b + np.outer(delta, delta) * (na * nb / n)
+
+
+def _descontar(t, b):
+    """Inverso de `_combinar`: o que sobra de `t` sem a parte `b` (None se nada)."""
+    n, mt, m2t = t
+    nb, mb, m2b = b
+    na = n - nb
+    if na < 0:
+        raise ValueError("Momentos a subtrair são maiores que os acumulados.")
+    if na == 0:
+        return None
+    ma = (n * mt - nb * mb) / na
+    delta = mb - ma
+    return na, ma, m2t - m2b - np.outer(delta, delta) * (na * nb / n)
+
+
+class CoMomentos:
+    """
+        mom = CoMomentos(por="competencia")
+        for bloco in blocos:
+            mom.atualizar(bloco)
+        mom.mesclar(outro)                    # outro processo/arquivo
+        mom.correlacao()                      # matriz global (Pearson)
+        mom.correlacao("2021-08")             # de uma competência
+        mom.correlacao_por_grupo()            # (grupo, variável) × variável
+
+    Linhas com alguma variável nula ficam de fora de todas as somas
+    (exclusão por linha; o `DataFrame.corr` exclui por par) — com a
+    validação da carga, não há nulos nessas colunas.
+    """
+
+    def __init__(self, variaveis=None, por="competencia"):
+        variaveis = list(variaveis or VARIAVEIS_FIG7)
+        desconhecidas = [v for v in variaveis if v not in VARIAVEIS]
+        if desconhecidas:
+            raise ValueError(f"Variáveis desconhecidas: {desconhecidas} (registre em VARIAVEIS)")
+        self.variaveis = variaveis
+        self.por = por
+        self.grupos = {}      # grupo → (n, média, co-momentos)
+
+    # ── atualização ───────────────────────────────────────
+    def atualizar(self, bloco):
+        if bloco.empty:
+            return self
+        x = np.empty((len(bloco), len(self.variaveis)))
+        for j, nome in enumerate(self.variaveis):
+            x[:, j] = VARIAVEIS[nome](bloco)
+        validas = ~np.isnan(x).any(axis=1)
+        if self.por is None:
+            self._incorporar(None, x[validas])
+            return self
+        codigos, grupos = pd.factorize(bloco[self.por])
+        codigos = codigos[validas]
+        x = x[validas]
+        ordem = np.argsort(codigos, kind="stable")
+        limites = np.searchsorted(codigos[ordem], np.arange(len(grupos) + 1))
+        for g, grupo in enumerate(grupos):
+            linhas = ordem[limites[g]:limites[g + 1]]
+            if len(linhas):
+                self._incorporar(grupo, x[linhas])
+        return self
+
+    def _incorporar(self, grupo, x):
+        if len(x) == 0:
+            return
+        parte = _momentos(x)
+        atual = self.grupos.get(grupo)
+        self.grupos[grupo] = parte if atual is None else _combinar(atual, parte)
+
+    def _compativel(self, outro):
+        if outro.variaveis != self.variaveis or outro.por != self.por:
+            raise ValueError("Co-momentos de variáveis ou agrupamentos diferentes não se combinam.")
+
+    def mesclar(self, outro):
+        self._compativel(outro)
+        for grupo, parte in outro.grupos.items():
+            atual = self.grupos.get(grupo)
+            self.grupos[grupo] = parte if atual is None else _combinar(atual, parte)
+        return self
+
+    def subtrair(self, outro):
+        self._compativel(outro)
+        for grupo, parte in outro.grupos.items():
+            if grupo not in self.grupos:
+                raise ValueError(f"Grupo {grupo!r} ausente do estado acumulado.")
+            resto = _descontar(self.grupos[grupo], parte)
+            if resto is None:
+                del self.grupos[grupo]
+            else:
+                self.grupos[grupo] = resto
+        return self
+
+    # ── resultados ────────────────────────────────────────
+    def total(self, grupo=None):
+        """(n, média, co-momentos) de um grupo, ou de todos mesclados."""
+        if grupo is not None:
+            return self.grupos[grupo]
+        if not self.grupos:
+            raise ValueError("Co-momentos vazios: nenhum bloco consumido.")
+        partes = [self.grupos[g] for g in sorted(self.grupos, key=str)]
+        t = partes[0]
+        for parte in partes[1:]:
+            t = _combinar(t, parte)
+        return t
+
+    def covariancia(self, grupo=None):
+        """Covariância amostral (ddof=1, como `DataFrame.cov`)."""
+        n, _, m2 = self.total(grupo)
+        cov = m2 / (n - 1) if n > 1 else np.full_like(m2, np.nan)
+        return pd.DataFrame(cov, index=self.variaveis, columns=self.variaveis)
+
+    def correlacao(self, grupo=None):
+        """Pearson; variância nula dá NaN na linha/coluna, como `DataFrame.corr`."""
+        _, _, m2 = self.total(grupo)
+        desvio = np.sqrt(np.diag(m2))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = m2 / np.outer(desvio, desvio)
+        corr = np.clip(corr, -1.0, 1.0)
+        np.fill_diagonal(corr, np.where(desvio > 0, 1.0, np.nan))
+        return pd.DataFrame(corr, index=self.variaveis, columns=self.variaveis)
+
+    def correlacao_por_grupo(self):
+        grupos = sorted(self.grupos, key=str)
+        return pd.concat([self.correlacao(g) for g in grupos], keys=grupos,
+                         names=[self.por, "variavel"])
+
+    # ── persistência ──────────────────────────────────────
+    def estado(self):
+        return {"variaveis": self.variaveis, "por": self.por,
+                "grupos": {g: (n, m.copy(), m2.copy()) for g, (n, m, m2) in self.grupos.items()}}
+
+    @classmethod
+    def de_estado(cls, estado):
+        mom = cls(estado["variaveis"], estado["por"])
+        mom.grupos = {g: (n, np.array(m), np.array(m2))
+                      for g, (n, m, m2) in estado["grupos"].items()}
+        return mom
@@ -0,0 +1,345 @@
+"""
+=============================================================
+  MOTOR FORA DA MEMÓRIA (DUCKDB)
+  As mesmas seções 1–7 e o painel de KPIs (fig7) sobre bases
+  maiores que a RAM: o DuckDB varre o CSV/Parquet em
+  streaming, lê só as colunas referenciadas e empurra o
+  filtro de competências para a leitura. Do banco só saem
+  agregados — o estado do AcumuladorFaturamento (cubo e
+  histogramas) e o resumo por cliente — então as tabelas
+  das seções vêm do mesmo código do caminho pandas.
+
+  Fontes: caminho .csv (esquema de base_faturamento.csv),
+  .parquet (ou glob de parquets), ou nome de tabela/view já
+  registrada na conexão (ex.: uma cópia local da tabela
+  base_energia_devedores_csv do metastore).
+=============================================================
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:          # motor indisponível sem duckdb
+    duckdb = None
+
+from agregacao import (DIMENSOES, AcumuladorFaturamento, ClientesCodificados,
+                       ResumoClientes, completar_perfil, formatar_vip)
+from carga import STATUS_FATURA, TIPOS_CLIENTE
+from validacao import MAX_CONSUMO, PADRAO_COMPETENCIA
+
+# colunas expostas pela view, na ordem do caminho pandas (COLUNAS_ANALISE)
+COLUNAS = ["competencia", "id_cliente", "valor_fatura", "tipo_cliente",
+           "consumo_energia_kwh", "status_fatura", "dia_vencimento"]
+
+TIPOS_CSV = {
+    "competencia":         "VARCHAR",
+    "id_cliente":          "VARCHAR",
+    "valor_fatura":        "DOUBLE",
+    "tipo_cliente":        "VARCHAR",
+    "consumo_energia_kwh": "INTEGER",
+    "status_fatura":       "VARCHAR",
+    "data_vencimento":     "DATE",
+}
+
+# correlação do painel de KPIs (fig7), mesma ordem do caminho pandas
+VARIAVEIS_CORR = {
+    "valor_fatura":        "valor_fatura",
+    "consumo_energia_kwh": "consumo_energia_kwh",
+    "dia_vencimento":      "dia_vencimento",
+    "inadimplente":        "(status_fatura = 'atrasada')::INTEGER",
+    "is_pj":               "(tipo_cliente = 'PJ')::INTEGER",
+}
+
+
+def disponivel():
+    return duckdb is not None
+
+
+def _literal(texto):
+    return "'" + str(texto).replace("'", "''") + "'"
+
+
+def _leitura(fonte, texto=False):
+    """
+    Expressão FROM da fonte: CSV tipado, Parquet ou tabela da conexão.
+    Com `texto`, o CSV é lido só como VARCHAR e convertido na view com
+    TRY_CAST — um valor malformado vira linha reprovada, não erro.
+    """
+    nome = str(fonte)
+    sufixo = Path(nome).suffix.lower()
+    if sufixo == ".csv":
+        if texto:
+            return (f"read_csv({_literal(nome)}, delim=';', header=true, "
+                    f"all_varchar=true)")
+        colunas = ", ".join(f"{_literal(c)}: {_literal(t)}" for c, t in TIPOS_CSV.items())
+        return (f"read_csv({_literal(nome)}, delim=';', decimal_separator=',', "
+                f"header=true, dateformat='%d/%m/%Y', columns={{{colunas}}})")
+    if sufixo == ".parquet":
+        return f"read_parquet({_literal(nome)})"
+    return nome
+
+
+def _conversoes(tipos):
+    """
+    Colunas convertidas conforme os tipos da fonte: tabelas vindas de
+    CSV (como no metastore) costumam trazer tudo como texto, com decimal
+    em vírgula e data dd/mm/aaaa — convertidos aqui, no banco. Valores
+    inconvertíveis viram NULL e reprovam a linha (ver _reprovacoes).
+    """
+    texto = lambda c: tipos.get(c, "VARCHAR") == "VARCHAR"
+    valor = ("TRY_CAST(replace(valor_fatura, ',', '.') AS DOUBLE)" if texto("valor_fatura")
+             else "TRY_CAST(valor_fatura AS DOUBLE)")
+    data  = ("try_strptime(data_vencimento, '%d/%m/%Y')" if texto("data_vencimento")
+             else "data_vencimento")
+    return {
+        "competencia":         "competencia",
+        "id_cliente":          "id_cliente",
+        "valor_fatura":        valor,
+        "tipo_cliente":        "tipo_cliente",
+        "consumo_energia_kwh": "TRY_CAST(consumo_energia_kwh AS DOUBLE)",
+        "status_fatura":       "status_fatura",
+        "dia_vencimento":      f"day({data})",
+    }
+
+
+def _reprovacoes(conv):
+    """Motivo (validacao.MOTIVOS) → condição SQL que reprova a linha."""
+    em = lambda valores: "(" + ", ".join(_literal(v) for v in valores) + ")"
+    consumo = conv["consumo_energia_kwh"]
+    return {
+        "competencia_invalida": "NOT coalesce(regexp_full_match(competencia, "
+                                f"{_literal(PADRAO_COMPETENCIA)}), false)",
+        "id_ausente":           "coalesce(trim(id_cliente), '') = ''",
+        "valor_invalido":       f"{conv['valor_fatura']} IS NULL",
+        "tipo_desconhecido":    f"coalesce(tipo_cliente NOT IN {em(TIPOS_CLIENTE)}, true)",
+        "consumo_invalido":     f"coalesce({consumo} <> round({consumo}) "
+                                f"OR abs({consumo}) > {MAX_CONSUMO}, true)",
+        "consumo_negativo":     f"coalesce({consumo} < 0, false)",
+        "status_desconhecido":  f"coalesce(status_fatura NOT IN {em(STATUS_FATURA)}, true)",
+        "data_invalida":        f"{conv['dia_vencimento']} IS NULL",
+    }
+
+
+def _expressoes(conv):
+    """SELECT da view `faturas` a partir das conversões."""
+    return [
+        "competencia",
+        "id_cliente",
+        f"{conv['valor_fatura']} AS valor_fatura",
+        "tipo_cliente",
+        f"CAST({conv['consumo_energia_kwh']} AS INTEGER) AS consumo_energia_kwh",
+        "status_fatura",
+        f"{conv['dia_vencimento']}::TINYINT AS dia_vencimento",
+    ]
+
+
+def _categorias(df):
+    """Mesmos dtypes do caminho pandas (carga.py), para índices idênticos."""
+    for coluna, categorias in (("tipo_cliente", TIPOS_CLIENTE),
+                               ("status_fatura", STATUS_FATURA)):
+        if coluna in df.columns:
+            df[coluna] = df[coluna].astype(pd.CategoricalDtype(categorias))
+    return df
+
+
+class MotorDuckDB:
+    """
+    Uso:
+        motor = MotorDuckDB("base.parquet", competencias=["2021-08"])
+        acc   = motor.acumulador()
+        resumo_cli = motor.resumo_clientes(k=10)
+        corr  = motor.correlacao()
+
+    `memoria` limita a memória do DuckDB (ex.: "4GB"); acima disso ele
+    despeja em `dir_temp`.
+    """
+
+    def __init__(self, fonte, competencias=None, conexao=None, memoria=None,
+                 dir_temp=None, threads=None, validar=True):
+        if duckdb is None:
+            raise ImportError("O motor DuckDB requer o pacote duckdb.")
+        self.con = conexao or duckdb.connect()
+        if memoria:
+            self.con.execute(f"SET memory_limit = {_literal(memoria)}")
+        if dir_temp:
+            self.con.execute(f"SET temp_directory = {_literal(dir_temp)}")
+        if threads:
+            self.con.execute(f"SET threads = {int(threads)}")
+
+        filtro = "true"
+        if competencias:
+            filtro = ("competencia IN ("
+                      + ", ".join(_literal(c) for c in competencias) + ")")
+        leitura = _leitura(fonte, texto=validar)
+        tipos = {nome: tipo for nome, tipo, *_ in
+                 self.con.execute(f"DESCRIBE SELECT * FROM {leitura}").fetchall()}
+        conv = _conversoes(tipos)
+        self._reprovacoes = _reprovacoes(conv) if validar else {}
+        reprovada = " OR ".join(f"({c})" for c in self._reprovacoes.values()) or "false"
+        # repetidas por (competencia, id_cliente), como no validador: só entre
+        # as linhas que passaram nas demais regras; fica a primeira da fonte
+        duplicada = "false"
+        if validar:
+            duplicada = (f"NOT ({reprovada}) AND row_number() OVER (PARTITION BY "
+                         f"competencia, id_cliente, ({reprovada}) ORDER BY _linha) > 1")
+            self._reprovacoes["duplicada"] = "_duplicada"
+        self.con.execute(f"""
+            CREATE OR REPLACE TEMP VIEW _marcadas AS
+            SELECT *, {duplicada} AS _duplicada
+            FROM (SELECT *, row_number() OVER () AS _linha FROM {leitura} WHERE {filtro})
+        """)
+        self._reprovada = f"{reprovada} OR _duplicada"
+        self.con.execute(f"""
+            CREATE OR REPLACE TEMP VIEW faturas AS
+            SELECT {", ".join(_expressoes(conv))}
+            FROM _marcadas
+            WHERE NOT ({self._reprovada})
+        """)
+
+    def _df(self, sql):
+        return self.con.execute(sql).df()
+
+    # ── validação (mesmos motivos de validacao.py) ────────
+    def qualidade(self, quarentena=None):
+        """
+        Resumo no formato de `ValidadorFaturas.resumo()`. As linhas
+        reprovadas (repetidas inclusive) já ficam fora da view `faturas`;
+        com `quarentena`, são gravadas (como na fonte, mais a coluna
+        `motivos`) via COPY.
+        """
+        motivos = list(self._reprovacoes)
+        linha = self.con.execute(
+            "SELECT count(*), " + ", ".join(
+                [f"count_if({c})" for c in self._reprovacoes.values()]
+                + [f"count_if({self._reprovada})"]) + " FROM _marcadas").fetchone()
+        linhas, *contagens, rejeitadas = linha
+        contagens = dict(zip(motivos, contagens))
+
+        arquivos = []
+        if quarentena is not None and rejeitadas:
+            rotulos = ", ".join(f"CASE WHEN {c} THEN {_literal(m)} END"
+                                for m, c in self._reprovacoes.items())
+            Path(quarentena).parent.mkdir(parents=True, exist_ok=True)
+            self.con.execute(f"""
+                COPY (SELECT * EXCLUDE (_linha, _duplicada),
+                             concat_ws(',', {rotulos}) AS motivos
+                      FROM _marcadas WHERE {self._reprovada} ORDER BY _linha)
+                TO {_literal(quarentena)} (HEADER, DELIMITER ';')
+            """)
+            arquivos.append(str(quarentena))
+        return {"linhas": int(linhas), "rejeitadas": int(rejeitadas),
+                "motivos": {m: int(n) for m, n in contagens.items() if n},
+                "quarentena": arquivos}
+
+    # ── estado do acumulador (seções 1–5) ─────────────────
+    def estado(self):
+        """Estado no formato de `AcumuladorFaturamento.estado()`, sem o por cliente."""
+        nulos = self._df("SELECT " + ", ".join(
+            f"count(*) - count({c}) AS {c}" for c in COLUNAS) + ", count(*) AS _linhas "
+            "FROM faturas")
+        linhas = int(nulos.pop("_linhas").iloc[0])
+        if linhas == 0:
+            raise ValueError("Base vazia: nenhuma fatura na fonte/filtro.")
+
+        cubo = _categorias(self._df(f"""
+            SELECT {", ".join(DIMENSOES)}, count(*) AS qtd, sum(valor_fatura) AS valor,
+                   sum(consumo_energia_kwh) AS consumo
+            FROM faturas GROUP BY ALL ORDER BY ALL
+        """))
+        cubo["consumo"] = cubo["consumo"].astype("int64")
+        hist_consumo = _categorias(self._df("""
+            SELECT tipo_cliente, status_fatura, consumo_energia_kwh, count(*) AS n
+            FROM faturas GROUP BY ALL ORDER BY ALL
+        """))
+        hist_valor = _categorias(self._df("""
+            SELECT tipo_cliente, round(valor_fatura * 100)::BIGINT AS centavos,
+                   count(*) AS n
+            FROM faturas GROUP BY ALL ORDER BY ALL
+        """))
+        return {
+            "por_cliente":  False,
+            "linhas":       linhas,
+            "colunas":      list(COLUNAS),
+            "nulos":        nulos.iloc[0].astype("int64").rename(None),
+            "cubo":         [cubo.set_index(DIMENSOES)],
+            "clientes":     None,
+            "hist_consumo": [hist_consumo.set_index(
+                ["tipo_cliente", "status_fatura", "consumo_energia_kwh"])["n"]
+                .rename(None)],
+            "hist_valor":   [hist_valor.set_index(["tipo_cliente", "centavos"])["n"]
+                             .rename(None)],
+        }
+
+    def _clientes_sql(self):
+        return """
+            SELECT id_cliente, tipo_cliente,
+                   count(*)                                   AS num_faturas,
+                   sum(valor_fatura)                          AS total_faturado,
+                   sum(consumo_energia_kwh)                   AS consumo_total,
+                   sum((status_fatura = 'atrasada')::INTEGER) AS atrasadas,
+                   sum(dia_vencimento)                        AS soma_dia,
+                   sum((status_fatura = 'em aberto')::INTEGER) AS em_aberto
+            FROM faturas GROUP BY ALL
+        """
+
+    def clientes(self, lote=1_000_000):
+        """Estado por cliente (ClientesCodificados), lido em lotes de Arrow."""
+        cli = ClientesCodificados()
+        leitor = self.con.execute(self._clientes_sql()).fetch_record_batch(lote)
+        for parte in leitor:
+            cli.mesclar(ClientesCodificados.de_tabela(_categorias(parte.to_pandas())))
+        return cli
+
+    def acumulador(self, por_cliente=False):
+        """
+        AcumuladorFaturamento com o estado calculado no banco. Com
+        `por_cliente`, inclui o estado por cliente (memória proporcional ao
+        nº de clientes, não de faturas) — necessário para a fig5.
+        """
+        acc = AcumuladorFaturamento.de_estado(self.estado())
+        if por_cliente:
+            acc.por_cliente = True
+            acc._clientes = self.clientes()
+            acc._memo.invalidar("clientes")
+        return acc
+
+    # ── seções 6 e 7 sem estado por cliente em memória ────
+    def resumo_clientes(self, k=10):
+        """
+        Top-k VIP (empates por id_cliente crescente, como topk.py), perfil
+        (total_fat, atrasadas) e nº de clientes, inteiramente no banco.
+        """
+        self.con.execute(f"CREATE OR REPLACE TEMP TABLE _clientes AS {self._clientes_sql()}")
+        vip = _categorias(self._df(f"""
+            SELECT * FROM _clientes
+            ORDER BY total_faturado DESC, id_cliente ASC LIMIT {int(k)}
+        """))
+        vip = vip.astype({"num_faturas": "int32", "consumo_total": "int64",
+                          "atrasadas": "int32"})
+        perfil = self._df("""
+            SELECT total_fat, atrasadas, count(*) AS clientes FROM (
+                SELECT id_cliente, sum(num_faturas) AS total_fat,
+                       sum(atrasadas) AS atrasadas
+                FROM _clientes GROUP BY id_cliente
+            ) GROUP BY ALL
+        """).astype("int64")
+        n_clientes = int(perfil["clientes"].sum())
+        self.con.execute("DROP TABLE _clientes")
+        return ResumoClientes(formatar_vip(vip), completar_perfil(perfil), n_clientes)
+
+    # ── painel de KPIs (fig7) ─────────────────────────────
+    def correlacao(self):
+        """Matriz de Pearson das variáveis da fig7, via agregados corr()."""
+        nomes = list(VARIAVEIS_CORR)
+        pares = [(a, b) for i, a in enumerate(nomes) for b in nomes[i + 1:]]
+        linha = self.con.execute("SELECT " + ", ".join(
+            f"corr({VARIAVEIS_CORR[a]}, {VARIAVEIS_CORR[b]})" for a, b in pares)
+            + " FROM faturas").fetchone()
+        corr = pd.DataFrame(np.eye(len(nomes)), index=nomes, columns=nomes)
+        for (a, b), r in zip(pares, linha):
+            corr.loc[a, b] = corr.loc[b, a] = np.nan if r is None else r
+        return corr
@@ -0,0 +1,70 @@
+"""
+=============================================================
+  EXECUÇÃO PARTICIONADA POR CLIENTE (MULTI-CORE)
+  Seções 6 (VIP) e 7 (frequência de atraso): as linhas são
+  particionadas por hash de id_cliente e cada partição é
+  agregada em um processo separado.
+=============================================================
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from agregacao import (ClientesCodificados, ResumoClientes, completar_perfil,
+                       formatar_vip)
+from topk import TopK
+
+COLUNAS_CLIENTE = ["id_cliente", "tipo_cliente", "valor_fatura",
+                   "consumo_energia_kwh", "status_fatura", "dia_vencimento"]
+
+
+def particionar(df, n_particoes):
+    """
+    Divide `df` em `n_particoes` pelo hash de id_cliente. Todas as faturas
+    de um cliente caem na mesma partição, então os agregados por cliente
+    de partições diferentes são disjuntos e podem ser apenas somados.
+    """
+    h = pd.util.hash_pandas_object(df["id_cliente"], index=False).to_numpy()
+    codigo = (h % np.uint64(n_particoes)).astype("int64")
+    ordem  = np.argsort(codigo, kind="stable")
+    cortes = np.searchsorted(codigo[ordem], np.arange(1, n_particoes))
+    return [df.iloc[idx] for idx in np.split(ordem, cortes) if len(idx)]
+
+
+def _agregar_particao(parte, k):
+    """Tarefa de um worker: devolve só resumos pequenos (heap top-k e perfil)."""
+    clientes = ClientesCodificados().atualizar(parte)
+    return clientes.top_k(k), clientes.perfil(), clientes.n_clientes()
+
+
+def mesclar_resumos(parciais, k=10):
+    """Heaps top-k locais mesclados; perfis e contagens somados."""
+    topos, perfis, n_ids = zip(*parciais)
+    topo = TopK(k)
+    for parcial in topos:
+        topo.mesclar(parcial)
+    vip    = formatar_vip(topo.resultado())
+    perfil = (pd.concat(perfis, ignore_index=True)
+                .groupby(["total_fat", "atrasadas"], as_index=False)["clientes"].sum())
+    return ResumoClientes(vip, completar_perfil(perfil), int(sum(n_ids)))
+
+
+def agregar_clientes_particionado(df, processos=None, n_particoes=None, k=10):
+    """
+    Seções 6 e 7 em `processos` workers. Por padrão usa todos os núcleos
+    e uma partição por processo. O resultado é idêntico ao do acumulador
+    serial (`AcumuladorFaturamento.resumo_clientes`).
+    """
+    processos   = processos or os.cpu_count() or 1
+    n_particoes = n_particoes or processos
+    partes = particionar(df[COLUNAS_CLIENTE], n_particoes)
+
+    if processos == 1:
+        parciais = [_agregar_particao(p, k) for p in partes]
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as pool:
+            parciais = list(pool.map(_agregar_particao, partes, [k] * len(partes)))
+    return mesclar_resumos(parciais, k)
@@ -0,0 +1,324 @@
+"""
+=============================================================
+  ESCORE DE RISCO DE INADIMPLÊNCIA POR CLIENTE
+  Atributos por cliente montados dos estados por competência
+  já agregados (ClientesCodificados de cada mês — do armazém
+  incremental ou da ingestão por competência), regressão
+  logística leve (IRLS em numpy, sem dependência nova) e a
+  pontuação da base inteira em lotes vetorizados.
+
+  Alvo do ajuste: ter ao menos uma fatura atrasada na última
+  competência, com os atributos do histórico até a anterior.
+  O modelo pontua depois o histórico completo — risco de
+  atraso na próxima competência — e novas faturas, pelo
+  código int32 do cliente.
+=============================================================
+"""
+
+import numpy as np
+import pandas as pd
+
+from agregacao import N_TIPOS, ClientesCodificados
+from carga import TIPOS_CLIENTE
+
+# (log) = log1p, contra a cauda longa de contagens e valores
+ATRIBUTOS = ["atrasadas (log)", "tx_atraso", "valor_medio (log)", "tendencia_consumo",
+             "dia_medio", "pj", "num_faturas (log)"]
+MAX_AMOSTRA = 500_000     # linhas de treino (amostra aleatória acima disso)
+TAMANHO_LOTE = 1_000_000  # pares (cliente, tipo) pontuados por vez
+_PJ = TIPOS_CLIENTE.index("PJ")
+
+
+def indice_mes(competencia):
+    """"AAAA-MM" → nº de meses desde o ano 0 (diferenças = meses corridos)."""
+    ano, mes = str(competencia).split("-")
+    return int(ano) * 12 + int(mes) - 1
+
+
+class HistoricoClientes(ClientesCodificados):
+    """
+    ClientesCodificados com as somas da regressão do consumo mensal no
+    tempo (meses presentes, Σt, Σt², Σc·t), para a tendência de consumo
+    de cada cliente. Tudo soma: meses chegam em qualquer ordem.
+    """
+
+    CAMPOS = {**ClientesCodificados.CAMPOS, "meses": np.int16,
+              "soma_t": np.float64, "soma_t2": np.float64, "soma_ct": np.float64}
+
+    def __init__(self, indice=None, origem=None):
+        super().__init__(indice)
+        self.origem = origem      # índice_mes da 1ª competência (t = 0)
+
+    def incorporar(self, competencia, mes):
+        """Soma o estado por cliente `mes` (ClientesCodificados) de uma competência."""
+        if self.origem is None:
+            self.origem = indice_mes(competencia)
+        t = float(indice_mes(competencia) - self.origem)
+        _, chaves = self._chaves_de(mes, inserir=True)
+        self._crescer()
+        a = mes._arrays()
+        for campo, valores in a.items():
+            getattr(self, campo)[chaves] += valores
+        ativo = a["num_faturas"] > 0
+        self.meses[chaves]   += ativo.astype(np.int16)
+        self.soma_t[chaves]  += ativo * t
+        self.soma_t2[chaves] += ativo * t * t
+        self.soma_ct[chaves] += a["consumo_total"] * t
+        return self
+
+    def campos(self, chaves):
+        """Campos dos pares (cliente, tipo) em `chaves` (posições nos arrays)."""
+        return {campo: getattr(self, campo)[chaves] for campo in self.CAMPOS}
+
+    def estado(self):
+        return {**super().estado(), "origem": self.origem}
+
+    @classmethod
+    def de_estado(cls, estado):
+        hist = super().de_estado(estado)
+        hist.origem = estado["origem"]
+        return hist
+
+
+def matriz_atributos(c, chaves):
+    """Campos de HistoricoClientes → matriz n × len(ATRIBUTOS) (float64)."""
+    num = c["num_faturas"].astype(np.float64)
+    atr = c["atrasadas"].astype(np.float64)
+    k   = c["meses"].astype(np.float64)
+    consumo = c["consumo_total"].astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # inclinação do consumo mensal (kWh/mês), relativa ao consumo médio
+        den = k * c["soma_t2"] - c["soma_t"] ** 2
+        inclinacao = np.where(den > 0, (k * c["soma_ct"] - c["soma_t"] * consumo) / den, 0.0)
+        medio = np.where(k > 0, consumo / k, 0.0)
+        tendencia = np.where(medio > 0, inclinacao / medio, 0.0)
+        tx_atraso  = np.where(num > 0, atr / num, 0.0)
+        valor      = np.where(num > 0, c["total_faturado"] / num, 0.0)
+        dia        = np.where(num > 0, c["soma_dia"] / num, 0.0)
+    return np.column_stack([
+        np.log1p(atr), tx_atraso, np.log1p(np.maximum(valor, 0)), tendencia, dia,
+        (np.asarray(chaves) % N_TIPOS == _PJ).astype(np.float64), np.log1p(num),
+    ])
+
+
+def auc(y, p):
+    """Área sob a curva ROC (Mann–Whitney), com empates pela média dos postos."""
+    y = np.asarray(y, dtype=bool)
+    n1, n0 = int(y.sum()), int((~y).sum())
+    if n1 == 0 or n0 == 0:
+        return float("nan")
+    postos = pd.Series(p).rank().to_numpy()
+    return float((postos[y].sum() - n1 * (n1 + 1) / 2) / (n1 * n0))
+
+
+class ModeloLogistico:
+    """
+    Regressão logística com penalidade L2 (o intercepto não é
+    penalizado), ajustada por IRLS — Newton, poucas iterações para
+    meia dúzia de atributos — sobre os atributos padronizados.
+    """
+
+    def __init__(self, l2=1.0, max_iter=25, tol=1e-8):
+        self.l2 = l2
+        self.max_iter = max_iter
+        self.tol = tol
+        self.media = self.desvio = self.pesos = None
+
+    def _padronizar(self, X):
+        return np.column_stack([np.ones(len(X)), (X - self.media) / self.desvio])
+
+    def ajustar(self, X, y):
+        self.media  = X.mean(axis=0)
+        self.desvio = X.std(axis=0)
+        self.desvio[self.desvio == 0] = 1.0
+        Z = self._padronizar(X)
+        y = np.asarray(y, dtype=np.float64)
+        pena = np.full(Z.shape[1], self.l2)
+        pena[0] = 0.0
+        w = np.zeros(Z.shape[1])
+        for _ in range(self.max_iter):
+            p = 1 / (1 + np.exp(-(Z @ w)))
+            gradiente = Z.T @ (y - p) - pena * w
+            hessiana  = (Z * (p * (1 - p))[:, None]).T @ Z + np.diag(pena)
+            passo = np.linalg.solve(hessiana, gradiente)
+            w += passo
+            if np.abs(passo).max() < self.tol:
+                break
+        self.pesos = w
+        return self
+
+    def probabilidade(self, X):
+        return 1 / (1 + np.exp(-(self._padronizar(X) @ self.pesos)))
+
+    def coeficientes(self):
+        """Pesos por desvio-padrão de cada atributo (comparáveis entre si)."""
+        return pd.Series(self.pesos, index=["intercepto"] + ATRIBUTOS)
+
+
+class EscoreRisco:
+    """
+    Uso em lote (janela noturna):
+
+        escore = EscoreRisco.de_armazem("agregados/")    # ou de_estados({comp: clientes})
+        escore.ajustar()                                 # último mês como alvo
+        ranking = escore.ranking()                       # maior risco primeiro
+        escore.salvar("risco.pkl")
+
+    e consulta rápida para faturas novas:
+
+        escore = EscoreRisco.carregar("risco.pkl")
+        escore.pontuar(faturas)    # id_cliente, tipo_cliente, valor_fatura, dia_vencimento
+    """
+
+    def __init__(self, meses, l2=1.0):
+        # meses: {competencia: função → ClientesCodificados}, lidos sob demanda
+        self._meses = dict(sorted(meses.items()))
+        self.modelo = ModeloLogistico(l2)
+        self.historico = None
+        self.metricas = None
+
+    @classmethod
+    def de_estados(cls, estados, **kwargs):
+        """{competencia: ClientesCodificados ou AcumuladorFaturamento}."""
+        def leitor(estado):
+            return lambda: getattr(estado, "clientes_codificados", estado)
+        return cls({comp: leitor(est) for comp, est in estados.items()}, **kwargs)
+
+    @classmethod
+    def de_armazem(cls, diretorio, **kwargs):
+        """Meses do armazém incremental, lidos um por vez do disco."""
+        from incremental import ArmazemCompetencias
+        armazem = ArmazemCompetencias(diretorio)
+        def leitor(comp):
+            return lambda: armazem.acumulador_mes(comp).clientes_codificados
+        return cls({comp: leitor(comp) for comp in armazem.competencias()}, **kwargs)
+
+    # ── ajuste ────────────────────────────────────────────
+    def ajustar(self, max_amostra=MAX_AMOSTRA, fracao_teste=0.2, semente=0):
+        """
+        Ajusta o modelo (histórico até a penúltima competência → atraso na
+        última) e deixa o histórico completo pronto para pontuar. AUC medida
+        em `fracao_teste` dos clientes, fora do ajuste.
+        """
+        if len(self._meses) < 2:
+            raise ValueError("O escore de risco precisa de ao menos 2 competências "
+                             f"(há {len(self._meses)}).")
+        *anteriores, ultima = self._meses
+        hist = HistoricoClientes()
+        for comp in anteriores:
+            hist.incorporar(comp, self._meses[comp]())
+        alvo = self._meses[ultima]()
+
+        # pares (cliente, tipo) com histórico e fatura na última competência
+        mapa, chaves_alvo = hist._chaves_de(alvo, inserir=False)
+        a = alvo._arrays()
+        no_hist = np.repeat(mapa >= 0, N_TIPOS) & (a["num_faturas"] > 0)
+        chaves  = chaves_alvo[no_hist]
+        chaves  = chaves[hist.num_faturas[chaves] > 0]
+        y = np.zeros(N_TIPOS * len(hist.indice), dtype=bool)
+        y[chaves_alvo[no_hist]] = a["atrasadas"][no_hist] > 0
+        y = y[chaves]
+        if len(chaves) == 0 or y.all() or not y.any():
+            raise ValueError("Sem clientes recorrentes com e sem atraso para o ajuste.")
+
+        rng = np.random.default_rng(semente)
+        if len(chaves) > max_amostra:
+            sel = np.sort(rng.choice(len(chaves), max_amostra, replace=False))
+            chaves, y = chaves[sel], y[sel]
+        X = matriz_atributos(hist.campos(chaves), chaves)
+        teste = rng.random(len(chaves)) < fracao_teste
+        self.modelo.ajustar(X[~teste], y[~teste])
+
+        self.metricas = {
+            "competencia_alvo": ultima,
+            "treino": int((~teste).sum()),
+            "teste": int(teste.sum()),
+            "taxa_alvo": float(y.mean()),
+            "auc_teste": auc(y[teste], self.modelo.probabilidade(X[teste])),
+        }
+        hist.incorporar(ultima, alvo)
+        self.historico = hist
+        return self
+
+    # ── pontuação em lote ─────────────────────────────────
+    def _exigir_ajuste(self):
+        if self.historico is None:
+            raise ValueError("Modelo não ajustado: chame ajustar() ou carregar().")
+
+    def escores(self, lote=TAMANHO_LOTE):
+        """(chaves ativas, probabilidade float32), em lotes de `lote` pares."""
+        self._exigir_ajuste()
+        ativos = np.flatnonzero(self.historico._arrays()["num_faturas"])
+        p = np.empty(len(ativos), dtype=np.float32)
+        for i in range(0, len(ativos), lote):
+            chaves = ativos[i:i + lote]
+            X = matriz_atributos(self.historico.campos(chaves), chaves)
+            p[i:i + lote] = self.modelo.probabilidade(X)
+        return ativos, p
+
+    def ranking(self, n=None, lote=TAMANHO_LOTE):
+        """
+        Clientes do maior para o menor risco (os `n` primeiros, ou todos).
+        Com `n`, a seleção é um argpartition — só n ids são decodificados.
+        """
+        chaves, p = self.escores(lote)
+        if n is not None and n < len(p):
+            topo = np.argpartition(-p, n - 1)[:n]
+        else:
+            topo = np.arange(len(p))
+        # maior escore primeiro; empates pelo código (ordem de chegada)
+        topo = topo[np.lexsort((chaves[topo], -p[topo]))]
+        chaves = chaves[topo]
+        t = self.historico.tabela(chaves)
+        X = matriz_atributos(self.historico.campos(chaves), chaves)
+        return pd.DataFrame({
+            "posicao":      np.arange(1, len(chaves) + 1),
+            "id_cliente":   t["id_cliente"],
+            "tipo_cliente": t["tipo_cliente"],
+            "escore":       p[topo].round(4),
+            "num_faturas":  t["num_faturas"],
+            "atrasadas":    t["atrasadas"],
+            "tx_atraso":    (X[:, 1] * 100).round(1),
+            "valor_medio":  (t["total_faturado"] / t["num_faturas"]).round(2),
+            "tendencia_consumo": (X[:, 3] * 100).round(1),
+        })
+
+    # ── consulta de faturas novas ─────────────────────────
+    def pontuar(self, faturas):
+        """
+        Escore de cada fatura nova: o histórico do cliente (buscado pelo
+        código int32) somado à fatura — status ainda desconhecido, então
+        não conta como atraso. Clientes novos pontuam só pela fatura.
+        """
+        self._exigir_ajuste()
+        hist = self.historico
+        codigos = hist.indice.localizar(faturas["id_cliente"])
+        tipos = (pd.Series(faturas["tipo_cliente"])
+                   .astype(pd.CategoricalDtype(TIPOS_CLIENTE)).cat.codes.to_numpy())
+        if (tipos < 0).any():
+            raise ValueError(f"tipo_cliente fora de {TIPOS_CLIENTE}")
+        chaves = codigos.astype(np.int64) * N_TIPOS + tipos
+        conhecido = codigos >= 0
+        c = {campo: np.zeros(len(chaves), dtype=np.float64) for campo in hist.CAMPOS}
+        for campo, valores in hist.campos(chaves[conhecido]).items():
+            c[campo][conhecido] = valores
+        c["num_faturas"]    += 1
+        c["total_faturado"] += np.asarray(faturas["valor_fatura"], dtype=np.float64)
+        c["soma_dia"]       += np.asarray(faturas["dia_vencimento"], dtype=np.float64)
+        return pd.Series(self.modelo.probabilidade(matriz_atributos(c, chaves)),
+                         index=getattr(faturas, "index", None), name="escore")
+
+    # ── persistência ──────────────────────────────────────
+    def salvar(self, caminho):
+        self._exigir_ajuste()
+        pd.to_pickle({"modelo": self.modelo, "metricas": self.metricas,
+                      "historico": self.historico.estado()}, caminho)
+
+    @classmethod
+    def carregar(cls, caminho):
+        dados = pd.read_pickle(caminho)
+        escore = cls({})
+        escore.modelo    = dados["modelo"]
+        escore.metricas  = dados["metricas"]
+        escore.historico = HistoricoClientes.de_estado(dados["historico"])
+        return escore
@@ -0,0 +1,222 @@
+"""
+=============================================================
+  ROLAGEM DE STATUS ENTRE COMPETÊNCIAS (ROLL RATE)
+  Para cada par de competências consecutivas, quantos
+  clientes passaram de cada status do mês ao do mês seguinte
+  (paga → atrasada, atrasada → atrasada, ...) e, por
+  cliente, as sequências de meses seguidos em atraso — a
+  base do modelo de provisão.
+
+  Os meses são lidos um por vez, em ordem, dos estados por
+  competência já agregados (ClientesCodificados de cada mês,
+  do armazém incremental ou da ingestão por competência). O
+  estado carregado entre meses são arrays por código do
+  cliente: o status do mês anterior e as sequências. Cada
+  transição é um bincount sobre `anterior * 4 + atual`; sem
+  laço por cliente.
+
+  Os ids de cada mês viram códigos por hash de 64 bits
+  (esbocos.hash_estavel) e busca binária no array ordenado
+  dos hashes já vistos — ~3x mais rápido que consultar um
+  IndiceClientes por texto a cada mês. Uma colisão entre
+  ids do mesmo mês é detectada (ValueError); entre meses,
+  com 10⁷ clientes, tem probabilidade ~10⁻⁶.
+
+  Status do cliente no mês (várias faturas no mesmo mês):
+  atrasada se alguma atrasou; senão em aberto se alguma está
+  em aberto; senão paga. Sem fatura no mês: "sem fatura".
+  Estados gravados antes do campo em_aberto contam as em
+  aberto como pagas.
+=============================================================
+"""
+
+import numpy as np
+import pandas as pd
+
+from agregacao import N_TIPOS
+from esbocos import hash_estavel
+from risco import indice_mes
+
+ESTADOS = ["sem fatura", "paga", "em aberto", "atrasada"]
+SEM_FATURA, PAGA, EM_ABERTO, ATRASADA = range(len(ESTADOS))
+_N = len(ESTADOS)
+
+# transições acompanhadas mês a mês (fig8 e seção impressa)
+PRINCIPAIS = [("paga", "atrasada"), ("atrasada", "atrasada"), ("atrasada", "paga")]
+
+
+def status_mes(mes):
+    """Status (int8, ver ESTADOS) de cada código do índice de `mes` (ClientesCodificados)."""
+    a = mes._arrays()
+    num, atr, aberto = (a[campo].reshape(-1, N_TIPOS).sum(axis=1)
+                        for campo in ("num_faturas", "atrasadas", "em_aberto"))
+    return np.select([atr > 0, aberto > 0, num > 0], [ATRASADA, EM_ABERTO, PAGA],
+                     SEM_FATURA).astype(np.int8)
+
+
+class RolagemClientes:
+    """
+        rolagem = RolagemClientes.de_armazem("agregados/")   # ou de_estados({comp: acc})
+        rolagem.matriz()                  # clientes por (status anterior, status atual)
+        rolagem.taxas()                   # % por linha: a rolagem propriamente dita
+        rolagem.taxas_por_mes()           # PRINCIPAIS transições em cada competência
+        rolagem.sequencias()              # por cliente: meses em atraso e sequências
+
+    `incorporar` exige as competências em ordem crescente. Um mês que
+    falta no calendário quebra as sequências e não gera transição.
+    """
+
+    def __init__(self):
+        self._chaves = np.zeros(0, dtype=np.uint64)      # hash do id, por código
+        self._ordem = np.zeros(0, dtype=np.intp)         # códigos na ordem dos hashes
+        self._ordenadas = np.zeros(0, dtype=np.uint64)   # _chaves[_ordem]
+        self._ids = []                                   # segmentos de ids, por código
+        self.anterior = np.zeros(0, dtype=np.int8)           # status no último mês
+        self.meses_atraso = np.zeros(0, dtype=np.int16)
+        self.sequencia_atual = np.zeros(0, dtype=np.int16)   # termina no último mês
+        self.maior_sequencia = np.zeros(0, dtype=np.int16)
+        self.competencias = []
+        self.transicoes = {}     # competência de destino → contagens 4 × 4
+
+    def __len__(self):
+        return len(self._chaves)
+
+    def _codificar(self, ids):
+        """Códigos dos ids (na ordem de chegada), incluindo os inéditos."""
+        h = hash_estavel(ids)
+        # consultas ordenadas: a busca binária percorre o array em ordem
+        ordem = np.argsort(h)
+        h = h[ordem]
+        if (h[1:] == h[:-1]).any():
+            raise ValueError("Colisão de hash entre ids de clientes do mesmo mês.")
+        pos = np.searchsorted(self._ordenadas, h)
+        achou = np.zeros(len(h), dtype=bool)
+        dentro = pos < len(self)
+        achou[dentro] = self._ordenadas[pos[dentro]] == h[dentro]
+        codigos = np.empty(len(h), dtype=np.intp)
+        codigos[ordem[achou]] = self._ordem[pos[achou]]
+        novos = ~achou
+        if novos.any():
+            novos_cod = np.arange(len(self), len(self) + novos.sum())
+            codigos[ordem[novos]] = novos_cod
+            self._ids.append(np.asarray(ids, dtype=object)[ordem[novos]])
+            self._chaves = np.concatenate([self._chaves, h[novos]])
+            # h[novos] já está ordenado: inserção direta, sem reordenar tudo
+            self._ordenadas = np.insert(self._ordenadas, pos[novos], h[novos])
+            self._ordem = np.insert(self._ordem, pos[novos], novos_cod)
+        return codigos
+
+    def ids(self):
+        """Ids de todos os clientes já vistos, na ordem dos códigos."""
+        if len(self._ids) > 1:
+            self._ids = [np.concatenate(self._ids)]
+        return self._ids[0] if self._ids else np.array([], dtype=object)
+
+    def _crescer(self):
+        n = len(self)
+        for campo in ("anterior", "meses_atraso", "sequencia_atual", "maior_sequencia"):
+            atual = getattr(self, campo)
+            if len(atual) < n:
+                novo = np.zeros(n, dtype=atual.dtype)
+                novo[:len(atual)] = atual
+                setattr(self, campo, novo)
+
+    def incorporar(self, competencia, mes):
+        """Avança um mês: `mes` é o ClientesCodificados da `competencia`."""
+        if self.competencias and indice_mes(competencia) <= indice_mes(self.competencias[-1]):
+            raise ValueError(f"Competência fora de ordem: {competencia} depois de "
+                             f"{self.competencias[-1]}.")
+        codigos = self._codificar(mes.indice.valores())
+        self._crescer()
+        atual = np.zeros(len(self), dtype=np.int8)
+        atual[codigos] = status_mes(mes)
+
+        consecutiva = (bool(self.competencias)
+                       and indice_mes(competencia) - indice_mes(self.competencias[-1]) == 1)
+        if consecutiva:
+            pares = self.anterior.astype(np.intp) * _N + atual
+            contagens = np.bincount(pares, minlength=_N * _N).reshape(_N, _N)
+            contagens[SEM_FATURA, SEM_FATURA] = 0     # fora da base nos dois meses
+            self.transicoes[competencia] = contagens
+        else:
+            self.sequencia_atual[:] = 0
+
+        atrasada = atual == ATRASADA
+        self.meses_atraso += atrasada
+        self.sequencia_atual = np.where(atrasada, self.sequencia_atual + 1, 0).astype(np.int16)
+        np.maximum(self.maior_sequencia, self.sequencia_atual, out=self.maior_sequencia)
+        self.anterior = atual
+        self.competencias.append(competencia)
+        return self
+
+    @classmethod
+    def de_estados(cls, estados):
+        """{competencia: ClientesCodificados ou AcumuladorFaturamento}."""
+        rolagem = cls()
+        for comp in sorted(estados, key=indice_mes):
+            estado = estados[comp]
+            rolagem.incorporar(comp, getattr(estado, "clientes_codificados", estado))
+        return rolagem
+
+    @classmethod
+    def de_armazem(cls, diretorio):
+        """Meses do armazém incremental, lidos um por vez do disco."""
+        from incremental import ArmazemCompetencias
+        armazem = ArmazemCompetencias(diretorio)
+        rolagem = cls()
+        for comp in sorted(armazem.competencias(), key=indice_mes):
+            rolagem.incorporar(comp, armazem.acumulador_mes(comp).clientes_codificados)
+        return rolagem
+
+    # ── resultados ────────────────────────────────────────
+    def _exigir_transicoes(self):
+        if not self.transicoes:
+            raise ValueError("A rolagem precisa de ao menos 2 competências consecutivas "
+                             f"(há {self.competencias}).")
+
+    def matriz(self, competencia=None):
+        """
+        Clientes por (status anterior, status atual), somados em todos os
+        pares de meses consecutivos — ou só no que chega em `competencia`.
+        """
+        self._exigir_transicoes()
+        contagens = (self.transicoes[competencia] if competencia is not None
+                     else sum(self.transicoes.values()))
+        return pd.DataFrame(contagens, index=pd.Index(ESTADOS, name="de"),
+                            columns=pd.Index(ESTADOS, name="para"))
+
+    def taxas(self, competencia=None):
+        """Rolagem em %: cada linha (status com fatura no mês anterior) soma 100."""
+        m = self.matriz(competencia).iloc[1:]
+        return m.div(m.sum(axis=1).replace(0, np.nan), axis=0) * 100
+
+    def taxas_por_mes(self, transicoes=PRINCIPAIS):
+        """% de cada transição em `transicoes`, por competência de destino."""
+        self._exigir_transicoes()
+        comps = list(self.transicoes)
+        c = np.stack([self.transicoes[comp] for comp in comps]).astype(np.float64)
+        origem = c.sum(axis=2)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dados = {f"{de} → {para}": (c[:, ESTADOS.index(de), ESTADOS.index(para)]
+                                        / origem[:, ESTADOS.index(de)] * 100)
+                     for de, para in transicoes}
+        return pd.DataFrame(dados, index=pd.Index(comps, name="competencia"))
+
+    def sequencias(self):
+        """Uma linha por cliente já visto, do mais ao menos atrasado."""
+        n = len(self)
+        t = pd.DataFrame({
+            "id_cliente":      self.ids(),
+            "status_atual":    pd.Categorical.from_codes(self.anterior[:n], ESTADOS),
+            "meses_atraso":    self.meses_atraso[:n],
+            "sequencia_atual": self.sequencia_atual[:n],
+            "maior_sequencia": self.maior_sequencia[:n],
+        })
+        return t.sort_values(["maior_sequencia", "sequencia_atual", "meses_atraso"],
+                             ascending=False, kind="stable").reset_index(drop=True)
+
+    def distribuicao_sequencias(self):
+        """Nº de clientes por maior sequência de meses seguidos em atraso (≥ 1)."""
+        cont = np.bincount(self.maior_sequencia[:len(self)])
+        return pd.Series(cont[1:], index=pd.RangeIndex(1, len(cont), name="meses"),
+                         name="clientes")
@@ -0,0 +1,351 @@
+"""
+=============================================================
+  SERVIÇO LOCAL DE KPIs (HTTP/JSON)
+  Carrega a base uma vez (analise_faturamento.carregar), mantém
+  o estado agregado quente em memória e serve o resultado de
+  cada seção como JSON — sem rodar o script e raspar stdout.
+  As respostas ficam em um cache LRU por versão da base; as
+  das seções fixas já são serializadas na carga. Uma thread
+  observa a fonte (tamanho + mtime) e recarrega em segundo
+  plano quando ela muda: até a troca, a versão anterior
+  continua atendendo.
+
+    python servico.py base_faturamento.csv --porta 8050
+    curl localhost:8050/secoes/1
+    curl "localhost:8050/secoes/4?qtd_minima=100"
+    curl "localhost:8050/cubo?por=competencia,tipo_cliente&tipo_cliente=PJ"
+=============================================================
+"""
+
+import argparse
+import functools
+import json
+import threading
+import time
+import traceback
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from analise_faturamento import CAMINHO_BASE, carregar
+from cache import chave_fonte
+from cubo_kpis import CuboKpis
+from ingestao import descobrir_arquivos, multiplos_arquivos
+
+PORTA = 8050
+INTERVALO = 2.0          # segundos entre verificações da fonte
+TAMANHO_LRU = 1024       # respostas guardadas por versão
+
+
+# ── seções como dados ─────────────────────────────────────
+def _secao0(analise):
+    acc = analise.acc
+    erro = acc.erro_aproximado()
+    q = analise.qualidade
+    return {
+        "linhas":            acc.linhas,
+        "colunas":           list(acc.colunas),
+        "competencias":      list(acc.competencias()),
+        # exato com o estado por cliente; estimativa do HyperLogLog sem ele
+        "clientes_unicos":   analise.resumo_cli.n_clientes,
+        "erro_padrao_clientes": erro["clientes"] if erro is not None else None,
+        "status_possiveis":  list(acc.status_possiveis()),
+        "nulos":             acc.nulos,
+        "qualidade":         (None if q is None else
+                              {**q, "quarentena": [str(a) for a in q["quarentena"]]}),
+    }
+
+
+def _secao1(analise):
+    acc = analise.acc
+    status, total = acc.status_counts(), acc.linhas
+    valor_total = acc.valor_total()
+    valor_atrasado = acc.valor_por_status().get("atrasada", 0.0)
+    return {
+        "total_faturas":  total,
+        "status":         {s: {"qtd": status.get(s, 0), "pct": status.get(s, 0) / total * 100}
+                           for s in ["paga", "atrasada", "em aberto"]},
+        "valor_total":    valor_total,
+        "valor_atrasado": valor_atrasado,
+        "pct_valor_atrasado": valor_atrasado / valor_total * 100,
+        "por_competencia": acc.tendencia()[["competencia", "total", "atrasadas", "tx_atraso"]],
+    }
+
+
+def _secao2(analise):
+    acc = analise.acc
+    return {"por_tipo":        acc.consumo_por_tipo(),
+            "por_status":      acc.consumo_por_status(),
+            "por_competencia": acc.consumo_por_competencia()}
+
+
+def _secao3(analise):
+    acc = analise.acc
+    return {"por_tipo": acc.faturamento_por_tipo(), "atraso_por_tipo": acc.atraso_por_tipo()}
+
+
+def _secao4(analise, qtd_minima="5"):
+    acc = analise.acc
+    return {"volume_por_dia": acc.volume_por_dia(),
+            "resumo_dia":     acc.resumo_dia(qtd_minima=int(qtd_minima))}
+
+
+def _secao5(analise):
+    return {"tendencia":   analise.acc.tendencia(),
+            "periodo":     analise.painel.periodo,
+            "variacao_pp": analise.painel["tendencia"].valor}
+
+
+def _sem_clientes(resumo, n):
+    if resumo.perfil is None:
+        raise ValueError(f"A seção {n} exige o estado por cliente (carga sem --sem-clientes).")
+
+
+def _secao6(analise):
+    _sem_clientes(analise.resumo_cli, 6)
+    return {"vip": analise.resumo_cli.vip}
+
+
+def _secao7(analise):
+    _sem_clientes(analise.resumo_cli, 7)
+    perfil = analise.resumo_cli.perfil
+    return {
+        "sem_atraso":    perfil.loc[perfil["atrasadas"] == 0, "clientes"].sum(),
+        "com_atraso":    perfil.loc[perfil["atrasadas"] > 0, "clientes"].sum(),
+        "inadimplentes_100": perfil.loc[perfil["tx_atraso"] == 100, "clientes"].sum(),
+        "acima_50pct":   perfil.loc[perfil["tx_atraso"] > 50, "clientes"].sum(),
+        "max_atrasos":   perfil["atrasadas"].max(),
+        "distribuicao":  perfil.groupby("atrasadas")["clientes"].sum(),
+        "perfil":        perfil,
+    }
+
+
+def _secao8(analise):
+    return {chave: k._asdict() for chave, k in analise.painel.kpis.items()}
+
+
+SECOES = {0: _secao0, 1: _secao1, 2: _secao2, 3: _secao3, 4: _secao4,
+          5: _secao5, 6: _secao6, 7: _secao7, 8: _secao8}
+
+
+def _para_json(obj):
+    """`default` do json.dumps: frames e séries via to_json (NaN → null)."""
+    if isinstance(obj, pd.DataFrame):
+        if not isinstance(obj.index, pd.RangeIndex):
+            obj = obj.reset_index()
+        return json.loads(obj.to_json(orient="records", date_format="iso"))
+    if isinstance(obj, pd.Series):
+        return json.loads(obj.to_json(orient="index", date_format="iso"))
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return _sem_nan(float(obj))
+    if isinstance(obj, (pd.Timestamp, datetime)):
+        return obj.isoformat()
+    raise TypeError(f"Não serializável: {type(obj).__name__}")
+
+
+def _sem_nan(obj):
+    """NaN não é JSON válido: vira null (dicionários e listas, recursivo)."""
+    if isinstance(obj, float) and np.isnan(obj):
+        return None
+    if isinstance(obj, dict):
+        return {k: _sem_nan(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_sem_nan(v) for v in obj]
+    return obj
+
+
+def _serializar(dados):
+    return json.dumps(_sem_nan(dados), default=_para_json, ensure_ascii=False).encode()
+
+
+# ── estado servido ────────────────────────────────────────
+class RotaDesconhecida(LookupError):
+    """Rota sem seção nem consulta correspondente (HTTP 404)."""
+
+
+def versao_fonte(caminho):
+    """Identidade barata da fonte (um CSV, ou todos os de um diretório/glob)."""
+    if multiplos_arquivos(caminho):
+        return "|".join(chave_fonte(a) for a in descobrir_arquivos(caminho))
+    return chave_fonte(caminho)
+
+
+class _Estado:
+    """Uma versão carregada da base, com o próprio cache de respostas."""
+
+    def __init__(self, analise, versao, tamanho_lru):
+        self.analise = analise
+        self.versao = versao
+        self.carregado_em = datetime.now().isoformat(timespec="seconds")
+        self._cubo = None
+        self.resposta = functools.lru_cache(maxsize=tamanho_lru)(self._resposta)
+        for n in SECOES:          # aquece as seções sem parâmetros
+            try:
+                self.resposta(f"/secoes/{n}", ())
+            except ValueError:    # 6/7 sem estado por cliente: 400 sob demanda
+                pass
+
+    @property
+    def cubo(self):
+        if self._cubo is None:
+            self._cubo = CuboKpis.de_acumulador(self.analise.acc)
+        return self._cubo
+
+    def _resposta(self, rota, parametros):
+        partes = rota.strip("/").split("/")
+        params = dict(parametros)
+        if partes[0] == "secoes" and len(partes) == 2 and partes[1].isdigit() \
+           and int(partes[1]) in SECOES:
+            return _serializar(SECOES[int(partes[1])](self.analise, **params))
+        if partes == ["cubo"]:
+            por = [d for d in params.pop("por", "").split(",") if d]
+            filtros = {dim: v.split(",") for dim, v in params.items()}
+            return _serializar(self.cubo.consultar(por, filtros))
+        raise RotaDesconhecida(rota)
+
+
+class ServicoKpis:
+    """
+    Estado quente + recarga automática; o servidor HTTP só consulta
+    `responder`. Pode ser usado sem HTTP (testes, notebooks):
+
+        servico = ServicoKpis("base.csv")
+        status, corpo = servico.responder("/secoes/1")
+    """
+
+    def __init__(self, caminho=CAMINHO_BASE, intervalo=INTERVALO,
+                 tamanho_lru=TAMANHO_LRU, **opcoes_carga):
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self.tamanho_lru = tamanho_lru
+        self.opcoes_carga = opcoes_carga
+        self.recargas = 0
+        self.erro_recarga = None
+        self._parar = threading.Event()
+        self._estado = self._carregar(versao_fonte(caminho))
+
+    def _carregar(self, versao):
+        t0 = time.perf_counter()
+        analise = carregar(self.caminho, relatorio=False, **self.opcoes_carga)
+        estado = _Estado(analise, versao, self.tamanho_lru)
+        print(f"  Base carregada: {analise.acc.linhas} linhas em "
+              f"{time.perf_counter() - t0:.2f}s (versão {versao[:16]})")
+        return estado
+
+    def verificar(self):
+        """Recarrega se a fonte mudou; erros mantêm a versão anterior."""
+        try:
+            versao = versao_fonte(self.caminho)
+            if versao != self._estado.versao:
+                self._estado = self._carregar(versao)   # troca atômica da referência
+                self.recargas += 1
+            self.erro_recarga = None
+        except Exception as e:                          # fonte no meio de uma cópia etc.
+            self.erro_recarga = f"{type(e).__name__}: {e}"
+            print(f"  Recarga falhou (mantida a versão anterior): {self.erro_recarga}")
+
+    def _observar(self):
+        while not self._parar.wait(self.intervalo):
+            self.verificar()
+
+    def iniciar_observador(self):
+        threading.Thread(target=self._observar, name="observador-fonte", daemon=True).start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+
+    def saude(self):
+        estado = self._estado
+        return {"status": "ok", "fonte": str(self.caminho), "versao": estado.versao,
+                "carregado_em": estado.carregado_em, "linhas": estado.analise.acc.linhas,
+                "recargas": self.recargas, "erro_recarga": self.erro_recarga,
+                "cache": estado.resposta.cache_info()._asdict()}
+
+    def responder(self, caminho_url):
+        """(status HTTP, corpo JSON em bytes) para um GET."""
+        url = urlsplit(caminho_url)
+        rota = "/" + url.path.strip("/")
+        try:
+            if rota == "/saude":
+                return 200, _serializar(self.saude())
+            if rota == "/":
+                return 200, _serializar({"rotas": [f"/secoes/{n}" for n in SECOES]
+                                         + ["/cubo", "/saude"]})
+            parametros = tuple(sorted(parse_qsl(url.query)))
+            return 200, self._estado.resposta(rota, parametros)
+        except RotaDesconhecida:
+            return 404, _serializar({"erro": f"rota desconhecida: {rota}"})
+        except (ValueError, TypeError) as e:
+            return 400, _serializar({"erro": str(e)})
+        except Exception as e:
+            traceback.print_exc()
+            return 500, _serializar({"erro": f"{type(e).__name__}: {e}"})
+
+
+class _Tratador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"       # keep-alive: sem handshake por requisição
+    disable_nagle_algorithm = True      # cabeçalho e corpo saem em escritas separadas:
+                                        # com Nagle, cada resposta esperaria ~40 ms de ACK
+
+    def do_GET(self):
+        status, corpo = self.server.servico.responder(self.path)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        pass                             # centenas de req/s: sem log por requisição
+
+
+def servir(servico, host="127.0.0.1", porta=PORTA):
+    servidor = ThreadingHTTPServer((host, porta), _Tratador)
+    servidor.daemon_threads = True
+    servidor.servico = servico
+    return servidor
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Serviço local de KPIs do faturamento")
+    ap.add_argument("entrada", nargs="?", default=str(CAMINHO_BASE),
+                    help="CSV da base, ou diretório/glob com um CSV por região")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--porta", type=int, default=PORTA)
+    ap.add_argument("--intervalo", type=float, default=INTERVALO,
+                    help="segundos entre verificações de mudança da fonte")
+    ap.add_argument("--tamanho-lru", type=int, default=TAMANHO_LRU)
+    ap.add_argument("--dir-cache", help="cache Arrow da base limpa (cache.py)")
+    ap.add_argument("--motor", choices=["pandas", "duckdb"], default="pandas")
+    ap.add_argument("--sem-validacao", action="store_true")
+    ap.add_argument("--aproximado", action="store_true",
+                    help="clientes únicos e medianas por esboços mescláveis (esbocos.py)")
+    ap.add_argument("--sem-clientes", action="store_true",
+                    help="com --aproximado: sem estado por cliente; /secoes/6 e 7 indisponíveis")
+    args = ap.parse_args(argv)
+    if args.sem_clientes and (not args.aproximado or args.motor != "pandas"):
+        ap.error("--sem-clientes requer --aproximado (motor pandas)")
+
+    servico = ServicoKpis(args.entrada, args.intervalo, args.tamanho_lru,
+                          dir_cache=args.dir_cache, motor=args.motor,
+                          validar=not args.sem_validacao, aproximado=args.aproximado,
+                          por_cliente=not args.sem_clientes).iniciar_observador()
+    servidor = servir(servico, args.host, args.porta)
+    print(f"  Servindo em http://{args.host}:{args.porta}/ (Ctrl+C para sair)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servico.parar()
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
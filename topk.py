@@ -0,0 +1,115 @@
+"""
+=============================================================
+  TOP-K EM HEAP LIMITADO (RANKING VIP)
+  Mantém os k clientes de maior valor à medida que os
+  agregados por cliente chegam, em O(C log k), e mescla
+  heaps parciais de workers diferentes.
+=============================================================
+"""
+
+import heapq
+
+import pandas as pd
+
+
+class _Item:
+    """Entrada do heap; o "menor" é o pior colocado (sai primeiro)."""
+
+    __slots__ = ("valor", "chave", "linha", "crescente")
+
+    def __init__(self, valor, chave, linha, crescente):
+        self.valor     = valor
+        self.chave     = chave
+        self.linha     = linha
+        self.crescente = crescente
+
+    def __lt__(self, outro):
+        if self.valor != outro.valor:
+            return self.valor < outro.valor
+        # empate: com desempate crescente, a chave maior é a pior
+        if self.crescente:
+            return self.chave > outro.chave
+        return self.chave < outro.chave
+
+
+class TopK:
+    """
+    Os `k` registros de maior `coluna`, com empates decididos por
+    `desempate` (crescente por padrão — o mesmo critério em qualquer
+    ordem de chegada, então o resultado não depende do particionamento).
+
+    Cada registro deve chegar uma única vez com seu valor final: serve
+    para os agregados por cliente de partições disjuntas (paralelo.py) ou
+    para o estado final do acumulador fatiado em blocos — não para somas
+    parciais de um mesmo cliente.
+
+        topo = TopK(k=10)
+        for parte in partes:
+            topo.atualizar(parte)
+        vip = topo.resultado()
+    """
+
+    def __init__(self, k=10, coluna="total_faturado", desempate="id_cliente",
+                 crescente=True):
+        if k < 1:
+            raise ValueError("k deve ser >= 1")
+        self.k         = k
+        self.coluna    = coluna
+        self.desempate = desempate
+        self.crescente = crescente
+        self.colunas   = None
+        self._heap     = []
+
+    def __len__(self):
+        return len(self._heap)
+
+    @property
+    def limiar(self):
+        """Menor valor ainda no top-k (None enquanto o heap não encheu)."""
+        return self._heap[0].valor if len(self._heap) == self.k else None
+
+    def _oferecer(self, item):
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, item)
+        elif self._heap[0] < item:
+            heapq.heapreplace(self._heap, item)
+
+    def atualizar(self, df):
+        """
+        Oferece as linhas de `df` (índice ou colunas com `coluna` e
+        `desempate`). Filtro vetorizado pelo limiar atual e redução a no
+        máximo k candidatos (mais empates) antes de tocar o heap.
+        """
+        if df.empty:
+            return self
+        if self.desempate not in df.columns:
+            df = df.reset_index()
+        if self.colunas is None:
+            self.colunas = df.columns.tolist()
+        if self.limiar is not None:
+            df = df[df[self.coluna] >= self.limiar]
+        if len(df) > self.k:
+            df = df.nlargest(self.k, self.coluna, keep="all")
+
+        valores = df[self.coluna].to_numpy()
+        chaves  = df[self.desempate].to_numpy()
+        for valor, chave, linha in zip(valores, chaves,
+                                       df.itertuples(index=False, name=None)):
+            self._oferecer(_Item(valor, chave, linha, self.crescente))
+        return self
+
+    def mesclar(self, outro):
+        """Incorpora o heap de outro TopK (ex.: de outro worker)."""
+        if (outro.k, outro.coluna, outro.desempate, outro.crescente) != \
+           (self.k, self.coluna, self.desempate, self.crescente):
+            raise ValueError("TopK com parâmetros diferentes não são mescláveis.")
+        if self.colunas is None:
+            self.colunas = outro.colunas
+        for item in outro._heap:
+            self._oferecer(item)
+        return self
+
+    def resultado(self):
+        """DataFrame do melhor para o pior colocado."""
+        itens = sorted(self._heap, reverse=True)
+        return pd.DataFrame([it.linha for it in itens], columns=self.colunas)
@@ -0,0 +1,220 @@
+"""
+=============================================================
+  VALIDAÇÃO E QUALIDADE DOS DADOS (NA CARGA)
+  Cada bloco chega como texto e é conferido coluna a coluna,
+  de forma vetorizada, antes de qualquer agregação: tipos,
+  categorias permitidas, datas, consumo negativo e linhas
+  repetidas por (competencia, id_cliente). Linhas reprovadas
+  vão para um CSV de quarentena com os motivos; se a fração
+  reprovada passar do limite, a carga é abortada ali mesmo,
+  no primeiro bloco em que isso acontecer.
+=============================================================
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from carga import FORMATO_DATA, STATUS_FATURA, TIPOS_CLIENTE
+from indice_clientes import IndiceClientes
+
+# motivo → descrição; a ordem é a da coluna `motivos` da quarentena
+MOTIVOS = {
+    "competencia_invalida": "competência fora do formato AAAA-MM",
+    "id_ausente":           "id_cliente vazio",
+    "valor_invalido":       "valor_fatura vazio ou não numérico",
+    "tipo_desconhecido":    f"tipo_cliente fora de {TIPOS_CLIENTE}",
+    "consumo_invalido":     "consumo_energia_kwh vazio ou não inteiro",
+    "consumo_negativo":     "consumo_energia_kwh negativo",
+    "status_desconhecido":  f"status_fatura fora de {STATUS_FATURA}",
+    "data_invalida":        "data_vencimento vazia ou fora de dd/mm/aaaa",
+    "duplicada":            "(competencia, id_cliente) já visto",
+}
+
+LIMITE_REJEICAO = 0.05   # fração reprovada que aborta a carga (None = nunca)
+PADRAO_COMPETENCIA = r"\d{4}-(?:0[1-9]|1[0-2])"
+MAX_CONSUMO = np.iinfo(np.int32).max
+
+
+def _numerico(texto):
+    """
+    Texto → float; inválidos viram NaN. O cast direto é bem mais rápido
+    e resolve os blocos limpos; só um bloco com lixo paga o to_numeric.
+    """
+    try:
+        return texto.astype("float64")
+    except (ValueError, TypeError):
+        return pd.to_numeric(texto, errors="coerce")
+
+
+class ValidadorFaturas:
+    """
+    Uso, entre o parser e o acumulador (ver carga.ler_em_blocos):
+
+        validador = ValidadorFaturas("quarentena.csv")
+        for bloco in ler_em_blocos("base.csv", validador=validador):
+            acc.atualizar(bloco)          # só linhas válidas, já tipadas
+        validador.resumo()                # {"linhas", "rejeitadas", "motivos", ...}
+
+    As repetidas são detectadas ao longo de toda a carga: cada
+    (competencia, id_cliente) aceito vira uma chave int64 (código da
+    competência << 32 | código int32 do cliente, ver indice_clientes.py),
+    guardada em um índice — ~16 bytes por linha. A primeira ocorrência
+    fica; as seguintes vão para a quarentena.
+    """
+
+    def __init__(self, quarentena=None, limite_rejeicao=LIMITE_REJEICAO):
+        self.quarentena = Path(quarentena) if quarentena is not None else None
+        self.limite     = limite_rejeicao
+        self.linhas     = 0
+        self.rejeitadas = 0
+        self.contagens  = dict.fromkeys(MOTIVOS, 0)
+        self.arquivos   = []                 # quarentenas gravadas (esta e mescladas)
+        self._clientes  = IndiceClientes()
+        self._meses     = {}
+        self._chaves    = IndiceClientes()   # aqui, índice das chaves int64
+        self._gravadas  = 0
+
+    def _marcas(self, bruto, valor, consumo, tipo, status, data):
+        """DataFrame booleano linha × motivo."""
+        marcas = pd.DataFrame({
+            "competencia_invalida": ~bruto["competencia"].str.fullmatch(
+                PADRAO_COMPETENCIA).fillna(False).astype(bool),
+            "id_ausente":          bruto["id_cliente"].str.strip().fillna("").eq(""),
+            "valor_invalido":      valor.isna(),
+            "tipo_desconhecido":   tipo.isna(),
+            "consumo_invalido":    consumo.isna() | (consumo % 1 != 0)
+                                   | (consumo.abs() > MAX_CONSUMO),
+            "consumo_negativo":    consumo < 0,
+            "status_desconhecido": status.isna(),
+            "data_invalida":       data.isna(),
+        }, index=bruto.index)
+
+        # repetidas: só entre as linhas que passaram nas demais regras,
+        # para que uma primeira ocorrência inválida não descarte a válida
+        ok = ~marcas.any(axis=1).to_numpy()
+        chave = self._chave(bruto[ok])
+        repetida = np.zeros(len(bruto), dtype=bool)
+        repetida[ok] = (pd.Series(chave).duplicated().to_numpy()
+                        | (self._chaves.localizar(chave) >= 0))
+        self._chaves.codificar(chave[~repetida[ok]])
+        marcas["duplicada"] = repetida
+        return marcas
+
+    def _chave(self, linhas):
+        # factorize no bloco primeiro: só os ids distintos passam pelo índice
+        locais, ids = pd.factorize(linhas["id_cliente"])
+        cliente = self._clientes.codificar(ids)[locais].astype(np.int64)
+        locais, meses = pd.factorize(linhas["competencia"])
+        mes = np.array([self._meses.setdefault(m, len(self._meses)) for m in meses],
+                       dtype=np.int64)[locais]
+        return (mes << 32) | cliente
+
+    def validar(self, bruto):
+        """Bloco lido como texto → bloco tipado só com as linhas válidas."""
+        if self.linhas == 0 and self.quarentena is not None:
+            self.quarentena.unlink(missing_ok=True)   # de uma execução anterior
+        valor   = _numerico(bruto["valor_fatura"].str.replace(",", ".", regex=False))
+        consumo = _numerico(bruto["consumo_energia_kwh"])
+        tipo    = bruto["tipo_cliente"].astype(pd.CategoricalDtype(TIPOS_CLIENTE))
+        status  = bruto["status_fatura"].astype(pd.CategoricalDtype(STATUS_FATURA))
+        data    = pd.to_datetime(bruto["data_vencimento"], format=FORMATO_DATA,
+                                 errors="coerce")
+
+        marcas = self._marcas(bruto, valor, consumo, tipo, status, data)
+        rej = marcas.any(axis=1).to_numpy()
+        self.linhas     += len(bruto)
+        self.rejeitadas += int(rej.sum())
+        for motivo, n in marcas.sum().items():
+            self.contagens[motivo] += int(n)
+        if rej.any():
+            self._quarentenar(bruto[rej], marcas[rej])
+            self._conferir_limite()
+
+        ok = ~rej
+        return pd.DataFrame({
+            "competencia":         bruto["competencia"][ok],
+            "id_cliente":          bruto["id_cliente"][ok],
+            "valor_fatura":        valor[ok].astype("float64"),
+            "tipo_cliente":        tipo[ok],
+            "consumo_energia_kwh": consumo[ok].astype("int32"),
+            "status_fatura":       status[ok],
+            "data_vencimento":     data[ok],
+        })
+
+    def _quarentenar(self, linhas, marcas):
+        if self.quarentena is None:
+            return
+        linhas = linhas.assign(motivos=marcas.dot(marcas.columns + ",").str.rstrip(","))
+        primeira = self._gravadas == 0
+        if primeira:
+            self.quarentena.parent.mkdir(parents=True, exist_ok=True)
+            self.arquivos.append(str(self.quarentena))
+        linhas.to_csv(self.quarentena, sep=";", index=False,
+                      mode="w" if primeira else "a", header=primeira)
+        self._gravadas += len(linhas)
+
+    def _conferir_limite(self):
+        if self.limite is None or self.rejeitadas <= self.limite * self.linhas:
+            return
+        destino = f" Linhas em {', '.join(self.arquivos)}." if self.arquivos else ""
+        raise ValueError(
+            f"Carga abortada: {self.rejeitadas} de {self.linhas} linhas reprovadas "
+            f"({self.rejeitadas / self.linhas:.1%}; limite {self.limite:.1%}). "
+            f"Motivos: {self.motivos()}.{destino}")
+
+    # ── repetidas entre validadores (um por arquivo) ──────
+    def registrar(self, bloco):
+        """Inclui no índice de repetidas um bloco já validado (ex.: lido do cache)."""
+        self._chaves.codificar(self._chave(bloco))
+        return self
+
+    def chaves(self):
+        """Chaves aceitas, portáveis entre processos: (ids, competências, chaves)."""
+        return self._clientes.valores(), list(self._meses), self._chaves.valores()
+
+    def incorporar(self, chaves):
+        """
+        Traz as `chaves()` de outro validador para os códigos deste e
+        devolve quantas já tinham sido aceitas aqui. Com alguma repetida,
+        nada é registrado: quem chamou revalida as linhas contra este
+        índice (ver `herdar`), para que as repetidas vão à quarentena.
+        """
+        ids, meses, outras = chaves
+        cliente = self._clientes.codificar(ids).astype(np.int64)
+        mes = np.array([self._meses.setdefault(m, len(self._meses)) for m in meses],
+                       dtype=np.int64)
+        outras = np.asarray(outras, dtype=np.int64)
+        outras = (mes[outras >> 32] << 32) | cliente[outras & 0xFFFFFFFF]
+        repetidas = int((self._chaves.localizar(outras) >= 0).sum())
+        if not repetidas:
+            self._chaves.codificar(outras)
+        return repetidas
+
+    def herdar(self, outro):
+        """Passa a usar (e alimentar) o índice de repetidas de `outro`."""
+        self._clientes, self._meses, self._chaves = outro._clientes, outro._meses, outro._chaves
+        return self
+
+    # ── resumo ────────────────────────────────────────────
+    def motivos(self):
+        """{motivo: linhas} só dos motivos que ocorreram."""
+        return {m: n for m, n in self.contagens.items() if n}
+
+    def resumo(self):
+        return {"linhas": self.linhas, "rejeitadas": self.rejeitadas,
+                "motivos": self.motivos(), "quarentena": list(self.arquivos)}
+
+    def mesclar(self, resumo):
+        """
+        Soma o `resumo()` de outro validador (ex.: worker da ingestão) e
+        confere o limite sobre o total.
+        """
+        self.linhas     += resumo["linhas"]
+        self.rejeitadas += resumo["rejeitadas"]
+        for motivo, n in resumo["motivos"].items():
+            self.contagens[motivo] += n
+        self.arquivos += resumo["quarentena"]
+        self._conferir_limite()
+        return self